@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'trainings.apps.TrainingsConfig',
     'exams.apps.ExamsConfig',
     'reports.apps.ReportsConfig',
+    'search.apps.SearchConfig',
 ]
 
 MIDDLEWARE = [
@@ -70,6 +71,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'config.context_processors.role_context',
+                'notices.context_processors.inbox',
             ],
         },
     },
@@ -101,6 +103,20 @@ else:
     }
 
 
+# Cache
+# Without REDIS_URL every process gets its own local-memory cache, which is only
+# suitable for a single process; anything shared between workers (version stamps,
+# buffered read receipts) needs Redis.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -141,6 +157,35 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# What happens to participations of employees no longer targeted by a training:
+# 'keep' (default), 'retire_assigned' (drop rows still in the assigned state) or
+# 'delete'. Retiring is opt-in because it also removes rows added by hand in admin.
+TRAINING_STALE_PARTICIPATION_POLICY = os.environ.get('TRAINING_STALE_PARTICIPATION_POLICY', 'keep')
+
+# With a shared cache, notice read receipts are buffered there and the
+# flush_notice_reads --interval flusher writes them once this many inbox visits are
+# pending or the oldest one is older than the max age (seconds). Without one the
+# flusher cannot see other processes' buffers, so receipts are written directly.
+NOTICE_READ_BUFFER_ENABLED = os.environ.get('NOTICE_READ_BUFFER_ENABLED', str(bool(REDIS_URL))).lower() == 'true'
+NOTICE_READ_BUFFER_FLUSH_THRESHOLD = int(os.environ.get('NOTICE_READ_BUFFER_FLUSH_THRESHOLD', '200'))
+NOTICE_READ_BUFFER_MAX_AGE = int(os.environ.get('NOTICE_READ_BUFFER_MAX_AGE', '60'))
+
+# Inactive notices that ended this many days ago are moved to the archive tables.
+NOTICE_ARCHIVE_AFTER_DAYS = int(os.environ.get('NOTICE_ARCHIVE_AFTER_DAYS', '180'))
+
+# Outgoing mail; the console backend prints messages so digests can be checked locally.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False').lower() == 'true'
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'habea@localhost')
+
+# An unchanged safety digest is not mailed to the same person again within this many hours.
+SAFETY_DIGEST_RESEND_AFTER_HOURS = int(os.environ.get('SAFETY_DIGEST_RESEND_AFTER_HOURS', '24'))
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
@@ -96,6 +96,7 @@ urlpatterns = [
     path('trainings/', include('trainings.urls')),
     path('exams/', include('exams.urls')),
     path('reports/', include('reports.urls')),
+    path('search/', include('search.urls')),
     path('settings/', settings_view, name='settings'),
 ]
 
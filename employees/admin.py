@@ -5,8 +5,8 @@ from .models import Department, Employee, Location, Position
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'parent')
-    search_fields = ('name',)
+    list_display = ('id', 'name', 'full_path', 'depth')
+    search_fields = ('name', 'full_path')
     list_filter = ('parent',)
 
 
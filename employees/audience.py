@@ -0,0 +1,273 @@
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal
+
+from .models import AudienceMembership, DepartmentClosure, Employee
+
+MEMBERSHIP_BATCH_SIZE = 1000
+
+# Sent with the audience model as sender and the ``object_ids`` whose
+# membership rows were added or removed.
+audience_changed = Signal()
+
+
+class AudienceType:
+    ORGANIZATION_WIDE = 'organization_wide'
+    DEPARTMENT = 'department'
+    POSITION = 'position'
+    SPECIFIC_EMPLOYEE = 'specific_employee'
+
+
+@dataclass(frozen=True)
+class AudienceFields:
+    object_type: str
+    type_field: str
+    departments: str | None = 'departments'
+    positions: str | None = 'positions'
+    employees: str | None = 'employees'
+
+
+_audience_models = {}
+
+
+def register_audience_model(
+    model,
+    type_field,
+    departments='departments',
+    positions='positions',
+    employees='employees',
+    object_type=None,
+):
+    fields = AudienceFields(
+        object_type=object_type or model._meta.model_name,
+        type_field=type_field,
+        departments=departments,
+        positions=positions,
+        employees=employees,
+    )
+    _audience_models[model] = fields
+
+    uid = f'audience_{model._meta.label_lower}'
+    post_save.connect(_refresh_saved_target, sender=model, dispatch_uid=f'{uid}_save')
+    post_delete.connect(_clear_deleted_target, sender=model, dispatch_uid=f'{uid}_delete')
+    for field_name in (departments, positions, employees):
+        if field_name:
+            through = model._meta.get_field(field_name).remote_field.through
+            m2m_changed.connect(_refresh_changed_targets, sender=through, dispatch_uid=f'{uid}_{field_name}')
+    return fields
+
+
+def get_audience_fields(model):
+    try:
+        return _audience_models[model]
+    except KeyError:
+        raise LookupError(f'{model.__name__} audience загвар бүртгэгдээгүй байна.') from None
+
+
+def get_audience_models():
+    return dict(_audience_models)
+
+
+def _through(model, field_name):
+    field = model._meta.get_field(field_name)
+    return field.remote_field.through, field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def _selected_ids(target, field_name):
+    through, source_name, target_name = _through(type(target), field_name)
+    return through.objects.filter(**{source_name: target.pk}).values(target_name)
+
+
+def audience_q(audience_type, department_ids=(), position_ids=(), employee_ids=()):
+    if audience_type == AudienceType.ORGANIZATION_WIDE:
+        return Q()
+    if audience_type == AudienceType.DEPARTMENT:
+        subtree = DepartmentClosure.objects.filter(ancestor_id__in=department_ids).values('descendant_id')
+        return Q(department_id__in=subtree)
+    if audience_type == AudienceType.POSITION:
+        return Q(position_id__in=position_ids)
+    if audience_type == AudienceType.SPECIFIC_EMPLOYEE:
+        return Q(pk__in=employee_ids)
+    return Q(pk__in=[])
+
+
+def audience_q_for(target):
+    fields = get_audience_fields(type(target))
+    audience_type = getattr(target, fields.type_field)
+    if audience_type == AudienceType.ORGANIZATION_WIDE:
+        return Q()
+
+    field_name, selection_key = {
+        AudienceType.DEPARTMENT: (fields.departments, 'department_ids'),
+        AudienceType.POSITION: (fields.positions, 'position_ids'),
+        AudienceType.SPECIFIC_EMPLOYEE: (fields.employees, 'employee_ids'),
+    }.get(audience_type, (None, None))
+    if field_name is None:
+        return Q(pk__in=[])
+    return audience_q(audience_type, **{selection_key: _selected_ids(target, field_name)})
+
+
+def audience_employees(target, queryset=None):
+    queryset = Employee.objects.all() if queryset is None else queryset
+    return queryset.filter(audience_q_for(target))
+
+
+def audience_count(audience_type, department_ids=(), position_ids=(), employee_ids=()):
+    return Employee.objects.filter(audience_q(audience_type, department_ids, position_ids, employee_ids)).count()
+
+
+def applicable_q(model, employee):
+    fields = get_audience_fields(model)
+    type_field = fields.type_field
+    filters = Q(**{type_field: AudienceType.ORGANIZATION_WIDE})
+
+    if fields.departments and employee.department_id:
+        through, source_name, target_name = _through(model, fields.departments)
+        # The closure table rather than the in-process tree: membership rows are
+        # written from here and must not depend on how fresh this worker's tree is.
+        ancestor_ids = DepartmentClosure.objects.filter(descendant_id=employee.department_id).values('ancestor_id')
+        matching = through.objects.filter(**{f'{target_name}__in': ancestor_ids}).values(source_name)
+        filters |= Q(**{type_field: AudienceType.DEPARTMENT, 'pk__in': matching})
+    if fields.positions and employee.position_id:
+        through, source_name, target_name = _through(model, fields.positions)
+        matching = through.objects.filter(**{target_name: employee.position_id}).values(source_name)
+        filters |= Q(**{type_field: AudienceType.POSITION, 'pk__in': matching})
+    if fields.employees:
+        through, source_name, target_name = _through(model, fields.employees)
+        matching = through.objects.filter(**{target_name: employee.pk}).values(source_name)
+        filters |= Q(**{type_field: AudienceType.SPECIFIC_EMPLOYEE, 'pk__in': matching})
+    return filters
+
+
+def applicable_queryset(model, employee, queryset=None):
+    queryset = model.objects.all() if queryset is None else queryset
+    return queryset.filter(applicable_q(model, employee))
+
+
+def member_object_ids(model, employee):
+    return AudienceMembership.objects.filter(
+        object_type=get_audience_fields(model).object_type,
+        employee=employee,
+    ).values('object_id')
+
+
+def member_queryset(model, employee, queryset=None):
+    queryset = model.objects.all() if queryset is None else queryset
+    return queryset.filter(pk__in=member_object_ids(model, employee))
+
+
+def member_employees(target, queryset=None):
+    queryset = Employee.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        pk__in=AudienceMembership.objects.filter(
+            object_type=get_audience_fields(type(target)).object_type,
+            object_id=target.pk,
+        ).values('employee_id')
+    )
+
+
+def _insert_memberships(rows, batch_size):
+    created = 0
+    batch = []
+    for object_type, object_id, employee_id in rows:
+        batch.append(AudienceMembership(object_type=object_type, object_id=object_id, employee_id=employee_id))
+        if len(batch) >= batch_size:
+            AudienceMembership.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        AudienceMembership.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def refresh_audience(target, batch_size=MEMBERSHIP_BATCH_SIZE):
+    object_type = get_audience_fields(type(target)).object_type
+    members = AudienceMembership.objects.filter(object_type=object_type, object_id=target.pk)
+    audience = audience_employees(target)
+
+    with transaction.atomic():
+        removed, _ = members.exclude(employee_id__in=audience.values('id')).delete()
+        missing_ids = audience.exclude(id__in=members.values('employee_id')).values_list('id', flat=True)
+        created = _insert_memberships(
+            ((object_type, target.pk, employee_id) for employee_id in missing_ids.iterator(chunk_size=batch_size)),
+            batch_size,
+        )
+    if created or removed:
+        audience_changed.send(sender=type(target), object_ids=[target.pk])
+    return {'created': created, 'removed': removed}
+
+
+def refresh_audiences(targets, batch_size=MEMBERSHIP_BATCH_SIZE):
+    for target in targets:
+        refresh_audience(target, batch_size=batch_size)
+
+
+def clear_audience(model, object_id):
+    object_type = get_audience_fields(model).object_type
+    AudienceMembership.objects.filter(object_type=object_type, object_id=object_id).delete()
+
+
+def refresh_employee_audiences(employee, batch_size=MEMBERSHIP_BATCH_SIZE):
+    changed = {}
+    with transaction.atomic():
+        for model, fields in _audience_models.items():
+            members = AudienceMembership.objects.filter(object_type=fields.object_type, employee=employee)
+            applicable = applicable_queryset(model, employee)
+            stale_ids = list(members.exclude(object_id__in=applicable.values('pk')).values_list('object_id', flat=True))
+            missing_ids = list(applicable.exclude(pk__in=members.values('object_id')).values_list('pk', flat=True))
+            members.filter(object_id__in=stale_ids).delete()
+            _insert_memberships(((fields.object_type, object_id, employee.pk) for object_id in missing_ids), batch_size)
+            if stale_ids or missing_ids:
+                changed[model] = stale_ids + missing_ids
+    for model, object_ids in changed.items():
+        audience_changed.send(sender=model, object_ids=object_ids)
+
+
+def get_department_targets(department_ids):
+    department_ids = list(department_ids)
+    targets = []
+    for model, fields in _audience_models.items():
+        if not fields.departments:
+            continue
+        through, source_name, target_name = _through(model, fields.departments)
+        matching = through.objects.filter(**{f'{target_name}__in': department_ids}).values(source_name)
+        targets.extend(model.objects.filter(**{fields.type_field: AudienceType.DEPARTMENT, 'pk__in': matching}))
+    return targets
+
+
+def _refresh_saved_target(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_audience(instance)
+
+
+def _clear_deleted_target(sender, instance, **kwargs):
+    clear_audience(sender, instance.pk)
+
+
+def _refresh_changed_targets(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not reverse:
+        if action in {'post_add', 'post_remove'} and not pk_set:
+            return
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            refresh_audience(instance)
+        return
+
+    # Changed from the Department/Position/Employee side: pk_set holds target ids.
+    if action == 'pre_clear':
+        source_name, target_name = next(
+            (field.m2m_field_name(), field.m2m_reverse_field_name())
+            for field in model._meta.many_to_many
+            if field.remote_field.through is sender
+        )
+        instance._audience_cleared_ids = set(
+            sender.objects.filter(**{target_name: instance.pk}).values_list(source_name, flat=True)
+        )
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_audience_cleared_ids', set())
+    if action in {'post_add', 'post_remove', 'post_clear'} and pk_set:
+        refresh_audiences(model.objects.filter(pk__in=pk_set))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from employees.models import Department
+from employees.services import rebuild_department_closure, refresh_department_paths
+
+
+class Command(BaseCommand):
+    help = 'Department closure хүснэгт болон замын талбаруудыг бүрэн дахин үүсгэнэ.'
+
+    def handle(self, *args, **options):
+        total = rebuild_department_closure()
+        refresh_department_paths(Department.objects.values_list('id', flat=True))
+        self.stdout.write(self.style.SUCCESS(f'Department closure: {total} мөр үүслээ.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.audience import MEMBERSHIP_BATCH_SIZE, get_audience_models, refresh_audience
+
+
+class Command(BaseCommand):
+    help = 'Мэдэгдэл, сургалт, шалгалтын хамрах хүрээний гишүүнчлэлийг дахин тооцоолно.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='object_type', help='Зөвхөн тухайн төрөл (notice, training, exam).')
+        parser.add_argument('--batch-size', type=int, default=MEMBERSHIP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        models = {
+            fields.object_type: model
+            for model, fields in get_audience_models().items()
+            if not options['object_type'] or fields.object_type == options['object_type']
+        }
+        if not models:
+            raise CommandError(f"Тодорхойгүй төрөл: {options['object_type']}")
+
+        for object_type, model in models.items():
+            created = removed = 0
+            for target in model.objects.iterator():
+                result = refresh_audience(target, batch_size=options['batch_size'])
+                created += result['created']
+                removed += result['removed']
+            self.stdout.write(f'{object_type}: +{created} / -{removed}')
+        self.stdout.write(self.style.SUCCESS('Гишүүнчлэл шинэчлэгдлээ.'))
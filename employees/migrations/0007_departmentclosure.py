@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_department_closure(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    DepartmentClosure = apps.get_model('employees', 'DepartmentClosure')
+
+    parent_map = dict(Department.objects.values_list('id', 'parent_id'))
+    rows = []
+    for department_id in parent_map:
+        depth = 0
+        current = department_id
+        seen = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(DepartmentClosure(ancestor_id=current, descendant_id=department_id, depth=depth))
+            current = parent_map.get(current)
+            depth += 1
+    DepartmentClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_create_default_role_groups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='employees.department')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='employees.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='dept_closure_desc_depth_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_department_closure')],
+            },
+        ),
+        migrations.RunPython(populate_department_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:09
+
+from django.db import migrations, models
+
+
+def populate_department_paths(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+
+    departments = {item.id: item for item in Department.objects.all()}
+    computed = {}
+
+    def compute(department_id, seen=()):
+        if department_id in computed:
+            return computed[department_id]
+        item = departments[department_id]
+        if item.parent_id is None or item.parent_id not in departments or item.parent_id in seen:
+            values = (f'/{item.id}/', item.name, 0)
+        else:
+            parent_path, parent_full_path, parent_depth = compute(item.parent_id, seen + (department_id,))
+            values = (f'{parent_path}{item.id}/', f'{parent_full_path} / {item.name}', parent_depth + 1)
+        computed[department_id] = values
+        return values
+
+    for item in departments.values():
+        item.path, item.full_path, item.depth = compute(item.id)
+    Department.objects.bulk_update(departments.values(), ['path', 'full_path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_departmentclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='full_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=1000),
+        ),
+        migrations.RunPython(populate_department_paths, migrations.RunPython.noop),
+    ]
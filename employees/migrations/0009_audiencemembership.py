@@ -0,0 +1,72 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# (app label, model, object_type, audience type field, has an ``employees`` selection)
+AUDIENCE_MODELS = (
+    ('notices', 'Notice', 'notice', 'notice_type', True),
+    ('trainings', 'Training', 'training', 'training_type', True),
+    ('exams', 'Exam', 'exam', 'target_type', False),
+)
+
+
+def populate_audience_memberships(apps, schema_editor):
+    AudienceMembership = apps.get_model('employees', 'AudienceMembership')
+    DepartmentClosure = apps.get_model('employees', 'DepartmentClosure')
+    Employee = apps.get_model('employees', 'Employee')
+
+    for app_label, model_name, object_type, type_field, has_employees in AUDIENCE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        for target in model.objects.iterator():
+            audience_type = getattr(target, type_field)
+            if audience_type == 'organization_wide':
+                employees = Employee.objects.all()
+            elif audience_type == 'department':
+                subtree = DepartmentClosure.objects.filter(
+                    ancestor_id__in=target.departments.values('id'),
+                ).values('descendant_id')
+                employees = Employee.objects.filter(department_id__in=subtree)
+            elif audience_type == 'position':
+                employees = Employee.objects.filter(position_id__in=target.positions.values('id'))
+            elif audience_type == 'specific_employee' and has_employees:
+                employees = target.employees.all()
+            else:
+                continue
+
+            batch = []
+            for employee_id in employees.values_list('id', flat=True).iterator(chunk_size=BATCH_SIZE):
+                batch.append(AudienceMembership(object_type=object_type, object_id=target.pk, employee_id=employee_id))
+                if len(batch) >= BATCH_SIZE:
+                    AudienceMembership.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+            AudienceMembership.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_department_path'),
+        ('exams', '0002_remove_attemptresponse_selected_answer_and_more'),
+        ('notices', '0001_initial'),
+        ('trainings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudienceMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=32)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience_memberships', to='employees.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee', 'object_type', 'object_id'], name='audience_employee_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('object_type', 'object_id', 'employee'), name='unique_audience_membership')],
+            },
+        ),
+        migrations.RunPython(populate_audience_memberships, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0010_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='department',
+            name='full_path',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='path',
+            field=models.TextField(blank=True, db_index=True, default='', editable=False),
+        ),
+    ]
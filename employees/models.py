@@ -13,6 +13,12 @@ class Department(models.Model):
         blank=True,
         related_name='children',
     )
+    # Unbounded: both grow with the depth of the tree and the length of the names.
+    path = models.TextField(blank=True, default='', editable=False, db_index=True)
+    full_path = models.TextField(blank=True, default='', editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+
+    PATH_SEPARATOR = ' / '
 
     class Meta:
         ordering = ('name',)
@@ -21,14 +27,28 @@ class Department(models.Model):
         if self.pk and self.parent_id == self.pk:
             raise ValidationError('Department өөрийгөө parent болгож болохгүй.')
         # Prevent circular hierarchy: a node cannot be a child of its descendants.
-        ancestor = self.parent
-        while ancestor is not None:
-            if ancestor.pk == self.pk:
-                raise ValidationError('Department шатлал давталттай байж болохгүй.')
-            ancestor = ancestor.parent
+        if self.pk and self.path and self.parent is not None and self.parent.path.startswith(self.path):
+            raise ValidationError('Department шатлал давталттай байж болохгүй.')
 
     def __str__(self):
-        return self.name if not self.parent else f'{self.parent} / {self.name}'
+        return self.full_path or self.name
+
+
+class DepartmentClosure(models.Model):
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_department_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='dept_closure_desc_depth_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
 
 
 class Position(models.Model):
@@ -100,3 +120,30 @@ class Employee(models.Model):
 
     def __str__(self):
         return f'{self.last_name} {self.first_name}'
+
+
+class AudienceMembership(models.Model):
+    object_type = models.CharField(max_length=32)
+    object_id = models.PositiveBigIntegerField()
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='audience_memberships')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['object_type', 'object_id', 'employee'], name='unique_audience_membership'),
+        ]
+        indexes = [
+            models.Index(fields=['employee', 'object_type', 'object_id'], name='audience_employee_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.object_type}:{self.object_id} - {self.employee_id}'
+
+
+class CacheVersion(models.Model):
+    """Version stamp of an in-process cache, used when the Django cache is not shared between processes."""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
@@ -0,0 +1,167 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .audience import get_department_targets, refresh_audiences
+from .models import Department, DepartmentClosure
+from .tree import bump_department_tree_version
+
+CLOSURE_BATCH_SIZE = 1000
+PATH_BATCH_SIZE = 500
+
+
+def get_subtree_ids_queryset(department_ids):
+    return DepartmentClosure.objects.filter(ancestor_id__in=department_ids).values_list('descendant_id', flat=True)
+
+
+def get_ancestor_ids_queryset(department_ids):
+    return DepartmentClosure.objects.filter(descendant_id__in=department_ids).values_list('ancestor_id', flat=True)
+
+
+def get_department_subtree_ids(department_ids):
+    return set(get_subtree_ids_queryset(department_ids))
+
+
+def get_department_ancestor_ids(department_id):
+    return set(get_ancestor_ids_queryset([department_id]))
+
+
+def _attach_subtree(department_id, parent_id):
+    if parent_id is None:
+        return
+    subtree = list(
+        DepartmentClosure.objects.filter(ancestor_id=department_id).values_list('descendant_id', 'depth')
+    )
+    ancestors = list(DepartmentClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+    DepartmentClosure.objects.bulk_create(
+        [
+            DepartmentClosure(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + descendant_depth + 1,
+            )
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        ],
+        batch_size=CLOSURE_BATCH_SIZE,
+    )
+
+
+def _detach_subtree(department_id):
+    subtree_ids = list(get_subtree_ids_queryset([department_id]))
+    DepartmentClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+
+def _ensure_not_inside_subtree(department_id, parent_id):
+    if parent_id is None:
+        return
+    if DepartmentClosure.objects.filter(ancestor_id=department_id, descendant_id=parent_id).exists():
+        raise ValidationError('Department шатлал давталттай байж болохгүй.')
+
+
+def insert_department_node(department):
+    with transaction.atomic():
+        DepartmentClosure.objects.get_or_create(ancestor_id=department.pk, descendant_id=department.pk)
+        _attach_subtree(department.pk, department.parent_id)
+
+
+def move_department_subtree(department):
+    with transaction.atomic():
+        _ensure_not_inside_subtree(department.pk, department.parent_id)
+        _detach_subtree(department.pk)
+        _attach_subtree(department.pk, department.parent_id)
+
+
+def move_departments(department_ids, new_parent):
+    parent_id = new_parent.pk if new_parent is not None else None
+    department_ids = list(department_ids)
+    with transaction.atomic():
+        for department_id in department_ids:
+            _ensure_not_inside_subtree(department_id, parent_id)
+        parent_ids = set(
+            Department.objects.filter(pk__in=department_ids).exclude(parent=None).values_list('parent_id', flat=True)
+        )
+        if parent_id is not None:
+            parent_ids.add(parent_id)
+        affected_ids = set(get_ancestor_ids_queryset(parent_ids))
+        Department.objects.filter(pk__in=department_ids).update(parent_id=parent_id)
+        for department_id in department_ids:
+            _detach_subtree(department_id)
+            _attach_subtree(department_id, parent_id)
+        refresh_department_paths(department_ids)
+        bump_department_tree_version()
+        refresh_audiences(get_department_targets(affected_ids))
+    return len(department_ids)
+
+
+def detach_department_children(department):
+    child_ids = list(Department.objects.filter(parent_id=department.pk).values_list('id', flat=True))
+    with transaction.atomic():
+        for child_id in child_ids:
+            _detach_subtree(child_id)
+    return child_ids
+
+
+def refresh_department_paths(department_ids):
+    subtree_ids = get_department_subtree_ids(department_ids)
+    nodes = {
+        item.id: item
+        for item in Department.objects.filter(pk__in=subtree_ids).only('id', 'parent_id', 'name', 'path', 'full_path', 'depth')
+    }
+
+    children = {}
+    roots = []
+    for item in nodes.values():
+        if item.parent_id in nodes:
+            children.setdefault(item.parent_id, []).append(item)
+        else:
+            roots.append(item)
+
+    outside_parent_ids = {item.parent_id for item in roots if item.parent_id}
+    outside_parents = {
+        department_id: (path, full_path, depth)
+        for department_id, path, full_path, depth in Department.objects.filter(pk__in=outside_parent_ids).values_list(
+            'id', 'path', 'full_path', 'depth'
+        )
+    }
+
+    changed = []
+    stack = [(item, outside_parents.get(item.parent_id)) for item in roots]
+    while stack:
+        item, parent_values = stack.pop()
+        if parent_values is None:
+            values = (f'/{item.id}/', item.name, 0)
+        else:
+            parent_path, parent_full_path, parent_depth = parent_values
+            values = (
+                f'{parent_path}{item.id}/',
+                f'{parent_full_path}{Department.PATH_SEPARATOR}{item.name}',
+                parent_depth + 1,
+            )
+
+        if (item.path, item.full_path, item.depth) != values:
+            item.path, item.full_path, item.depth = values
+            changed.append(item)
+        for child in children.get(item.id, ()):
+            stack.append((child, values))
+
+    Department.objects.bulk_update(changed, ['path', 'full_path', 'depth'], batch_size=PATH_BATCH_SIZE)
+    return {item.id: (item.path, item.full_path, item.depth) for item in nodes.values()}
+
+
+def rebuild_department_closure():
+    parent_map = dict(Department.objects.values_list('id', 'parent_id'))
+    rows = []
+    for department_id in parent_map:
+        depth = 0
+        current = department_id
+        seen = set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(DepartmentClosure(ancestor_id=current, descendant_id=department_id, depth=depth))
+            current = parent_map.get(current)
+            depth += 1
+
+    with transaction.atomic():
+        DepartmentClosure.objects.all().delete()
+        DepartmentClosure.objects.bulk_create(rows, batch_size=CLOSURE_BATCH_SIZE)
+    return len(rows)
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from .audience import get_department_targets, refresh_audiences, refresh_employee_audiences
+from .models import Department, Employee
+from .services import (
+    detach_department_children,
+    get_department_ancestor_ids,
+    insert_department_node,
+    move_department_subtree,
+    refresh_department_paths,
+)
+from .tree import bump_department_tree_version
+
+# Sent after an employee's audience memberships were refreshed because they
+# were created or moved to another department/position.
+employee_assignment_changed = Signal()
+
+
+@receiver(pre_save, sender=Department)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    previous = (
+        Department.objects.filter(pk=instance.pk).values_list('parent_id', 'name', 'path', 'full_path', 'depth').first()
+    )
+    if previous is None:
+        return
+    # Path columns are owned by the hierarchy sync; never write stale in-memory copies.
+    instance._previous_state = previous[:2]
+    instance.path, instance.full_path, instance.depth = previous[2:]
+
+
+@receiver(post_save, sender=Department)
+def sync_department_hierarchy(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous_parent_id, previous_name = getattr(instance, '_previous_state', None) or (instance.parent_id, instance.name)
+    parent_changed = previous_parent_id != instance.parent_id
+    if created:
+        insert_department_node(instance)
+    elif parent_changed:
+        move_department_subtree(instance)
+        affected_ids = set()
+        for parent_id in (previous_parent_id, instance.parent_id):
+            if parent_id is not None:
+                affected_ids |= get_department_ancestor_ids(parent_id)
+        refresh_audiences(get_department_targets(affected_ids))
+
+    if created or parent_changed or previous_name != instance.name or not instance.path:
+        paths = refresh_department_paths([instance.pk])
+        instance.path, instance.full_path, instance.depth = paths[instance.pk]
+
+
+@receiver(pre_delete, sender=Department)
+def detach_deleted_department(sender, instance, **kwargs):
+    instance._affected_targets = get_department_targets(get_department_ancestor_ids(instance.pk))
+    instance._detached_child_ids = detach_department_children(instance)
+
+
+@receiver(post_delete, sender=Department)
+def refresh_detached_children(sender, instance, **kwargs):
+    child_ids = getattr(instance, '_detached_child_ids', None)
+    if child_ids:
+        refresh_department_paths(child_ids)
+    refresh_audiences(getattr(instance, '_affected_targets', ()))
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_department_tree(sender, **kwargs):
+    bump_department_tree_version()
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_assignment(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_assignment = (
+        Employee.objects.filter(pk=instance.pk).values_list('department_id', 'position_id').first()
+    )
+
+
+@receiver(post_save, sender=Employee)
+def refresh_employee_audience_membership(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_assignment', None)
+    if created or previous != (instance.department_id, instance.position_id):
+        refresh_employee_audiences(instance)
+        employee_assignment_changed.send(sender=Employee, employee=instance, created=created)
@@ -0,0 +1,69 @@
+(function () {
+    'use strict';
+
+    const selectionFields = ['departments', 'positions', 'employees'];
+
+    function initAudiencePreview(output) {
+        const form = output.closest('form');
+        const typeField = form && form.elements.namedItem(output.dataset.typeField);
+        if (!typeField) {
+            return;
+        }
+
+        let timer = null;
+        let controller = null;
+
+        function buildQuery() {
+            const params = new URLSearchParams();
+            params.append('type', typeField.value);
+            selectionFields.forEach(function (name) {
+                const field = form.elements.namedItem(name);
+                if (!field || !field.options) {
+                    return;
+                }
+                Array.from(field.selectedOptions).forEach(function (option) {
+                    params.append(name, option.value);
+                });
+            });
+            return params.toString();
+        }
+
+        function refresh() {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(output.dataset.url + '?' + buildQuery(), {
+                credentials: 'same-origin',
+                signal: controller.signal,
+            })
+                .then(function (response) {
+                    return response.ok ? response.json() : null;
+                })
+                .then(function (data) {
+                    output.textContent = data ? 'Хамрагдах ажилтан: ' + data.count : '';
+                })
+                .catch(function () {});
+        }
+
+        function schedule() {
+            clearTimeout(timer);
+            timer = setTimeout(refresh, 250);
+        }
+
+        form.addEventListener('change', function (event) {
+            if (event.target === typeField || selectionFields.indexOf(event.target.name) !== -1) {
+                schedule();
+            }
+        });
+        // Select2 fires jQuery-only change events.
+        if (window.jQuery) {
+            jQuery(form).on('change', 'select', schedule);
+        }
+        refresh();
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-audience-preview]').forEach(initAudiencePreview);
+    });
+})();
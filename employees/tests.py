@@ -1,3 +1,181 @@
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .audience import AudienceType
+from .models import CacheVersion, Department, DepartmentClosure, Employee
+from .services import (
+    get_department_ancestor_ids,
+    get_department_subtree_ids,
+    move_departments,
+    rebuild_department_closure,
+)
+from .tree import TREE_VERSION_CACHE_KEY, get_department_tree
+
+
+class DepartmentClosureTests(TestCase):
+    def setUp(self):
+        self.root = Department.objects.create(name='Төв')
+        self.branch = Department.objects.create(name='Салбар', parent=self.root)
+        self.unit = Department.objects.create(name='Нэгж', parent=self.branch)
+        self.other = Department.objects.create(name='Бусад')
+
+    def _closure_rows(self):
+        return set(DepartmentClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def test_create_builds_ancestor_links(self):
+        self.assertEqual(get_department_subtree_ids([self.root.id]), {self.root.id, self.branch.id, self.unit.id})
+        self.assertEqual(get_department_ancestor_ids(self.unit.id), {self.root.id, self.branch.id, self.unit.id})
+        self.assertTrue(
+            DepartmentClosure.objects.filter(ancestor=self.root, descendant=self.unit, depth=2).exists()
+        )
+
+    def test_reparent_moves_whole_subtree(self):
+        self.branch.parent = self.other
+        self.branch.save()
+
+        self.assertEqual(get_department_subtree_ids([self.root.id]), {self.root.id})
+        self.assertEqual(get_department_ancestor_ids(self.unit.id), {self.other.id, self.branch.id, self.unit.id})
+
+    def test_bulk_reparent(self):
+        move_departments([self.unit.id], self.other)
+
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.parent_id, self.other.id)
+        self.assertEqual(get_department_subtree_ids([self.other.id]), {self.other.id, self.unit.id})
+        self.assertEqual(get_department_subtree_ids([self.branch.id]), {self.branch.id})
+
+    def test_delete_detaches_children(self):
+        self.branch.delete()
+
+        self.assertEqual(get_department_subtree_ids([self.root.id]), {self.root.id})
+        self.assertEqual(get_department_ancestor_ids(self.unit.id), {self.unit.id})
+
+    def test_rebuild_matches_incremental_state(self):
+        self.branch.parent = self.other
+        self.branch.save()
+        expected = self._closure_rows()
+
+        rebuild_department_closure()
+        self.assertEqual(self._closure_rows(), expected)
+
+
+class DepartmentTreeTests(TestCase):
+    def setUp(self):
+        self.root = Department.objects.create(name='Төв')
+        self.branch = Department.objects.create(name='Салбар', parent=self.root)
+        self.unit = Department.objects.create(name='Нэгж', parent=self.branch)
+
+    def test_tree_answers_hierarchy_questions(self):
+        tree = get_department_tree()
+        self.assertEqual(tree.ancestors(self.unit.id), (self.root.id, self.branch.id, self.unit.id))
+        self.assertEqual(tree.descendants(self.root.id), {self.root.id, self.branch.id, self.unit.id})
+        self.assertEqual(tree.depth(self.unit.id), 2)
+        self.assertEqual(tree.full_path(self.unit.id), 'Төв / Салбар / Нэгж')
+
+    def test_tree_reloads_after_department_change(self):
+        tree = get_department_tree()
+        # Only the version stamp is read; the local-memory test cache is not shared.
+        with self.assertNumQueries(1):
+            self.assertIs(get_department_tree(), tree)
+
+        self.unit.parent = None
+        self.unit.save()
+
+        reloaded = get_department_tree()
+        self.assertIsNot(reloaded, tree)
+        self.assertEqual(reloaded.ancestors(self.unit.id), (self.unit.id,))
+
+
+    def test_tree_reloads_after_bump_by_another_worker(self):
+        tree = get_department_tree()
+        Department.objects.filter(pk=self.unit.pk).update(name='Шинэ нэгж')
+        CacheVersion.objects.filter(key=TREE_VERSION_CACHE_KEY).update(version='other-worker')
+
+        self.assertEqual(get_department_tree().name(self.unit.id), 'Шинэ нэгж')
+        self.assertEqual(tree.name(self.unit.id), 'Нэгж')
+
+
+class DepartmentPathTests(TestCase):
+    def setUp(self):
+        self.root = Department.objects.create(name='Төв')
+        self.branch = Department.objects.create(name='Салбар', parent=self.root)
+        self.unit = Department.objects.create(name='Нэгж', parent=self.branch)
+
+    def test_path_columns_are_filled_on_create(self):
+        self.unit.refresh_from_db()
+        self.assertEqual(self.unit.path, f'/{self.root.id}/{self.branch.id}/{self.unit.id}/')
+        self.assertEqual(self.unit.full_path, 'Төв / Салбар / Нэгж')
+        self.assertEqual(self.unit.depth, 2)
+
+    def test_rename_updates_descendant_paths(self):
+        self.root.name = 'Удирдлага'
+        self.root.save()
+
+        self.unit.refresh_from_db()
+        self.assertEqual(str(self.unit), 'Удирдлага / Салбар / Нэгж')
+
+    def test_str_does_not_query_parents(self):
+        unit = Department.objects.get(pk=self.unit.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(unit), 'Төв / Салбар / Нэгж')
+
+    def test_clean_rejects_cycle(self):
+        root = Department.objects.get(pk=self.root.pk)
+        root.parent = self.unit
+        with self.assertRaises(ValidationError):
+            root.clean()
+
+    def test_stale_instance_save_keeps_current_path(self):
+        stale_unit = Department.objects.get(pk=self.unit.pk)
+        self.branch.parent = None
+        self.branch.save()
+
+        stale_unit.save()
+        stale_unit.refresh_from_db()
+        self.assertEqual(stale_unit.full_path, 'Салбар / Нэгж')
+        self.assertEqual(stale_unit.depth, 1)
+
+    def test_deep_tree_with_long_names_keeps_whole_path(self):
+        parent = self.unit
+        names = [f'{index:02d}' + 'Х' * 148 for index in range(20)]
+        for name in names:
+            parent = Department.objects.create(name=name, parent=parent)
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.full_path, ' / '.join(['Төв', 'Салбар', 'Нэгж'] + names))
+        self.assertGreater(len(parent.full_path), 2000)
+        self.assertEqual(parent.depth, 22)
+
+
+class AudiencePreviewTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='preview_mgr', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='hse_manager')
+        user.groups.add(group)
+
+        self.root = Department.objects.create(name='Төв')
+        self.unit = Department.objects.create(name='Нэгж', parent=self.root)
+        self.other = Department.objects.create(name='Бусад')
+        for index, department in enumerate([self.root, self.unit, self.unit, self.other]):
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'preview{index}', password='pass1234'),
+                first_name='P',
+                last_name=str(index),
+                register=f'PV{index:08d}',
+                department=department,
+            )
+
+    def _preview(self, **params):
+        self.client.login(username='preview_mgr', password='pass1234')
+        response = self.client.get(reverse('audience_preview'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['count']
+
+    def test_department_selection_counts_subtree(self):
+        self.assertEqual(self._preview(type=AudienceType.DEPARTMENT, departments=[self.root.id]), 3)
+        self.assertEqual(self._preview(type=AudienceType.DEPARTMENT, departments=[self.unit.id, self.other.id]), 3)
+
+    def test_organization_wide_counts_everyone(self):
+        self.assertEqual(self._preview(type=AudienceType.ORGANIZATION_WIDE), 4)
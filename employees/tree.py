@@ -0,0 +1,129 @@
+import threading
+
+from django.db import transaction
+
+from .models import Department
+from .versions import get_version, set_new_version
+
+TREE_VERSION_CACHE_KEY = 'employees:department_tree_version'
+
+_tree = None
+_tree_lock = threading.Lock()
+
+
+class DepartmentTree:
+    def __init__(self, rows, version=None):
+        self.version = version
+        self._parent = {}
+        self._name = {}
+        self._children = {}
+        for department_id, parent_id, name in rows:
+            self._parent[department_id] = parent_id
+            self._name[department_id] = name
+            self._children.setdefault(parent_id, []).append(department_id)
+
+        self._ancestors = {}
+        for department_id in self._parent:
+            self._build_ancestors(department_id)
+        self._descendants = {}
+
+    @classmethod
+    def load(cls, version=None):
+        return cls(Department.objects.values_list('id', 'parent_id', 'name'), version=version)
+
+    def _build_ancestors(self, department_id):
+        chain = []
+        current = department_id
+        seen = set()
+        while current is not None and current not in self._ancestors and current not in seen:
+            seen.add(current)
+            chain.append(current)
+            current = self._parent.get(current)
+
+        prefix = self._ancestors.get(current, ())
+        for node in reversed(chain):
+            prefix = prefix + (node,)
+            self._ancestors[node] = prefix
+        return self._ancestors[department_id]
+
+    def __contains__(self, department_id):
+        return department_id in self._parent
+
+    def __len__(self):
+        return len(self._parent)
+
+    def parent_id(self, department_id):
+        return self._parent.get(department_id)
+
+    def name(self, department_id):
+        return self._name.get(department_id, '')
+
+    def children(self, department_id):
+        return tuple(self._children.get(department_id, ()))
+
+    def ancestors(self, department_id, include_self=True):
+        chain = self._ancestors.get(department_id, ())
+        return chain if include_self else chain[:-1]
+
+    def depth(self, department_id):
+        return max(len(self._ancestors.get(department_id, ())) - 1, 0)
+
+    def path(self, department_id):
+        return [self._name[node] for node in self.ancestors(department_id)]
+
+    def full_path(self, department_id, separator=' / '):
+        return separator.join(self.path(department_id))
+
+    def descendants(self, department_id, include_self=True):
+        if department_id not in self._parent:
+            return frozenset()
+
+        result = self._descendants.get(department_id)
+        if result is None:
+            collected = set()
+            stack = [department_id]
+            while stack:
+                current = stack.pop()
+                if current in collected:
+                    continue
+                collected.add(current)
+                stack.extend(self._children.get(current, ()))
+            result = frozenset(collected)
+            self._descendants[department_id] = result
+        return result if include_self else result - {department_id}
+
+    def subtree_ids(self, department_ids):
+        result = set()
+        for department_id in department_ids:
+            result |= self.descendants(department_id)
+        return result
+
+    def is_descendant(self, department_id, ancestor_id):
+        return ancestor_id in self._ancestors.get(department_id, ())
+
+
+def get_tree_version():
+    return get_version(TREE_VERSION_CACHE_KEY)
+
+
+def _set_new_tree_version():
+    set_new_version(TREE_VERSION_CACHE_KEY)
+
+
+def bump_department_tree_version():
+    # Bump now for this process and again on commit so other workers never
+    # cache a tree loaded before the change became visible.
+    _set_new_tree_version()
+    transaction.on_commit(_set_new_tree_version)
+
+
+def get_department_tree():
+    global _tree
+    version = get_tree_version()
+    tree = _tree
+    if tree is None or tree.version != version:
+        with _tree_lock:
+            if _tree is None or _tree.version != version:
+                _tree = DepartmentTree.load(version=version)
+            tree = _tree
+    return tree
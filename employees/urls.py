@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     path('', views.employee_list, name='employee_list'),
+    path('audience-preview/', views.audience_preview, name='audience_preview'),
 ]
@@ -0,0 +1,39 @@
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import CacheVersion
+
+
+def cache_is_shared():
+    """Whether every process sees the same default cache (not a per-process memory cache)."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_version(key):
+    """Current version stamp for ``key``.
+
+    Kept in the cache when it is shared and in ``CacheVersion`` otherwise, so a
+    bump made by one worker is seen by all of them either way.
+    """
+    cache = caches['default']
+    if cache_is_shared():
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    version = CacheVersion.objects.filter(key=key).values_list('version', flat=True).first()
+    if version is None:
+        version = CacheVersion.objects.get_or_create(key=key, defaults={'version': uuid.uuid4().hex})[0].version
+    return version
+
+
+def set_new_version(key):
+    if cache_is_shared():
+        caches['default'].set(key, uuid.uuid4().hex, None)
+    else:
+        CacheVersion.objects.update_or_create(key=key, defaults={'version': uuid.uuid4().hex})
@@ -1,9 +1,15 @@
-from config.permissions import role_required
+from config.permissions import MANAGER_ROLES, role_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .audience import audience_count
 from .models import Employee
 
 
+def _id_list(values):
+    return [int(value) for value in values if value.isdigit()]
+
+
 @role_required(['system_admin', 'hse_manager', 'department_head'])
 def employee_list(request):
     employees = (
@@ -12,3 +18,14 @@ def employee_list(request):
         .order_by('last_name', 'first_name')
     )
     return render(request, 'employees/employee_list.html', {'employees': employees})
+
+
+@role_required(MANAGER_ROLES)
+def audience_preview(request):
+    count = audience_count(
+        request.GET.get('type', ''),
+        department_ids=_id_list(request.GET.getlist('departments')),
+        position_ids=_id_list(request.GET.getlist('positions')),
+        employee_ids=_id_list(request.GET.getlist('employees')),
+    )
+    return JsonResponse({'count': count})
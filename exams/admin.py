@@ -1,6 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
 from .models import AttemptResponse, Choice, Exam, ExamAttempt, Question
+from .services import regrade_exam
+
+REGRADE_REPORT_LIMIT = 20
 
 
 class ChoiceInline(admin.TabularInline):
@@ -31,6 +34,26 @@ class ExamAdmin(admin.ModelAdmin):
     list_filter = ('exam_type', 'target_type', 'is_active')
     search_fields = ('title',)
     filter_horizontal = ('departments', 'positions')
+    actions = ['regrade_attempts']
+
+    @admin.action(description='Дууссан оролдлогуудыг дахин дүгнэх')
+    def regrade_attempts(self, request, queryset):
+        for exam in queryset:
+            result = regrade_exam(exam)
+            self.message_user(
+                request,
+                f'{exam.title}: {result.attempts} оролдлого дахин дүгнэгдэж, {result.scores_changed} оноо өөрчлөгдлөө; '
+                f'тэнцсэн болсон {result.newly_passed}, унасан болсон {result.newly_failed}.',
+                messages.SUCCESS,
+            )
+            changes = [
+                f"{change.employee} ({change.old_score} → {change.new_score}, {'тэнцсэн' if change.is_passed else 'унасан'})"
+                for change in result.pass_changes[:REGRADE_REPORT_LIMIT]
+            ]
+            if changes:
+                more = len(result.pass_changes) - len(changes)
+                suffix = f' ба бусад {more}' if more else ''
+                self.message_user(request, f'{exam.title}: ' + '; '.join(changes) + suffix, messages.WARNING)
 
 
 @admin.register(Choice)
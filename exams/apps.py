@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ExamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exams'
+
+    def ready(self):
+        from employees.audience import register_audience_model
+
+        from . import signals  # noqa: F401
+        from .models import Exam
+
+        register_audience_model(Exam, type_field='target_type', employees=None)
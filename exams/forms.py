@@ -17,6 +17,7 @@ class ExamForm(forms.ModelForm):
             'duration_minutes',
             'pass_score',
             'is_active',
+            'single_page',
         ]
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4}),
@@ -135,10 +136,9 @@ QuestionFormSet = inlineformset_factory(
 
 
 class QuestionChoiceForm(forms.Form):
-    choice = forms.ModelChoiceField(
-        queryset=Choice.objects.none(),
+    choice = forms.TypedChoiceField(
+        coerce=int,
         widget=forms.RadioSelect,
-        empty_label=None,
         label='Сонголт',
     )
 
@@ -146,11 +146,55 @@ class QuestionChoiceForm(forms.Form):
         question = kwargs.pop('question')
         super().__init__(*args, **kwargs)
         self.question = question
-        self.fields['choice'].queryset = question.choices.all()
+        self.fields['choice'].choices = [(choice.id, choice.text) for choice in question.choices]
 
     def save_official(self, attempt):
         return AttemptResponse.objects.update_or_create(
             attempt=attempt,
-            question=self.question,
-            defaults={'selected_choice': self.cleaned_data['choice']},
+            question_id=self.question.id,
+            defaults={'selected_choice_id': self.cleaned_data['choice']},
+        )
+
+
+class ExamAnswersForm(forms.Form):
+    """All questions of an exam snapshot as one form; unanswered questions score zero."""
+
+    def __init__(self, *args, **kwargs):
+        snapshot = kwargs.pop('snapshot')
+        super().__init__(*args, **kwargs)
+        self.snapshot = snapshot
+        for question in snapshot.questions:
+            self.fields[self.field_name(question)] = forms.TypedChoiceField(
+                coerce=int,
+                choices=[(choice.id, choice.text) for choice in question.choices],
+                widget=forms.RadioSelect,
+                required=False,
+                empty_value=None,
+                label=question.text,
+            )
+
+    @staticmethod
+    def field_name(question):
+        return f'question_{question.id}'
+
+    def question_fields(self):
+        return [(question, self[self.field_name(question)]) for question in self.snapshot.questions]
+
+    def answers(self):
+        return {
+            question.id: self.cleaned_data[self.field_name(question)]
+            for question in self.snapshot.questions
+            if self.cleaned_data.get(self.field_name(question)) is not None
+        }
+
+    def save_official(self, attempt):
+        responses = [
+            AttemptResponse(attempt=attempt, question_id=question_id, selected_choice_id=choice_id)
+            for question_id, choice_id in self.answers().items()
+        ]
+        return AttemptResponse.objects.bulk_create(
+            responses,
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['selected_choice', 'answered_at'],
         )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from exams.models import Exam
+from exams.services import REGRADE_BATCH_SIZE, regrade_exam
+
+
+class Command(BaseCommand):
+    help = 'Зөв хариултын түлхүүр засагдсаны дараа шалгалтын бүх дууссан оролдлогыг дахин дүгнэнэ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('--batch-size', type=int, default=REGRADE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Өөрчлөлтийг хадгалахгүйгээр тайлан гаргах.')
+
+    def handle(self, *args, **options):
+        exam = Exam.objects.filter(pk=options['exam_id']).first()
+        if exam is None:
+            raise CommandError(f"{options['exam_id']} дугаартай шалгалт олдсонгүй.")
+
+        with transaction.atomic():
+            result = regrade_exam(exam, batch_size=options['batch_size'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        for change in result.pass_changes:
+            outcome = 'тэнцсэн' if change.is_passed else 'унасан'
+            self.stdout.write(
+                f'#{change.attempt_id} {change.employee}: {change.old_score} → {change.new_score} ({outcome})'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{exam.title}: {result.attempts} оролдлого, {result.scores_changed} оноо өөрчлөгдсөн, '
+                f'тэнцсэн болсон {result.newly_passed}, унасан болсон {result.newly_failed}'
+                + (' (хадгалаагүй)' if options['dry_run'] else '')
+            )
+        )
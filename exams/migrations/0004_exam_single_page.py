@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_alter_exam_exam_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='single_page',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, FilteredRelation, Q, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from employees.models import Department, Employee, Position
@@ -27,6 +29,8 @@ class Exam(models.Model):
     duration_minutes = models.PositiveIntegerField(default=30)
     pass_score = models.PositiveIntegerField(default=60)
     is_active = models.BooleanField(default=True)
+    # All questions on one page, submitted and graded in a single POST.
+    single_page = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_exams')
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -83,22 +87,41 @@ class ExamAttempt(models.Model):
     class Meta:
         ordering = ('-started_at',)
 
+    def grade(self):
+        """``(total, max_total)`` for the stored responses, computed in one aggregate query."""
+        totals = Question.objects.filter(exam_id=self.exam_id).annotate(
+            response=FilteredRelation('responses', condition=Q(responses__attempt_id=self.pk)),
+        ).aggregate(
+            total=Coalesce(
+                Sum(
+                    'score',
+                    filter=Q(response__selected_choice__is_correct=True)
+                    & Q(response__selected_choice__question_id=F('id')),
+                ),
+                0,
+            ),
+            max_total=Coalesce(Sum('score'), 0),
+        )
+        return totals['total'], totals['max_total']
+
     def finish(self):
         if self.completed_at is not None:
             return
 
-        total = 0
-        max_total = 0
-        for question in self.exam.questions.all():
-            max_total += question.score
-            response = self.responses.filter(question=question).select_related('selected_choice').first()
-            if response and response.selected_choice.is_correct:
-                total += question.score
-
-        self.total_score = total
-        self.is_passed = total >= self.exam.pass_score
-        self.completed_at = timezone.now()
-        self.save(update_fields=['total_score', 'is_passed', 'completed_at'])
+        with transaction.atomic():
+            total, _ = self.grade()
+            is_passed = total >= self.exam.pass_score
+            completed_at = timezone.now()
+            # Only the first of concurrent/double submits records the result.
+            updated = ExamAttempt.objects.filter(pk=self.pk, completed_at__isnull=True).update(
+                total_score=total,
+                is_passed=is_passed,
+                completed_at=completed_at,
+            )
+        if updated:
+            self.total_score, self.is_passed, self.completed_at = total, is_passed, completed_at
+        else:
+            self.refresh_from_db(fields=['total_score', 'is_passed', 'completed_at'])
 
     def __str__(self):
         return f'{self.employee} - {self.exam}'
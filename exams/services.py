@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AttemptResponse, Exam, ExamAttempt
+from .snapshot import ExamSnapshot, bump_exam_snapshot_version, get_exam_snapshot
+
+
+REGRADE_BATCH_SIZE = 2000
+
+
+def practice_session_key(attempt_id):
+    return f'practice_exam_{attempt_id}'
+
+
+@dataclass
+class AttemptState:
+    """Everything a question page needs about an attempt, loaded once per request."""
+
+    exam: Exam
+    snapshot: ExamSnapshot
+    attempt: ExamAttempt | None
+    practice: dict | None
+    answers: dict[int, int]
+    deadline: datetime
+
+    @property
+    def is_official(self):
+        return self.attempt is not None
+
+    @property
+    def total_questions(self):
+        return len(self.snapshot)
+
+    def question(self, number):
+        if 1 <= number <= len(self.snapshot):
+            return self.snapshot.questions[number - 1]
+        return None
+
+    def is_expired(self, now=None):
+        return (now or timezone.now()) >= self.deadline
+
+    def remaining_seconds(self, now=None):
+        return max(0, int((self.deadline - (now or timezone.now())).total_seconds()))
+
+
+def _official_state(user, attempt_id):
+    attempt = (
+        ExamAttempt.objects.select_related('exam')
+        .filter(pk=attempt_id, employee__user=user)
+        .first()
+    )
+    if attempt is None:
+        return None
+
+    answers = dict(
+        attempt.responses.filter(selected_choice__isnull=False).values_list('question_id', 'selected_choice_id')
+    )
+    return AttemptState(
+        exam=attempt.exam,
+        snapshot=get_exam_snapshot(attempt.exam_id),
+        attempt=attempt,
+        practice=None,
+        answers=answers,
+        deadline=attempt.started_at + timedelta(minutes=attempt.exam.duration_minutes),
+    )
+
+
+def _practice_state(user, attempt_id, session):
+    practice = session.get(practice_session_key(attempt_id))
+    if not practice or practice.get('user_id') != user.id:
+        return None
+    exam = Exam.objects.filter(pk=practice['exam_id'], is_active=True).first()
+    if exam is None:
+        return None
+
+    started_at = datetime.fromisoformat(practice['started_at'])
+    return AttemptState(
+        exam=exam,
+        snapshot=get_exam_snapshot(exam.id),
+        attempt=None,
+        practice=practice,
+        answers={int(question_id): choice_id for question_id, choice_id in practice['answers'].items()},
+        deadline=started_at + timedelta(minutes=exam.duration_minutes),
+    )
+
+
+def load_attempt_state(user, attempt_id, session):
+    """Official attempt owned by ``user`` or the practice run stored in ``session``; ``None`` if neither."""
+    return _official_state(user, attempt_id) or _practice_state(user, attempt_id, session)
+
+
+def save_practice_answer(state, session, attempt_id, question, choice_id):
+    save_practice_answers(state, session, attempt_id, {question.id: choice_id})
+
+
+def save_practice_answers(state, session, attempt_id, answers):
+    for question_id, choice_id in answers.items():
+        state.practice['answers'][str(question_id)] = choice_id
+        state.answers[question_id] = choice_id
+    session[practice_session_key(attempt_id)] = state.practice
+    session.modified = True
+
+
+def save_official_answers(attempt, form, finish=False):
+    """Store ``form``'s answers while the attempt is still open, optionally grading it too.
+
+    The attempt row is locked for the whole step, so a double submit cannot
+    overwrite answers after they were graded. Returns ``False`` when the attempt
+    was already finished and nothing was saved.
+    """
+    with transaction.atomic():
+        locked = ExamAttempt.objects.select_for_update().get(pk=attempt.pk)
+        if locked.completed_at is not None:
+            return False
+        form.save_official(locked)
+        if finish:
+            locked.exam = attempt.exam
+            locked.finish()
+    return True
+
+
+@dataclass(frozen=True)
+class PassChange:
+    attempt_id: int
+    employee: str
+    old_score: int
+    new_score: int
+    is_passed: bool
+
+
+@dataclass
+class RegradeResult:
+    attempts: int = 0
+    scores_changed: int = 0
+    pass_changes: list[PassChange] = field(default_factory=list)
+
+    @property
+    def newly_passed(self):
+        return sum(1 for change in self.pass_changes if change.is_passed)
+
+    @property
+    def newly_failed(self):
+        return sum(1 for change in self.pass_changes if not change.is_passed)
+
+
+def _attempt_score():
+    correct = (
+        AttemptResponse.objects.filter(
+            attempt_id=OuterRef('pk'),
+            # Answers stored after the attempt was finished were never part of its result.
+            answered_at__lte=OuterRef('completed_at'),
+            selected_choice__is_correct=True,
+            selected_choice__question_id=F('question_id'),
+        )
+        .order_by()
+        .values('attempt_id')
+        .annotate(total=Sum('question__score'))
+        .values('total')
+    )
+    return Coalesce(Subquery(correct), 0)
+
+
+def regrade_exam(exam, batch_size=REGRADE_BATCH_SIZE):
+    """Recompute score and pass/fail of every completed attempt against the current answer key.
+
+    Attempts are processed in primary-key chunks, each with two UPDATEs, and the
+    result lists every attempt whose pass/fail outcome flipped.
+    """
+    # The key may have been corrected with a queryset update that sent no signals.
+    bump_exam_snapshot_version(exam.pk)
+    attempts = ExamAttempt.objects.filter(exam=exam, completed_at__isnull=False)
+    result = RegradeResult()
+    last_id = 0
+    while True:
+        before = {
+            attempt_id: (score, passed)
+            for attempt_id, score, passed in attempts.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'total_score', 'is_passed')[:batch_size]
+        }
+        if not before:
+            break
+        first_id, last_id = min(before), max(before)
+        chunk = attempts.filter(pk__gte=first_id, pk__lte=last_id)
+
+        with transaction.atomic():
+            chunk.update(total_score=_attempt_score())
+            chunk.update(
+                is_passed=Case(
+                    When(total_score__gte=exam.pass_score, then=Value(True)),
+                    default=Value(False),
+                )
+            )
+
+        after = chunk.values_list('pk', 'total_score', 'is_passed', 'employee__last_name', 'employee__first_name')
+        for attempt_id, score, passed, last_name, first_name in after:
+            old_score, was_passed = before.get(attempt_id, (score, passed))
+            if score != old_score:
+                result.scores_changed += 1
+            if passed != was_passed:
+                result.pass_changes.append(
+                    PassChange(attempt_id, f'{last_name} {first_name}', old_score, score, passed)
+                )
+        result.attempts += len(before)
+    return result
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Choice, Exam, Question
+from .snapshot import bump_exam_snapshot_version
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_exam_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_exam_snapshot_version(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_exam_snapshot_version(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_choice_snapshot(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    exam_id = Question.objects.filter(pk=instance.question_id).values_list('exam_id', flat=True).first()
+    if exam_id is not None:
+        bump_exam_snapshot_version(exam_id)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+
+from employees.versions import get_version, set_new_version
+
+from .models import Choice, Question
+
+SNAPSHOT_VERSION_KEY = 'exams:snapshot:version:{}'
+SNAPSHOT_KEY = 'exams:snapshot:{}:{}'
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ChoiceSnapshot:
+    id: int
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True)
+class QuestionSnapshot:
+    id: int
+    order: int
+    text: str
+    image_url: str
+    score: int
+    choices: tuple[ChoiceSnapshot, ...]
+
+    @property
+    def correct_choice_id(self):
+        correct = [choice.id for choice in self.choices if choice.is_correct]
+        return correct[0] if len(correct) == 1 else None
+
+
+class ExamSnapshot:
+    """Compiled, read-only exam content: ordered questions, choices and the answer key."""
+
+    def __init__(self, exam_id, questions, version=None):
+        self.exam_id = exam_id
+        self.version = version
+        self.questions = tuple(questions)
+        self.question_ids = [question.id for question in self.questions]
+        self._by_id = {question.id: question for question in self.questions}
+        # question id -> (correct choice id, score)
+        self.answer_key = {question.id: (question.correct_choice_id, question.score) for question in self.questions}
+        self.max_score = sum(question.score for question in self.questions)
+
+    @classmethod
+    def load(cls, exam_id, version=None):
+        choices = {}
+        for choice in Choice.objects.filter(question__exam_id=exam_id).order_by('id'):
+            choices.setdefault(choice.question_id, []).append(
+                ChoiceSnapshot(id=choice.id, text=choice.text, is_correct=choice.is_correct)
+            )
+        questions = [
+            QuestionSnapshot(
+                id=question.id,
+                order=question.order,
+                text=question.text,
+                image_url=question.image.url if question.image else '',
+                score=question.score,
+                choices=tuple(choices.get(question.id, ())),
+            )
+            for question in Question.objects.filter(exam_id=exam_id)
+        ]
+        return cls(exam_id, questions, version=version)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def question(self, question_id):
+        return self._by_id.get(question_id)
+
+    def is_valid(self):
+        """Every question has at least two choices and exactly one correct one."""
+        return all(len(question.choices) >= 2 and question.correct_choice_id for question in self.questions)
+
+    def score(self, answers):
+        """Total score for ``answers`` mapping question id to the selected choice id."""
+        total = 0
+        for question_id, (correct_choice_id, score) in self.answer_key.items():
+            if correct_choice_id is not None and answers.get(question_id) == correct_choice_id:
+                total += score
+        return total
+
+
+def get_snapshot_version(exam_id):
+    # Shared by every worker, so none keeps grading against an outdated answer key.
+    return get_version(SNAPSHOT_VERSION_KEY.format(exam_id))
+
+
+def _set_new_snapshot_version(exam_id):
+    set_new_version(SNAPSHOT_VERSION_KEY.format(exam_id))
+
+
+def bump_exam_snapshot_version(exam_id):
+    # Same double bump as the department tree: other workers must not cache
+    # content read before the change was committed.
+    _set_new_snapshot_version(exam_id)
+    transaction.on_commit(lambda: _set_new_snapshot_version(exam_id))
+
+
+def get_exam_snapshot(exam_id):
+    version = get_snapshot_version(exam_id)
+    snapshot = _snapshots.get(exam_id)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    key = SNAPSHOT_KEY.format(exam_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = ExamSnapshot.load(exam_id, version=version)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    with _snapshots_lock:
+        _snapshots[exam_id] = snapshot
+    return snapshot
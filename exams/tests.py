@@ -1,10 +1,16 @@
 from django.contrib.auth.models import Group, User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from employees.models import Department, Employee, Position
+from employees.models import CacheVersion, Department, Employee, Position
 
-from .models import Choice, Exam, ExamAttempt, Question
+from .models import AttemptResponse, Choice, Exam, ExamAttempt, Question
+from .forms import ExamAnswersForm
+from .services import load_attempt_state, regrade_exam, save_official_answers
+from .snapshot import SNAPSHOT_VERSION_KEY, get_exam_snapshot
 
 
 class ExamFlowTests(TestCase):
@@ -117,6 +123,143 @@ class ExamFlowTests(TestCase):
         self.assertContains(result_response, 'Жишиг тест')
         self.assertEqual(ExamAttempt.objects.filter(exam=practice).count(), 0)
 
+    def test_question_page_query_count_does_not_grow_with_exam(self):
+        self.client.login(username='emp', password='pass1234')
+        attempt = ExamAttempt.objects.create(exam=self.exam, employee=self.employee)
+        url = reverse('attempt_question', kwargs={'attempt_id': attempt.id, 'number': 2})
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for order in range(3, 23):
+            question = Question.objects.create(exam=self.exam, text=f'Q{order}', order=order, score=1)
+            Choice.objects.create(question=question, text='A', is_correct=True)
+            Choice.objects.create(question=question, text='B', is_correct=False)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+
+        self.assertEqual(response.context['total_questions'], 22)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_snapshot_is_cached_and_follows_answer_key_changes(self):
+        question_id = self.c1.question_id
+        snapshot = get_exam_snapshot(self.exam.id)
+        self.assertEqual(snapshot.question_ids, [question_id, self.c2.question_id])
+        self.assertEqual(snapshot.answer_key[question_id], (self.c1.id, 1))
+        # Only the version stamp is read; the local-memory test cache is not shared.
+        with self.assertNumQueries(1):
+            self.assertIs(get_exam_snapshot(self.exam.id), snapshot)
+
+        self.c1.is_correct = False
+        self.c1.save()
+        wrong = Choice.objects.get(question_id=question_id, text='B')
+        wrong.is_correct = True
+        wrong.save()
+
+        self.assertEqual(get_exam_snapshot(self.exam.id).answer_key[question_id], (wrong.id, 1))
+
+    def test_snapshot_follows_answer_key_changed_by_another_worker(self):
+        question_id = self.c1.question_id
+        get_exam_snapshot(self.exam.id)
+        wrong = Choice.objects.get(question_id=question_id, text='B')
+        Choice.objects.filter(pk=self.c1.pk).update(is_correct=False)
+        Choice.objects.filter(pk=wrong.pk).update(is_correct=True)
+        CacheVersion.objects.filter(key=SNAPSHOT_VERSION_KEY.format(self.exam.id)).update(version='other-worker')
+
+        self.assertEqual(get_exam_snapshot(self.exam.id).answer_key[question_id], (wrong.id, 1))
+
+    def test_finish_grades_in_one_query_and_ignores_double_submit(self):
+        attempt = ExamAttempt.objects.create(exam=self.exam, employee=self.employee)
+        AttemptResponse.objects.create(attempt=attempt, question_id=self.c1.question_id, selected_choice=self.c1)
+        AttemptResponse.objects.create(attempt=attempt, question_id=self.c2.question_id, selected_choice=self.c2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(attempt.grade(), (1, 2))
+
+        stale = ExamAttempt.objects.get(pk=attempt.pk)
+        attempt.finish()
+        AttemptResponse.objects.filter(attempt=attempt, question_id=self.c2.question_id).update(
+            selected_choice=Choice.objects.get(question_id=self.c2.question_id, is_correct=True)
+        )
+        stale.finish()
+
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.total_score, stale.total_score), (1, 1))
+        self.assertEqual(stale.completed_at, attempt.completed_at)
+
+    def test_regrade_reports_pass_fail_changes(self):
+        attempt = ExamAttempt.objects.create(exam=self.exam, employee=self.employee)
+        AttemptResponse.objects.create(attempt=attempt, question_id=self.c2.question_id, selected_choice=self.c2)
+        attempt.finish()
+        self.assertFalse(attempt.is_passed)
+
+        Choice.objects.filter(question_id=self.c2.question_id).update(is_correct=False)
+        Choice.objects.filter(pk=self.c2.pk).update(is_correct=True)
+        result = regrade_exam(self.exam, batch_size=1)
+
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.total_score, attempt.is_passed), (1, True))
+        self.assertEqual((result.attempts, result.scores_changed, result.newly_passed), (1, 1, 1))
+        self.assertEqual(result.pass_changes[0].attempt_id, attempt.pk)
+
+    def test_single_page_exam_submits_and_grades_in_one_post(self):
+        self.exam.single_page = True
+        self.exam.save()
+        self.client.login(username='emp', password='pass1234')
+        start = self.client.post(reverse('exam_start', kwargs={'exam_id': self.exam.id}))
+        attempt = ExamAttempt.objects.get(employee=self.employee, exam=self.exam)
+        self.assertEqual(start['Location'], reverse('attempt_single_page', kwargs={'attempt_id': attempt.id}))
+
+        page = self.client.get(start['Location'])
+        self.assertContains(page, 'Q2')
+        response = self.client.post(
+            start['Location'],
+            data={f'question_{self.c1.question_id}': self.c1.id, f'question_{self.c2.question_id}': self.c2.id},
+        )
+        self.assertRedirects(response, reverse('exam_result', kwargs={'attempt_id': attempt.id}))
+
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.completed_at)
+        self.assertEqual(attempt.total_score, 1)
+        self.assertEqual(attempt.responses.count(), 2)
+
+    def test_finished_attempt_rejects_late_answers_and_regrade_ignores_them(self):
+        attempt = ExamAttempt.objects.create(exam=self.exam, employee=self.employee)
+        wrong = Choice.objects.get(question_id=self.c1.question_id, is_correct=False)
+        AttemptResponse.objects.create(attempt=attempt, question_id=self.c1.question_id, selected_choice=wrong)
+        attempt.finish()
+
+        self.client.login(username='emp', password='pass1234')
+        url = reverse('attempt_question', kwargs={'attempt_id': attempt.id, 'number': 1})
+        response = self.client.post(url, data={'choice': self.c1.id})
+        self.assertRedirects(response, reverse('exam_result', kwargs={'attempt_id': attempt.id}))
+        self.assertEqual(attempt.responses.get().selected_choice_id, wrong.id)
+
+        # Even a response written after completion by other means is not counted.
+        AttemptResponse.objects.filter(attempt=attempt).update(selected_choice=self.c1)
+        AttemptResponse.objects.filter(attempt=attempt).update(answered_at=timezone.now())
+        result = regrade_exam(self.exam)
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.total_score, attempt.is_passed), (0, False))
+        self.assertEqual(result.pass_changes, [])
+
+    def test_single_page_second_submit_keeps_graded_answers(self):
+        self.exam.single_page = True
+        self.exam.save()
+        attempt = ExamAttempt.objects.create(exam=self.exam, employee=self.employee)
+        url = reverse('attempt_single_page', kwargs={'attempt_id': attempt.id})
+        self.client.login(username='emp', password='pass1234')
+        # The second submit loaded its state before the first one finished the attempt.
+        state = load_attempt_state(self.user, attempt.id, self.client.session)
+        self.client.post(url, data={f'question_{self.c1.question_id}': self.c1.id})
+
+        form = ExamAnswersForm(data={f'question_{self.c2.question_id}': self.c2.id}, snapshot=state.snapshot)
+        self.assertTrue(form.is_valid())
+        self.assertFalse(save_official_answers(state.attempt, form, finish=True))
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.total_score, 1)
+        self.assertEqual(list(attempt.responses.values_list('selected_choice_id', flat=True)), [self.c1.id])
+
     def test_official_exam_second_attempt_blocked(self):
         self.client.login(username='emp', password='pass1234')
         self.client.post(reverse('exam_start', kwargs={'exam_id': self.exam.id}))
@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     AttemptFinishView,
     AttemptQuestionView,
+    AttemptSinglePageView,
     ExamCreateView,
     ExamDeleteView,
     ExamListView,
@@ -20,6 +21,7 @@ urlpatterns = [
     path('manage/<int:exam_id>/questions/', ExamQuestionManageView.as_view(), name='exam_questions_manage'),
     path('<int:exam_id>/start/', ExamStartView.as_view(), name='exam_start'),
     path('attempt/<int:attempt_id>/question/<int:number>/', AttemptQuestionView.as_view(), name='attempt_question'),
+    path('attempt/<int:attempt_id>/all/', AttemptSinglePageView.as_view(), name='attempt_single_page'),
     path('attempt/<int:attempt_id>/finish/', AttemptFinishView.as_view(), name='attempt_finish'),
     path('result/<int:attempt_id>/', ExamResultView.as_view(), name='exam_result'),
 ]
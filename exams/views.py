@@ -2,7 +2,6 @@ from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db import models
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
@@ -12,39 +11,22 @@ from django.views.generic import DetailView, ListView
 from django.views.generic.edit import FormView
 
 from config.permissions import get_user_role
+from employees.audience import member_queryset
 from employees.models import Employee
 
-from .forms import ExamForm, QuestionChoiceForm, QuestionFormSet
-from .models import Exam, ExamAttempt, Question
+from .forms import ExamAnswersForm, ExamForm, QuestionChoiceForm, QuestionFormSet
+from .models import Exam, ExamAttempt
+from .services import load_attempt_state, save_official_answers, save_practice_answer, save_practice_answers
+from .snapshot import get_exam_snapshot
+
+
+SUBMIT_GRACE_SECONDS = 30
 
 
 def _employee_available_exams(employee):
     if employee is None:
         return Exam.objects.none()
-
-    department_ids = []
-    current = employee.department
-    while current is not None:
-        department_ids.append(current.id)
-        current = current.parent
-
-    queryset = Exam.objects.filter(is_active=True)
-    filters = models.Q(target_type=Exam.TargetType.ORGANIZATION_WIDE)
-    if department_ids:
-        filters |= models.Q(target_type=Exam.TargetType.DEPARTMENT, departments__id__in=department_ids)
-    if employee.position_id:
-        filters |= models.Q(target_type=Exam.TargetType.POSITION, positions__id=employee.position_id)
-    return queryset.filter(filters).distinct()
-
-
-def _validate_exam_questions(exam):
-    for question in exam.questions.all():
-        choices = list(question.choices.all())
-        if len(choices) < 2:
-            return False
-        if sum(1 for choice in choices if choice.is_correct) != 1:
-            return False
-    return True
+    return member_queryset(Exam, employee).filter(is_active=True)
 
 
 class ExamManagerRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -176,10 +158,11 @@ class ExamStartView(EmployeeRequiredMixin, View):
     def post(self, request, exam_id):
         employee = get_object_or_404(Employee, user=request.user)
         exam = get_object_or_404(_employee_available_exams(employee), pk=exam_id)
-        if not exam.questions.exists():
+        snapshot = get_exam_snapshot(exam.id)
+        if not len(snapshot):
             messages.error(request, 'Энэ шалгалтад асуулт бүртгэгдээгүй байна.')
             return redirect('exam_list')
-        if not _validate_exam_questions(exam):
+        if not snapshot.is_valid():
             messages.error(request, 'Шалгалтын асуулт/choice бүтэц буруу байна (2+ choice, 1 зөв).')
             return redirect('exam_list')
 
@@ -188,6 +171,8 @@ class ExamStartView(EmployeeRequiredMixin, View):
                 messages.warning(request, 'Та энэ шалгалтыг аль хэдийн өгсөн байна.')
                 return redirect('exam_list')
             attempt = ExamAttempt.objects.create(exam=exam, employee=employee)
+            if exam.single_page:
+                return redirect('attempt_single_page', attempt_id=attempt.id)
             return redirect('attempt_question', attempt_id=attempt.id, number=1)
 
         token = int(timezone.now().timestamp())
@@ -198,6 +183,8 @@ class ExamStartView(EmployeeRequiredMixin, View):
             'user_id': request.user.id,
         }
         request.session.modified = True
+        if exam.single_page:
+            return redirect('attempt_single_page', attempt_id=token)
         return redirect('attempt_question', attempt_id=token, number=1)
 
 
@@ -205,42 +192,21 @@ class AttemptQuestionView(EmployeeRequiredMixin, FormView):
     template_name = 'exams/exam_question.html'
     form_class = QuestionChoiceForm
 
-    exam = None
+    state = None
     question = None
-    is_official = False
-
-    def _get_practice_data(self):
-        return self.request.session.get(f'practice_exam_{self.kwargs["attempt_id"]}')
-
-    def _load_context(self):
-        attempt_id = self.kwargs['attempt_id']
-        employee = get_object_or_404(Employee, user=self.request.user)
-
-        attempt = ExamAttempt.objects.filter(pk=attempt_id, employee=employee).select_related('exam').first()
-        if attempt:
-            self.is_official = True
-            self.exam = attempt.exam
-            return attempt, None
-
-        practice = self._get_practice_data()
-        if not practice or practice.get('user_id') != self.request.user.id:
-            raise Http404('Attempt not found')
-
-        self.exam = get_object_or_404(Exam, pk=practice['exam_id'], is_active=True)
-        return None, practice
 
     def dispatch(self, request, *args, **kwargs):
-        attempt, practice = self._load_context()
+        if not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
 
-        questions = list(self.exam.questions.prefetch_related('choices').all())
-        number = int(kwargs['number'])
-        if number < 1 or number > len(questions):
-            return redirect('attempt_finish', attempt_id=kwargs['attempt_id'])
-        self.question = questions[number - 1]
+        self.state = load_attempt_state(request.user, kwargs['attempt_id'], request.session)
+        if self.state is None:
+            raise Http404('Attempt not found')
+        if self.state.is_official and self.state.attempt.completed_at is not None:
+            return redirect('exam_result', attempt_id=kwargs['attempt_id'])
 
-        started_at = attempt.started_at if attempt else timezone.datetime.fromisoformat(practice['started_at'])
-        expires_at = started_at + timedelta(minutes=self.exam.duration_minutes)
-        if timezone.now() >= expires_at:
+        self.question = self.state.question(int(kwargs['number']))
+        if self.question is None or self.state.is_expired():
             return redirect('attempt_finish', attempt_id=kwargs['attempt_id'])
 
         return super().dispatch(request, *args, **kwargs)
@@ -252,76 +218,105 @@ class AttemptQuestionView(EmployeeRequiredMixin, FormView):
 
     def get_initial(self):
         initial = super().get_initial()
-        attempt_id = self.kwargs['attempt_id']
-
-        if self.is_official:
-            employee = get_object_or_404(Employee, user=self.request.user)
-            attempt = get_object_or_404(ExamAttempt, pk=attempt_id, employee=employee)
-            response = attempt.responses.filter(question=self.question).first()
-            if response:
-                initial['choice'] = response.selected_choice_id
-        else:
-            practice = self._get_practice_data()
-            if practice:
-                selected = practice['answers'].get(str(self.question.id))
-                if selected:
-                    initial['choice'] = selected
-
+        selected = self.state.answers.get(self.question.id)
+        if selected:
+            initial['choice'] = selected
         return initial
 
     def form_valid(self, form):
         attempt_id = self.kwargs['attempt_id']
         next_number = int(self.kwargs['number']) + 1
-        total_questions = self.exam.questions.count()
 
-        if self.is_official:
-            employee = get_object_or_404(Employee, user=self.request.user)
-            attempt = get_object_or_404(ExamAttempt, pk=attempt_id, employee=employee)
-            form.save_official(attempt)
+        if self.state.is_official:
+            if not save_official_answers(self.state.attempt, form):
+                return redirect('exam_result', attempt_id=attempt_id)
         else:
-            practice = self._get_practice_data()
-            if not practice:
-                raise Http404('Practice attempt not found')
-            practice['answers'][str(self.question.id)] = form.cleaned_data['choice'].id
-            self.request.session[f'practice_exam_{attempt_id}'] = practice
-            self.request.session.modified = True
-
-        if next_number > total_questions:
+            save_practice_answer(
+                self.state, self.request.session, attempt_id, self.question, form.cleaned_data['choice']
+            )
+
+        if next_number > self.state.total_questions:
             return redirect('attempt_finish', attempt_id=attempt_id)
         return redirect('attempt_question', attempt_id=attempt_id, number=next_number)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        total_questions = self.exam.questions.count()
         current_number = int(self.kwargs['number'])
-
-        if self.is_official:
-            employee = get_object_or_404(Employee, user=self.request.user)
-            attempt = get_object_or_404(ExamAttempt, pk=self.kwargs['attempt_id'], employee=employee)
-            started_at = attempt.started_at
-        else:
-            practice = self._get_practice_data()
-            started_at = timezone.datetime.fromisoformat(practice['started_at'])
-            attempt = None
-
-        expires_at = started_at + timedelta(minutes=self.exam.duration_minutes)
-        remaining_seconds = max(0, int((expires_at - timezone.now()).total_seconds()))
-
         context.update(
             {
-                'exam': self.exam,
-                'attempt': attempt,
+                'exam': self.state.exam,
+                'attempt': self.state.attempt,
                 'attempt_id': self.kwargs['attempt_id'],
                 'question': self.question,
                 'current_number': current_number,
-                'total_questions': total_questions,
-                'remaining_seconds': remaining_seconds,
+                'total_questions': self.state.total_questions,
+                'remaining_seconds': self.state.remaining_seconds(),
                 'prev_number': current_number - 1 if current_number > 1 else None,
             }
         )
         return context
 
 
+class AttemptSinglePageView(EmployeeRequiredMixin, FormView):
+    template_name = 'exams/exam_single_page.html'
+    form_class = ExamAnswersForm
+
+    state = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        self.state = load_attempt_state(request.user, kwargs['attempt_id'], request.session)
+        if self.state is None:
+            raise Http404('Attempt not found')
+        if self.state.is_official and self.state.attempt.completed_at is not None:
+            return redirect('exam_result', attempt_id=kwargs['attempt_id'])
+        now = timezone.now()
+        if request.method == 'POST':
+            # The page auto-submits when the timer runs out; allow for network latency.
+            now -= timedelta(seconds=SUBMIT_GRACE_SECONDS)
+        if self.state.is_expired(now):
+            return redirect('attempt_finish', attempt_id=kwargs['attempt_id'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['snapshot'] = self.state.snapshot
+        return kwargs
+
+    def get_initial(self):
+        initial = super().get_initial()
+        for question in self.state.snapshot.questions:
+            if question.id in self.state.answers:
+                initial[ExamAnswersForm.field_name(question)] = self.state.answers[question.id]
+        return initial
+
+    def form_valid(self, form):
+        attempt_id = self.kwargs['attempt_id']
+        if self.state.is_official:
+            if not save_official_answers(self.state.attempt, form, finish=True):
+                messages.warning(self.request, 'Шалгалт аль хэдийн дууссан байна.')
+                return redirect('exam_result', attempt_id=attempt_id)
+            messages.success(self.request, 'Албан ёсны шалгалт дууслаа.')
+            return redirect('exam_result', attempt_id=attempt_id)
+
+        save_practice_answers(self.state, self.request.session, attempt_id, form.answers())
+        return redirect('attempt_finish', attempt_id=attempt_id)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(
+            {
+                'exam': self.state.exam,
+                'attempt_id': self.kwargs['attempt_id'],
+                'total_questions': self.state.total_questions,
+                'remaining_seconds': self.state.remaining_seconds(),
+            }
+        )
+        return context
+
+
 class AttemptFinishView(EmployeeRequiredMixin, View):
     def get(self, request, attempt_id):
         employee = get_object_or_404(Employee, user=request.user)
@@ -338,12 +333,8 @@ class AttemptFinishView(EmployeeRequiredMixin, View):
             raise Http404('Attempt not found')
 
         exam = get_object_or_404(Exam, pk=practice['exam_id'])
-        answers = practice.get('answers', {})
-        score = 0
-        for question in exam.questions.all():
-            selected_id = answers.get(str(question.id))
-            if selected_id and question.choices.filter(pk=selected_id, is_correct=True).exists():
-                score += question.score
+        answers = {int(question_id): choice_id for question_id, choice_id in practice.get('answers', {}).items()}
+        score = get_exam_snapshot(exam.id).score(answers)
 
         result = {
             'exam_title': exam.title,
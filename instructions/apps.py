@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InstructionsConfig(AppConfig):
     name = 'instructions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -4,6 +4,7 @@ from django.db import models
 from employees.models import Department, Position
 
 from .models import Instruction
+from .services import RecordStatus
 
 
 class InstructionForm(forms.ModelForm):
@@ -49,3 +50,40 @@ class InstructionAssignForm(forms.Form):
             self.add_error('position', 'Албан тушаал сонгоно уу.')
 
         return cleaned_data
+
+
+class InstructionRegisterFilterForm(forms.Form):
+    ACKNOWLEDGED_CHOICES = (
+        ('', 'Бүгд'),
+        ('yes', 'Танилцсан'),
+        ('no', 'Танилцаагүй'),
+    )
+
+    status = forms.ChoiceField(choices=(('', 'Бүгд'),) + RecordStatus.CHOICES, required=False, label='Статус')
+    instruction = forms.ModelChoiceField(
+        queryset=Instruction.objects.all().order_by('title'),
+        required=False,
+        label='Зааварчилгаа',
+    )
+    department = forms.ModelChoiceField(
+        queryset=Department.objects.all().order_by('full_path'),
+        required=False,
+        label='Хэлтэс',
+    )
+    acknowledged = forms.ChoiceField(choices=ACKNOWLEDGED_CHOICES, required=False, label='Танилцсан')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs['class'] = 'form-select form-select-sm'
+
+    def register_filters(self):
+        if not self.is_valid():
+            return {}
+        acknowledged = self.cleaned_data['acknowledged']
+        return {
+            'status': self.cleaned_data['status'] or None,
+            'instruction': self.cleaned_data['instruction'],
+            'department': self.cleaned_data['department'],
+            'acknowledged': {'yes': True, 'no': False}.get(acknowledged),
+        }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from instructions.models import Instruction
+from instructions.services import DUE_DATE_BATCH_SIZE, recompute_all_due_dates, recompute_due_dates
+
+
+class Command(BaseCommand):
+    help = 'Зааварчилгааны дараагийн хугацааг хүчинтэй хоногоор нь дахин тооцоолно.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('instruction_ids', nargs='*', type=int)
+        parser.add_argument('--batch-size', type=int, default=DUE_DATE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['instruction_ids']:
+            instructions = list(Instruction.objects.filter(pk__in=options['instruction_ids']))
+            if not instructions:
+                raise CommandError('Зааварчилгаа олдсонгүй.')
+            results = {
+                instruction.pk: recompute_due_dates(instruction, batch_size=options['batch_size'])
+                for instruction in instructions
+            }
+        else:
+            results = recompute_all_due_dates(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Шинэчлэгдсэн бичлэг: {sum(results.values())}'))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instructions', '0003_alter_instruction_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='instructionrecord',
+            index=models.Index(fields=['next_due_date', 'acknowledged'], name='instr_record_due_ack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instructionrecord',
+            index=models.Index(fields=['instruction', 'employee'], name='instr_record_instr_emp_idx'),
+        ),
+    ]
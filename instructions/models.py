@@ -45,6 +45,10 @@ class InstructionRecord(models.Model):
     class Meta:
         ordering = ('next_due_date', '-created_at')
         unique_together = ('employee', 'instruction')
+        indexes = [
+            models.Index(fields=['next_due_date', 'acknowledged'], name='instr_record_due_ack_idx'),
+            models.Index(fields=['instruction', 'employee'], name='instr_record_instr_emp_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         base_date = self.completed_date or timezone.localdate()
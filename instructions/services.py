@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, DateField, F, Value, When
+from django.db.models.functions import Cast, Coalesce, TruncDate
+from django.utils import timezone
+
+from employees.services import get_subtree_ids_queryset
+
+from .models import Instruction, InstructionRecord
+
+ASSIGNMENT_BATCH_SIZE = 1000
+DUE_DATE_BATCH_SIZE = 5000
+DUE_SOON_DAYS = 30
+
+
+class RecordStatus:
+    OVERDUE = 'overdue'
+    DUE_SOON = 'due_soon'
+    VALID = 'valid'
+
+    CHOICES = (
+        (OVERDUE, 'Хугацаа дууссан'),
+        (DUE_SOON, f'{DUE_SOON_DAYS} хоногт дуусна'),
+        (VALID, 'Хүчинтэй'),
+    )
+
+
+def _status_q(status, today):
+    due_soon_limit = today + timedelta(days=DUE_SOON_DAYS)
+    return {
+        RecordStatus.OVERDUE: {'next_due_date__lt': today},
+        RecordStatus.DUE_SOON: {'next_due_date__gte': today, 'next_due_date__lte': due_soon_limit},
+        RecordStatus.VALID: {'next_due_date__gt': due_soon_limit},
+    }[status]
+
+
+def get_instruction_register(status=None, instruction=None, department=None, acknowledged=None, today=None):
+    """Register rows with a ``due_status`` computed in SQL, same thresholds as ``InstructionRecord.status``."""
+    today = today or timezone.localdate()
+    records = InstructionRecord.objects.select_related('employee', 'instruction').annotate(
+        due_status=Case(
+            When(**_status_q(RecordStatus.OVERDUE, today), then=Value(RecordStatus.OVERDUE)),
+            When(**_status_q(RecordStatus.DUE_SOON, today), then=Value(RecordStatus.DUE_SOON)),
+            default=Value(RecordStatus.VALID),
+            output_field=CharField(),
+        )
+    )
+    if status:
+        records = records.filter(**_status_q(status, today))
+    if instruction is not None:
+        records = records.filter(instruction=instruction)
+    if department is not None:
+        records = records.filter(employee__department_id__in=get_subtree_ids_queryset([department.pk]))
+    if acknowledged is not None:
+        records = records.filter(acknowledged=acknowledged)
+    return records.order_by('next_due_date', '-created_at', '-pk')
+
+
+def assign_instruction(instruction, employees, completed_date=None, batch_size=ASSIGNMENT_BATCH_SIZE):
+    """Create or reset the instruction record of every employee in ``employees``.
+
+    Rows are upserted in batches; returns exact ``created``/``updated`` counts.
+    """
+    next_due_date = (completed_date or timezone.localdate()) + timedelta(days=instruction.validity_days)
+    employee_ids = employees.order_by('id').values_list('id', flat=True)
+
+    totals = {'created': 0, 'updated': 0}
+    last_id = 0
+    while True:
+        chunk = list(employee_ids.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            existing = InstructionRecord.objects.filter(instruction=instruction, employee_id__in=chunk).count()
+            InstructionRecord.objects.bulk_create(
+                [
+                    InstructionRecord(
+                        employee_id=employee_id,
+                        instruction=instruction,
+                        completed_date=completed_date,
+                        next_due_date=next_due_date,
+                        acknowledged=False,
+                        acknowledged_date=None,
+                    )
+                    for employee_id in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=['employee', 'instruction'],
+                update_fields=['completed_date', 'next_due_date', 'acknowledged', 'acknowledged_date'],
+            )
+        totals['updated'] += existing
+        totals['created'] += len(chunk) - existing
+        last_id = chunk[-1]
+    return totals
+
+
+def recompute_due_dates(instruction, batch_size=DUE_DATE_BATCH_SIZE):
+    """Set ``next_due_date`` from ``completed_date`` (or the record's creation day).
+
+    Records are updated in keyset chunks of ``batch_size`` existing rows, so gaps
+    in the primary keys never turn into empty UPDATEs.
+    """
+    records = InstructionRecord.objects.filter(instruction=instruction)
+    next_due_date = Cast(
+        Coalesce(F('completed_date'), TruncDate('created_at'))
+        + Value(timedelta(days=instruction.validity_days)),
+        output_field=DateField(),
+    )
+    updated = 0
+    last_id = 0
+    while True:
+        remaining = records.filter(pk__gt=last_id)
+        boundary = list(remaining.order_by('pk').values_list('pk', flat=True)[batch_size - 1 : batch_size])
+        if not boundary:
+            return updated + remaining.update(next_due_date=next_due_date)
+        updated += remaining.filter(pk__lte=boundary[0]).update(next_due_date=next_due_date)
+        last_id = boundary[0]
+
+
+def recompute_all_due_dates(batch_size=DUE_DATE_BATCH_SIZE):
+    return {
+        instruction.pk: recompute_due_dates(instruction, batch_size=batch_size)
+        for instruction in Instruction.objects.only('id', 'validity_days')
+    }
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Instruction
+from .services import recompute_due_dates
+
+
+@receiver(pre_save, sender=Instruction)
+def remember_validity_days(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_validity_days = (
+        Instruction.objects.filter(pk=instance.pk).values_list('validity_days', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Instruction)
+def recompute_changed_due_dates(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_previous_validity_days', instance.validity_days) != instance.validity_days:
+        recompute_due_dates(instance)
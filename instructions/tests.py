@@ -1,12 +1,15 @@
 from datetime import timedelta
 
 from django.contrib.auth.models import Group, User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from employees.models import Employee, Position
+from employees.models import Department, Employee, Position
 from .models import Instruction, InstructionRecord
+from .services import assign_instruction, get_instruction_register, recompute_due_dates
 
 
 class InstructionRecordStatusTests(TestCase):
@@ -47,6 +50,144 @@ class InstructionRecordStatusTests(TestCase):
         self.assertIsNotNone(record.acknowledged_date)
 
 
+class InstructionAssignmentTests(TestCase):
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'assign{index}', password='pass1234'),
+                first_name='A',
+                last_name=str(index),
+                register=f'AS{index:08d}',
+            )
+            for index in range(5)
+        ]
+        self.instruction = Instruction.objects.create(
+            title='Цахилгааны аюулгүй ажиллагаа',
+            description='Туршилтын заавар',
+            validity_days=30,
+        )
+
+    def test_bulk_upsert_reports_exact_counts(self):
+        record = InstructionRecord.objects.create(employee=self.employees[0], instruction=self.instruction)
+        record.acknowledged = True
+        record.save()
+
+        completed = timezone.localdate() - timedelta(days=5)
+        result = assign_instruction(self.instruction, Employee.objects.all(), completed_date=completed, batch_size=2)
+
+        self.assertEqual(result, {'created': 4, 'updated': 1})
+        self.assertEqual(InstructionRecord.objects.count(), 5)
+        self.assertFalse(InstructionRecord.objects.filter(acknowledged=True).exists())
+        self.assertEqual(
+            set(InstructionRecord.objects.values_list('next_due_date', flat=True)),
+            {completed + timedelta(days=30)},
+        )
+
+
+class InstructionDueDateRecomputeTests(TestCase):
+    def setUp(self):
+        self.instruction = Instruction.objects.create(title='Өндөрт ажиллах', description='Заавар', validity_days=30)
+        self.completed = timezone.localdate() - timedelta(days=3)
+        self.done = InstructionRecord.objects.create(
+            employee=Employee.objects.create(
+                user=User.objects.create_user(username='due1', password='pass1234'),
+                first_name='D',
+                last_name='1',
+                register='DU00000001',
+            ),
+            instruction=self.instruction,
+            completed_date=self.completed,
+        )
+        self.pending = InstructionRecord.objects.create(
+            employee=Employee.objects.create(
+                user=User.objects.create_user(username='due2', password='pass1234'),
+                first_name='D',
+                last_name='2',
+                register='DU00000002',
+            ),
+            instruction=self.instruction,
+        )
+
+    def test_changing_validity_days_recomputes_every_record(self):
+        self.instruction.validity_days = 90
+        self.instruction.save()
+
+        self.done.refresh_from_db()
+        self.pending.refresh_from_db()
+        self.assertEqual(self.done.next_due_date, self.completed + timedelta(days=90))
+        self.assertEqual(self.pending.next_due_date, timezone.localdate(self.pending.created_at) + timedelta(days=90))
+
+    def test_sparse_ids_do_not_cause_empty_updates(self):
+        sparse = InstructionRecord.objects.create(
+            pk=self.pending.pk + 100000,
+            employee=Employee.objects.create(
+                user=User.objects.create_user(username='due3', password='pass1234'),
+                first_name='D',
+                last_name='3',
+                register='DU00000003',
+            ),
+            instruction=self.instruction,
+            completed_date=self.completed,
+        )
+        Instruction.objects.filter(pk=self.instruction.pk).update(validity_days=60)
+        self.instruction.refresh_from_db()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(recompute_due_dates(self.instruction, batch_size=2), 3)
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        sparse.refresh_from_db()
+        self.assertEqual(sparse.next_due_date, self.completed + timedelta(days=60))
+
+
+class InstructionRegisterTests(TestCase):
+    def setUp(self):
+        self.parent = Department.objects.create(name='Үйлдвэр')
+        self.child = Department.objects.create(name='Цех', parent=self.parent)
+        self.other = Department.objects.create(name='Оффис')
+        self.instruction = Instruction.objects.create(title='Цахилгаан', description='Заавар', validity_days=365)
+        today = timezone.localdate()
+        self.overdue = self._record('reg1', self.child, today - timedelta(days=400))
+        self.due_soon = self._record('reg2', self.parent, today - timedelta(days=350), acknowledged=True)
+        self.valid = self._record('reg3', self.other, today)
+
+    def _record(self, username, department, completed_date, acknowledged=False):
+        employee = Employee.objects.create(
+            user=User.objects.create_user(username=username, password='pass1234'),
+            first_name=username,
+            last_name='R',
+            register=username.upper().ljust(10, '0'),
+            department=department,
+        )
+        return InstructionRecord.objects.create(
+            employee=employee,
+            instruction=self.instruction,
+            completed_date=completed_date,
+            acknowledged=acknowledged,
+        )
+
+    def test_status_annotation_matches_model_property(self):
+        for record in get_instruction_register():
+            self.assertEqual(record.due_status, record.status)
+
+    def test_filters(self):
+        self.assertEqual([r.pk for r in get_instruction_register(status='overdue')], [self.overdue.pk])
+        self.assertEqual([r.pk for r in get_instruction_register(status='due_soon')], [self.due_soon.pk])
+        self.assertEqual(
+            {r.pk for r in get_instruction_register(department=self.parent)},
+            {self.overdue.pk, self.due_soon.pk},
+        )
+        self.assertEqual([r.pk for r in get_instruction_register(acknowledged=False, department=self.parent)], [self.overdue.pk])
+
+    def test_register_view_paginates(self):
+        User.objects.create_superuser(username='admin', password='pass1234')
+        self.client.login(username='admin', password='pass1234')
+        response = self.client.get(reverse('instruction_record_list'), {'status': 'overdue'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.pk for r in response.context['records']], [self.overdue.pk])
+        self.assertEqual(response.context['page'].paginator.count, 1)
+
+
 class InstructionViewsAuthTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='staff', password='pass1234')
@@ -1,16 +1,18 @@
 from django.contrib import messages
-from django.db import transaction
+from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
 from config.permissions import role_required
 from employees.models import Employee
 
-from .forms import InstructionAssignForm, InstructionForm
+from .forms import InstructionAssignForm, InstructionForm, InstructionRegisterFilterForm
 from .models import Instruction, InstructionRecord
+from .services import assign_instruction, get_instruction_register
 
 
 MANAGER_ROLES = ['system_admin', 'hse_manager', 'department_head']
+REGISTER_PAGE_SIZE = 50
 
 
 def _build_employee_queryset(scope, department=None, position=None):
@@ -44,8 +46,22 @@ def instruction_add(request):
 
 @role_required(MANAGER_ROLES)
 def instruction_record_list(request):
-    records = InstructionRecord.objects.select_related('employee', 'instruction').all()
-    return render(request, 'instructions/instruction_record_list.html', {'records': records})
+    filter_form = InstructionRegisterFilterForm(request.GET or None)
+    records = get_instruction_register(**filter_form.register_filters())
+    page = Paginator(records, REGISTER_PAGE_SIZE).get_page(request.GET.get('page'))
+
+    query = request.GET.copy()
+    query.pop('page', None)
+    return render(
+        request,
+        'instructions/instruction_record_list.html',
+        {
+            'records': page.object_list,
+            'page': page,
+            'filter_form': filter_form,
+            'filter_query': query.urlencode(),
+        },
+    )
 
 
 @role_required(MANAGER_ROLES)
@@ -60,25 +76,9 @@ def instruction_record_add(request):
         completed_date = form.cleaned_data['completed_date']
 
         employees = _build_employee_queryset(target_scope, department, position)
-
-        created_count = 0
-        updated_count = 0
-
-        with transaction.atomic():
-            for employee in employees:
-                _, created = InstructionRecord.objects.update_or_create(
-                    employee=employee,
-                    instruction=instruction,
-                    defaults={
-                        'completed_date': completed_date,
-                        'acknowledged': False,
-                        'acknowledged_date': None,
-                    },
-                )
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
+        result = assign_instruction(instruction, employees, completed_date=completed_date)
+        created_count = result['created']
+        updated_count = result['updated']
 
         messages.success(
             request,
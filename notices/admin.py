@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Notice, NoticeRead
+from .models import ArchivedNotice, Notice, NoticeRead
 
 
 @admin.register(Notice)
@@ -16,3 +16,16 @@ class NoticeReadAdmin(admin.ModelAdmin):
     list_display = ('employee', 'notice', 'read_at', 'acknowledged', 'acknowledged_at')
     list_filter = ('acknowledged', 'read_at')
     search_fields = ('employee__first_name', 'employee__last_name', 'notice__title')
+
+
+@admin.register(ArchivedNotice)
+class ArchivedNoticeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'notice_type', 'created_at', 'expires_at', 'target_count', 'read_count', 'archived_at')
+    list_filter = ('notice_type', 'archived_at')
+    search_fields = ('title', 'content')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class NoticesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notices'
+
+    def ready(self):
+        from employees.audience import register_audience_model
+
+        from . import signals  # noqa: F401
+        from .models import Notice
+
+        register_audience_model(Notice, type_field='notice_type')
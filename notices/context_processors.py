@@ -0,0 +1,7 @@
+from .inbox import get_unread_notice_count
+
+
+def inbox(request):
+    if not request.user.is_authenticated:
+        return {}
+    return {'inbox_unread_count': get_unread_notice_count(request.user)}
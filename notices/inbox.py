@@ -0,0 +1,119 @@
+import uuid
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils import timezone
+
+from employees.audience import member_queryset
+from employees.models import Employee
+
+from .models import Notice, NoticeRead
+from .read_buffer import pending_notice_ids, pending_notice_reads
+from .services import live_notice_q
+
+INBOX_PAGE_SIZE = 20
+UNREAD_COUNT_TIMEOUT = 5 * 60
+
+NOTICES_GENERATION_KEY = 'notices:inbox:generation'
+USER_GENERATION_KEY = 'notices:inbox:generation:user:{}'
+UNREAD_COUNT_KEY = 'notices:inbox:unread:user:{}:{}:{}'
+
+
+def _encode_cursor(notice, unread_first, as_of):
+    prefix = f'{as_of.isoformat()}_{int(notice.is_read)}_' if unread_first else ''
+    return f'{prefix}{notice.created_at.isoformat()}_{notice.pk}'
+
+
+def _decode_cursor(cursor, unread_first):
+    """``(as_of, keyset condition for rows after cursor)``; ``None`` when the cursor is malformed."""
+    try:
+        as_of = None
+        if unread_first:
+            as_of, is_read, cursor = cursor.split('_', 2)
+            as_of = datetime.fromisoformat(as_of)
+            is_read = bool(int(is_read))
+        created_at, notice_id = cursor.rsplit('_', 1)
+        created_at = datetime.fromisoformat(created_at)
+        notice_id = int(notice_id)
+    except ValueError:
+        return None
+
+    after = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=notice_id)
+    if unread_first:
+        after = Q(is_read__gt=is_read) | (Q(is_read=is_read) & after)
+    return as_of, after
+
+
+def _read_as_of(employee, as_of):
+    """Whether a notice had been read at ``as_of``.
+
+    Notices read while someone pages through the inbox must not move between the
+    unread and read groups, or later pages would repeat or skip them.
+    """
+    read = Q(Exists(NoticeRead.objects.filter(employee=employee, notice_id=OuterRef('pk'), read_at__lt=as_of)))
+    pending_ids = [
+        notice_id
+        for notice_id, read_at in pending_notice_reads(employee).items()
+        if read_at is None or read_at < as_of
+    ]
+    if pending_ids:
+        read |= Q(pk__in=pending_ids)
+    return ExpressionWrapper(read, output_field=BooleanField())
+
+
+def get_inbox_page(employee, cursor=None, unread_first=False, page_size=INBOX_PAGE_SIZE):
+    as_of, after = (_decode_cursor(cursor, unread_first) if cursor else None) or (None, None)
+    as_of = as_of or timezone.now()
+    notices = (
+        member_queryset(Notice, employee)
+        .filter(live_notice_q())
+        .annotate(is_read=_read_as_of(employee, as_of))
+    )
+    ordering = ('-created_at', '-pk')
+    if unread_first:
+        ordering = ('is_read',) + ordering
+
+    if after is not None:
+        notices = notices.filter(after)
+
+    page = list(notices.order_by(*ordering)[: page_size + 1])
+    next_cursor = _encode_cursor(page[page_size - 1], unread_first, as_of) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
+
+def invalidate_unread_counts():
+    """Called when notice audiences change: every cached count becomes stale at once."""
+    cache.set(NOTICES_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_unread_count(employee):
+    cache.set(USER_GENERATION_KEY.format(employee.user_id), uuid.uuid4().hex, None)
+
+
+def count_unread_notices(employee):
+    unread = (
+        member_queryset(Notice, employee)
+        .filter(live_notice_q())
+        .exclude(pk__in=NoticeRead.objects.filter(employee=employee).values('notice_id'))
+    )
+    pending_ids = pending_notice_ids(employee)
+    if pending_ids:
+        unread = unread.exclude(pk__in=pending_ids)
+    return unread.count()
+
+
+def get_unread_notice_count(user):
+    user_generation_key = USER_GENERATION_KEY.format(user.pk)
+    generations = cache.get_many([NOTICES_GENERATION_KEY, user_generation_key])
+    key = UNREAD_COUNT_KEY.format(
+        user.pk,
+        generations.get(NOTICES_GENERATION_KEY, 0),
+        generations.get(user_generation_key, 0),
+    )
+    count = cache.get(key)
+    if count is None:
+        employee = Employee.objects.filter(user=user).only('id', 'user_id').first()
+        count = count_unread_notices(employee) if employee is not None else 0
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
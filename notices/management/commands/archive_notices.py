@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from notices.services import ARCHIVE_BATCH_SIZE, archive_notices, deactivate_expired_notices
+
+
+class Command(BaseCommand):
+    help = 'Хугацаа дууссан мэдэгдлийг идэвхгүй болгож, хуучин мэдэгдлийг уншилтын хамт архивт шилжүүлнэ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Дууссанаас хойш хэдэн хоногийн дараа архивлах.')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deactivated = deactivate_expired_notices()
+        self.stdout.write(f'Идэвхгүй болгосон: {deactivated}')
+
+        totals = archive_notices(older_than_days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f"Архивласан мэдэгдэл: {totals['notices']}, уншилт: {totals['reads']}")
+        )
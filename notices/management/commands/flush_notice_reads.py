@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notices.read_buffer import FLUSH_BATCH_SIZE, flush_due, flush_notice_reads
+
+
+class Command(BaseCommand):
+    help = 'Кэшэд хуримтлагдсан мэдэгдэл уншсан тэмдэглэлийг өгөгдлийн санд багцаар бичнэ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FLUSH_BATCH_SIZE)
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Өгвөл тухайн секунд тутамд шалгаж, босго эсвэл хугацаа хэтэрсэн үед бичнэ.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            if not options['interval'] or flush_due():
+                written = flush_notice_reads(batch_size=options['batch_size'])
+                self.stdout.write(f'Шинээр бичсэн: {written}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Уншсан тэмдэглэл бичигдлээ.'))
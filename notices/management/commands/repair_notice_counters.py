@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from notices.models import Notice
+from notices.services import refresh_notice_counters
+from notices.signals import COUNTER_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Мэдэгдлийн зорилтот, уншсан, баталгаажуулсан тоолуурыг дахин тооцоолж зөрүүг засна.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        notice_ids = Notice.objects.order_by('id').values_list('id', flat=True)
+        drifted = 0
+        last_id = 0
+        while True:
+            chunk = list(notice_ids.filter(id__gt=last_id)[: options['batch_size']])
+            if not chunk:
+                break
+            counters = Notice.objects.filter(pk__in=chunk).values_list('id', *COUNTER_FIELDS)
+            before = set(counters)
+            refresh_notice_counters(chunk)
+            drifted += len(before - set(counters))
+            last_id = chunk[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Тоолуур шинэчлэгдлээ. Зөрүүтэй мэдэгдэл: {drifted}'))
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:22
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_field).annotate(total=Count('*')).values('total')),
+        Value(0),
+    )
+
+
+def populate_notice_counters(apps, schema_editor):
+    # Same computation as notices.services.refresh_notice_counters, on historical models.
+    AudienceMembership = apps.get_model('employees', 'AudienceMembership')
+    Notice = apps.get_model('notices', 'Notice')
+    NoticeRead = apps.get_model('notices', 'NoticeRead')
+
+    members = AudienceMembership.objects.filter(object_type='notice', object_id=OuterRef('pk'))
+    member_reads = NoticeRead.objects.filter(notice_id=OuterRef('pk')).filter(
+        Exists(
+            AudienceMembership.objects.filter(
+                object_type='notice',
+                object_id=OuterRef('notice_id'),
+                employee_id=OuterRef('employee_id'),
+            )
+        )
+    )
+    Notice.objects.update(
+        target_count=_count_subquery(members, 'object_id'),
+        read_count=_count_subquery(member_reads, 'notice_id'),
+        ack_count=_count_subquery(member_reads.filter(acknowledged=True), 'notice_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_audiencemembership'),
+        ('notices', '0002_notice_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notice',
+            name='ack_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='read_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='target_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_notice_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_audiencemembership'),
+        ('notices', '0003_notice_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True)),
+                ('title', models.CharField(max_length=255)),
+                ('content', models.TextField()),
+                ('notice_type', models.CharField(choices=[('organization_wide', 'Бүх ажилтан'), ('department', 'Хэлтсийн'), ('position', 'Албан тушаалын'), ('specific_employee', 'Тухайлсан ажилтан')], max_length=32)),
+                ('requires_acknowledgement', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateField(blank=True, null=True)),
+                ('target_count', models.PositiveIntegerField(default=0)),
+                ('read_count', models.PositiveIntegerField(default=0)),
+                ('ack_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Архивласан мэдэгдэл',
+                'verbose_name_plural': 'Архивласан мэдэгдлүүд',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedNoticeRead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_id', models.PositiveBigIntegerField()),
+                ('read_at', models.DateTimeField()),
+                ('acknowledged', models.BooleanField(default=False)),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Архивласан уншилт',
+                'verbose_name_plural': 'Архивласан уншилтууд',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['is_active', 'expires_at'], name='notice_active_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='notice_live_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivednotice',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivednoticeread',
+            name='notice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reads', to='notices.archivednotice'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivednoticeread',
+            constraint=models.UniqueConstraint(fields=('notice', 'employee_id'), name='unique_archived_notice_read'),
+        ),
+    ]
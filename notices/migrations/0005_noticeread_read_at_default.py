@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notices', '0004_notice_expiry_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='noticeread',
+            name='read_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
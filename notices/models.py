@@ -26,10 +26,19 @@ class Notice(models.Model):
     expires_at = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
+    # Maintained by notices.services; reconcile with `repair_notice_counters`.
+    target_count = models.PositiveIntegerField(default=0, editable=False)
+    read_count = models.PositiveIntegerField(default=0, editable=False)
+    ack_count = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         verbose_name = 'Мэдэгдэл'
         verbose_name_plural = 'Мэдэгдлүүд'
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['is_active', 'expires_at'], name='notice_active_expiry_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(is_active=True), name='notice_live_expiry_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.get_notice_type_display()})'
@@ -38,7 +47,8 @@ class Notice(models.Model):
 class NoticeRead(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='notice_reads')
     notice = models.ForeignKey(Notice, on_delete=models.CASCADE, related_name='reads')
-    read_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered reads are written later with the time they happened.
+    read_at = models.DateTimeField(default=timezone.now, editable=False)
     acknowledged = models.BooleanField(default=False)
     acknowledged_at = models.DateTimeField(null=True, blank=True)
 
@@ -59,3 +69,45 @@ class NoticeRead(models.Model):
 
     def __str__(self):
         return f'{self.employee} - {self.notice}'
+
+
+class ArchivedNotice(models.Model):
+    original_id = models.PositiveBigIntegerField(unique=True)
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    notice_type = models.CharField(max_length=32, choices=Notice.NoticeType.choices)
+    requires_acknowledgement = models.BooleanField(default=False)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField()
+    expires_at = models.DateField(null=True, blank=True)
+    target_count = models.PositiveIntegerField(default=0)
+    read_count = models.PositiveIntegerField(default=0)
+    ack_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Архивласан мэдэгдэл'
+        verbose_name_plural = 'Архивласан мэдэгдлүүд'
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedNoticeRead(models.Model):
+    notice = models.ForeignKey(ArchivedNotice, on_delete=models.CASCADE, related_name='reads')
+    # Plain id so the archive outlives employee records.
+    employee_id = models.PositiveBigIntegerField()
+    read_at = models.DateTimeField()
+    acknowledged = models.BooleanField(default=False)
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Архивласан уншилт'
+        verbose_name_plural = 'Архивласан уншилтууд'
+        constraints = [
+            models.UniqueConstraint(fields=['notice', 'employee_id'], name='unique_archived_notice_read'),
+        ]
+
+    def __str__(self):
+        return f'{self.employee_id} - {self.notice}'
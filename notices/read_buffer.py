@@ -0,0 +1,191 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Notice, NoticeRead
+from .services import lock_notices
+
+SEQUENCE_KEY = 'notices:read_buffer:sequence'
+FLUSHED_KEY = 'notices:read_buffer:flushed'
+PENDING_SINCE_KEY = 'notices:read_buffer:pending_since'
+LOCK_KEY = 'notices:read_buffer:lock'
+SLOT_KEY = 'notices:read_buffer:slot:{}'
+GAP_KEY = 'notices:read_buffer:gap:{}'
+OVERLAY_KEY = 'notices:read_buffer:employee:{}'
+
+# Entries must outlive the flush interval; overlays only hide the gap until rows land.
+ENTRY_TIMEOUT = 24 * 60 * 60
+LOCK_TIMEOUT = 5 * 60
+# A sequence number is taken just before its slot is written; a slot still
+# missing after this many seconds belongs to a writer that died in between.
+GAP_TIMEOUT = 60
+FLUSH_BATCH_SIZE = 500
+
+
+def _sequence():
+    cache.add(SEQUENCE_KEY, 0, None)
+    return cache.get(SEQUENCE_KEY, 0)
+
+
+def _next_sequence():
+    try:
+        return cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, None)
+        return cache.incr(SEQUENCE_KEY)
+
+
+def _overlay(key):
+    overlay = cache.get(key, {})
+    # Overlays written before they carried read times hold a plain id list.
+    return overlay if isinstance(overlay, dict) else dict.fromkeys(overlay)
+
+
+def pending_notice_reads(employee):
+    """Buffered, not yet written reads of ``employee``: notice id -> time of the read."""
+    return _overlay(OVERLAY_KEY.format(employee.pk))
+
+
+def pending_notice_ids(employee):
+    return set(pending_notice_reads(employee))
+
+
+def buffer_notice_reads(employee, notice_ids):
+    """Record inbox reads; the background flusher writes the ``NoticeRead`` rows.
+
+    Only done when ``NOTICE_READ_BUFFER_ENABLED`` says the cache is shared by every
+    process. Otherwise the flusher would never see these entries, so the rows are
+    written right away.
+    """
+    notice_ids = sorted(set(notice_ids))
+    if not notice_ids:
+        return 0
+    now = timezone.now()
+    if not settings.NOTICE_READ_BUFFER_ENABLED:
+        _write_reads({(employee.pk, notice_id): now for notice_id in notice_ids})
+        return len(notice_ids)
+
+    overlay_key = OVERLAY_KEY.format(employee.pk)
+    overlay = _overlay(overlay_key)
+    for notice_id in notice_ids:
+        overlay.setdefault(notice_id, now)
+    cache.set(overlay_key, overlay, ENTRY_TIMEOUT)
+    sequence = _next_sequence()
+    cache.set(SLOT_KEY.format(sequence), (employee.pk, notice_ids, now), ENTRY_TIMEOUT)
+    cache.add(PENDING_SINCE_KEY, time.time(), ENTRY_TIMEOUT)
+    return len(notice_ids)
+
+
+def flush_due():
+    """Whether enough reads are pending, or the oldest is old enough, to be worth a flush."""
+    if _sequence() - cache.get(FLUSHED_KEY, 0) >= settings.NOTICE_READ_BUFFER_FLUSH_THRESHOLD:
+        return True
+    pending_since = cache.get(PENDING_SINCE_KEY)
+    return pending_since is not None and time.time() - pending_since >= settings.NOTICE_READ_BUFFER_MAX_AGE
+
+
+def _write_reads(reads):
+    """``reads`` maps ``(employee_id, notice_id)`` to the time of the read."""
+    pairs = list(reads)
+    with transaction.atomic():
+        lock_notices({notice_id for _, notice_id in pairs})
+        existing = set(
+            NoticeRead.objects.filter(
+                employee_id__in={employee_id for employee_id, _ in pairs},
+                notice_id__in={notice_id for _, notice_id in pairs},
+            ).values_list('employee_id', 'notice_id')
+        )
+        new_pairs = [pair for pair in pairs if pair not in existing]
+        added_by_notice = {}
+        for _, notice_id in new_pairs:
+            added_by_notice[notice_id] = added_by_notice.get(notice_id, 0) + 1
+
+        NoticeRead.objects.bulk_create(
+            [
+                NoticeRead(employee_id=employee_id, notice_id=notice_id, read_at=reads[employee_id, notice_id])
+                for employee_id, notice_id in new_pairs
+            ],
+            batch_size=FLUSH_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        if added_by_notice:
+            Notice.objects.filter(pk__in=added_by_notice).update(
+                read_count=F('read_count')
+                + Case(
+                    *[When(pk=notice_id, then=Value(added)) for notice_id, added in added_by_notice.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+    return len(new_pairs)
+
+
+def _trim_overlays(flushed):
+    for employee_id, notice_ids in flushed.items():
+        key = OVERLAY_KEY.format(employee_id)
+        remaining = {
+            notice_id: read_at for notice_id, read_at in _overlay(key).items() if notice_id not in notice_ids
+        }
+        if remaining:
+            cache.set(key, remaining, ENTRY_TIMEOUT)
+        else:
+            cache.delete(key)
+
+
+def _flushable_until(start, stop, slots):
+    """Last sequence up to which every slot has been written, or given up on."""
+    for sequence in range(start + 1, stop + 1):
+        if SLOT_KEY.format(sequence) in slots:
+            continue
+        now = time.time()
+        cache.add(GAP_KEY.format(sequence), now, ENTRY_TIMEOUT)
+        if now - cache.get(GAP_KEY.format(sequence), now) < GAP_TIMEOUT:
+            return sequence - 1
+    return stop
+
+
+def flush_notice_reads(batch_size=FLUSH_BATCH_SIZE):
+    """Write buffered reads with ``ignore_conflicts``; returns the number of new rows."""
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return 0
+    try:
+        cache.delete(PENDING_SINCE_KEY)
+        start = cache.get(FLUSHED_KEY, 0)
+        end = _sequence()
+        written = 0
+        while start < end:
+            stop = min(start + batch_size, end)
+            slots = cache.get_many([SLOT_KEY.format(sequence) for sequence in range(start + 1, stop + 1)])
+            # Stop at a slot whose writer has its sequence number but has not stored it yet.
+            until = _flushable_until(start, stop, slots)
+            slot_keys = [SLOT_KEY.format(sequence) for sequence in range(start + 1, until + 1)]
+
+            reads = {}
+            flushed = {}
+            for key in slot_keys:
+                if key not in slots:
+                    continue
+                employee_id, notice_ids, *read_at = slots[key]
+                # Slots buffered before reads carried their timestamp fall back to now.
+                read_at = read_at[0] if read_at else timezone.now()
+                flushed.setdefault(employee_id, set()).update(notice_ids)
+                for notice_id in notice_ids:
+                    pair = (employee_id, notice_id)
+                    reads[pair] = min(reads.get(pair, read_at), read_at)
+
+            if reads:
+                written += _write_reads(reads)
+            cache.set(FLUSHED_KEY, until, None)
+            cache.delete_many(slot_keys + [GAP_KEY.format(sequence) for sequence in range(start + 1, until + 1)])
+            _trim_overlays(flushed)
+            if until < stop:
+                cache.add(PENDING_SINCE_KEY, time.time(), ENTRY_TIMEOUT)
+                break
+            start = stop
+        return written
+    finally:
+        cache.delete(LOCK_KEY)
@@ -1,90 +1,224 @@
-from django.db.models import Q
+from datetime import timedelta
 
-from employees.models import Department
-from employees.models import Employee
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from .models import Notice, NoticeRead
+from employees.audience import audience_employees, get_audience_fields, member_queryset
+from employees.models import AudienceMembership
 
+from .models import ArchivedNotice, ArchivedNoticeRead, Notice, NoticeRead
 
-def get_department_ancestor_ids(department):
-    ancestor_ids = set()
-    current = department
-    while current is not None:
-        ancestor_ids.add(current.id)
-        current = current.parent
-    return ancestor_ids
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_READ_BATCH_SIZE = 2000
 
 
 def get_target_employees_for_notice(notice):
-    qs = Employee.objects.select_related('department', 'position').all()
-
-    if notice.notice_type == Notice.NoticeType.ORGANIZATION_WIDE:
-        return qs
-    if notice.notice_type == Notice.NoticeType.DEPARTMENT:
-        selected_ids = list(notice.departments.values_list('id', flat=True))
-        if not selected_ids:
-            return qs.none()
-
-        all_ids = set(selected_ids)
-        queue = list(selected_ids)
-        while queue:
-            current_id = queue.pop()
-            child_ids = list(Department.objects.filter(parent_id=current_id).values_list('id', flat=True))
-            for child_id in child_ids:
-                if child_id not in all_ids:
-                    all_ids.add(child_id)
-                    queue.append(child_id)
-        return qs.filter(department_id__in=all_ids)
-    if notice.notice_type == Notice.NoticeType.POSITION:
-        return qs.filter(position__in=notice.positions.all())
-    if notice.notice_type == Notice.NoticeType.SPECIFIC_EMPLOYEE:
-        return qs.filter(id__in=notice.employees.values_list('id', flat=True))
-    return qs.none()
+    return audience_employees(notice).select_related('department', 'position')
 
 
-def get_applicable_notices_for_employee(employee):
-    department_ancestors = get_department_ancestor_ids(employee.department) if employee.department else set()
-    position_id = employee.position_id
+def live_notice_q(today=None):
+    today = today or timezone.localdate()
+    return Q(is_active=True) & (Q(expires_at__isnull=True) | Q(expires_at__gte=today))
 
-    filters = Q(notice_type=Notice.NoticeType.ORGANIZATION_WIDE)
-    if department_ancestors:
-        filters |= Q(notice_type=Notice.NoticeType.DEPARTMENT, departments__id__in=department_ancestors)
-    if position_id:
-        filters |= Q(notice_type=Notice.NoticeType.POSITION, positions__id=position_id)
-    filters |= Q(notice_type=Notice.NoticeType.SPECIFIC_EMPLOYEE, employees=employee)
 
-    return Notice.objects.filter(is_active=True).filter(filters).distinct().prefetch_related(
+def get_applicable_notices_for_employee(employee):
+    return member_queryset(Notice, employee).filter(live_notice_q()).prefetch_related(
         'departments', 'positions', 'employees'
     )
 
 
+def get_acknowledgeable_notices(employee):
+    """Live notices targeting the employee that ask for acknowledgement; no prefetching."""
+    return member_queryset(Notice, employee).filter(live_notice_q(), requires_acknowledgement=True)
+
+
+def lock_notices(notice_ids):
+    """Lock notice rows before checking which reads exist and bumping their counters.
+
+    Every counter writer takes these locks (in pk order) inside its transaction, so
+    the set of existing reads it sees cannot change before it commits. The counter
+    UPDATE would lock the same rows anyway.
+    """
+    return list(
+        Notice.objects.select_for_update().filter(pk__in=notice_ids).order_by('pk').values_list('pk', flat=True)
+    )
+
+
 def get_or_create_notice_read(employee, notice):
-    return NoticeRead.objects.get_or_create(employee=employee, notice=notice)
+    with transaction.atomic():
+        lock_notices([notice.pk])
+        read_obj, created = NoticeRead.objects.get_or_create(employee=employee, notice=notice)
+        if created:
+            Notice.objects.filter(pk=notice.pk).update(read_count=F('read_count') + 1)
+    return read_obj, created
+
+
+def acknowledge_notice_read(employee, notice):
+    read_obj, _ = get_or_create_notice_read(employee, notice)
+    # The conditional update makes concurrent acknowledgements count once.
+    updated = NoticeRead.objects.filter(pk=read_obj.pk, acknowledged=False).update(
+        acknowledged=True,
+        acknowledged_at=timezone.now(),
+    )
+    if updated:
+        Notice.objects.filter(pk=notice.pk).update(ack_count=F('ack_count') + 1)
+    return updated
+
+
+def acknowledge_notices(employee, notice_ids=None):
+    """Acknowledge the given notice ids, or every pending one, with a single upsert."""
+    notices = get_acknowledgeable_notices(employee)
+    if notice_ids is not None:
+        notices = notices.filter(pk__in=notice_ids)
+    authorized_ids = set(notices.values_list('pk', flat=True))
+    if not authorized_ids:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        lock_notices(authorized_ids)
+        existing = dict(
+            NoticeRead.objects.filter(employee=employee, notice_id__in=authorized_ids).values_list(
+                'notice_id', 'acknowledged'
+            )
+        )
+        pending_ids = [notice_id for notice_id in authorized_ids if not existing.get(notice_id)]
+        if not pending_ids:
+            return 0
+        unread_ids = [notice_id for notice_id in pending_ids if notice_id not in existing]
+
+        NoticeRead.objects.bulk_create(
+            [
+                NoticeRead(employee=employee, notice_id=notice_id, acknowledged=True, acknowledged_at=now)
+                for notice_id in pending_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['employee', 'notice'],
+            update_fields=['acknowledged', 'acknowledged_at'],
+        )
+        Notice.objects.filter(pk__in=pending_ids).update(ack_count=F('ack_count') + 1)
+        if unread_ids:
+            Notice.objects.filter(pk__in=unread_ids).update(read_count=F('read_count') + 1)
+    return len(pending_ids)
+
+
+def _count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_field).annotate(total=Count('*')).values('total')),
+        Value(0),
+    )
+
+
+def refresh_notice_counters(notice_ids=None):
+    object_type = get_audience_fields(Notice).object_type
+    members = AudienceMembership.objects.filter(object_type=object_type, object_id=OuterRef('pk'))
+    member_reads = NoticeRead.objects.filter(notice_id=OuterRef('pk')).filter(
+        Exists(
+            AudienceMembership.objects.filter(
+                object_type=object_type,
+                object_id=OuterRef('notice_id'),
+                employee_id=OuterRef('employee_id'),
+            )
+        )
+    )
+
+    notices = Notice.objects.all() if notice_ids is None else Notice.objects.filter(pk__in=notice_ids)
+    return notices.update(
+        target_count=_count_subquery(members, 'object_id'),
+        read_count=_count_subquery(member_reads, 'notice_id'),
+        ack_count=_count_subquery(member_reads.filter(acknowledged=True), 'notice_id'),
+    )
 
 
 def get_notice_metrics_for_dashboard():
-    active_notices = Notice.objects.filter(is_active=True)
-
-    unread_count = 0
-    unacknowledged_count = 0
-
-    for notice in active_notices:
-        target_qs = get_target_employees_for_notice(notice)
-        total_targets = target_qs.count()
-        if total_targets == 0:
-            continue
-
-        reads = NoticeRead.objects.filter(notice=notice)
-        read_ids = set(reads.values_list('employee_id', flat=True))
-        acknowledged_ids = set(reads.filter(acknowledged=True).values_list('employee_id', flat=True))
-        target_ids = set(target_qs.values_list('id', flat=True))
-
-        unread_count += len(target_ids - read_ids)
-        if notice.requires_acknowledgement:
-            unacknowledged_count += len(target_ids - acknowledged_ids)
-
-    return {
-        'total_notices': active_notices.count(),
-        'unread_notices': unread_count,
-        'unacknowledged_notices': unacknowledged_count,
-    }
+    return Notice.objects.filter(live_notice_q()).aggregate(
+        total_notices=Count('id'),
+        unread_notices=Coalesce(Sum(F('target_count') - F('read_count')), 0),
+        unacknowledged_notices=Coalesce(
+            Sum(F('target_count') - F('ack_count'), filter=Q(requires_acknowledgement=True)),
+            0,
+        ),
+    )
+
+
+def deactivate_expired_notices(today=None):
+    today = today or timezone.localdate()
+    return Notice.objects.filter(is_active=True, expires_at__lt=today).update(is_active=False)
+
+
+def _archive_chunk(notices):
+    archived = ArchivedNotice.objects.bulk_create(
+        [
+            ArchivedNotice(
+                original_id=notice.pk,
+                title=notice.title,
+                content=notice.content,
+                notice_type=notice.notice_type,
+                requires_acknowledgement=notice.requires_acknowledgement,
+                created_by_id=notice.created_by_id,
+                created_at=notice.created_at,
+                expires_at=notice.expires_at,
+                target_count=notice.target_count,
+                read_count=notice.read_count,
+                ack_count=notice.ack_count,
+            )
+            for notice in notices
+        ]
+    )
+    archive_ids = dict(
+        ArchivedNotice.objects.filter(original_id__in=[notice.pk for notice in notices]).values_list('original_id', 'id')
+    )
+
+    reads = NoticeRead.objects.filter(notice_id__in=list(archive_ids)).values_list(
+        'notice_id', 'employee_id', 'read_at', 'acknowledged', 'acknowledged_at'
+    )
+    batch = []
+    moved_reads = 0
+    for notice_id, employee_id, read_at, acknowledged, acknowledged_at in reads.iterator(
+        chunk_size=ARCHIVE_READ_BATCH_SIZE
+    ):
+        batch.append(
+            ArchivedNoticeRead(
+                notice_id=archive_ids[notice_id],
+                employee_id=employee_id,
+                read_at=read_at,
+                acknowledged=acknowledged,
+                acknowledged_at=acknowledged_at,
+            )
+        )
+        if len(batch) >= ARCHIVE_READ_BATCH_SIZE:
+            ArchivedNoticeRead.objects.bulk_create(batch)
+            moved_reads += len(batch)
+            batch = []
+    ArchivedNoticeRead.objects.bulk_create(batch)
+    moved_reads += len(batch)
+
+    Notice.objects.filter(pk__in=list(archive_ids)).delete()
+    return len(archived), moved_reads
+
+
+def archive_notices(older_than_days=None, batch_size=ARCHIVE_BATCH_SIZE, today=None):
+    """Move inactive notices that ended before the cutoff, with their reads, into the archive tables."""
+    today = today or timezone.localdate()
+    if older_than_days is None:
+        older_than_days = settings.NOTICE_ARCHIVE_AFTER_DAYS
+    cutoff = today - timedelta(days=older_than_days)
+
+    candidates = Notice.objects.filter(is_active=False).filter(
+        Q(expires_at__lt=cutoff) | Q(expires_at__isnull=True, created_at__date__lt=cutoff)
+    )
+    totals = {'notices': 0, 'reads': 0}
+    last_id = 0
+    while True:
+        chunk = list(candidates.filter(pk__gt=last_id).order_by('pk')[:batch_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            notices, reads = _archive_chunk(chunk)
+        totals['notices'] += notices
+        totals['reads'] += reads
+        last_id = chunk[-1].pk
+    return totals
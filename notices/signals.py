@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from employees.audience import audience_changed, member_object_ids
+from employees.models import Employee
+
+from .inbox import invalidate_unread_counts
+from .models import Notice
+from .services import refresh_notice_counters
+
+COUNTER_FIELDS = ('target_count', 'read_count', 'ack_count')
+
+
+@receiver(pre_save, sender=Notice)
+def keep_current_counters(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    # Counters are owned by notices.services; never write stale in-memory copies.
+    current = Notice.objects.filter(pk=instance.pk).values_list(*COUNTER_FIELDS).first()
+    if current is not None:
+        instance.target_count, instance.read_count, instance.ack_count = current
+
+
+@receiver(audience_changed, sender=Notice)
+def refresh_changed_notice_counters(sender, object_ids, **kwargs):
+    refresh_notice_counters(object_ids)
+    invalidate_unread_counts()
+
+
+@receiver(post_save, sender=Notice)
+@receiver(post_delete, sender=Notice)
+def invalidate_inbox_counts(sender, **kwargs):
+    invalidate_unread_counts()
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_employee_notices(sender, instance, **kwargs):
+    instance._notice_ids = list(member_object_ids(Notice, instance).values_list('object_id', flat=True))
+
+
+@receiver(post_delete, sender=Employee)
+def refresh_deleted_employee_notices(sender, instance, **kwargs):
+    notice_ids = getattr(instance, '_notice_ids', None)
+    if notice_ids:
+        refresh_notice_counters(notice_ids)
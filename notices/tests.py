@@ -1,11 +1,26 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import Group, User
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from employees.models import Department, Employee, Position
+from employees import tree
+from employees.models import AudienceMembership, Department, Employee, Position
 
-from .models import Notice
-from .services import get_applicable_notices_for_employee
+from .models import ArchivedNotice, ArchivedNoticeRead, Notice, NoticeRead
+from .inbox import get_inbox_page, get_unread_notice_count
+from .read_buffer import SEQUENCE_KEY, SLOT_KEY, buffer_notice_reads, flush_notice_reads
+from .services import (
+    acknowledge_notices,
+    archive_notices,
+    deactivate_expired_notices,
+    get_applicable_notices_for_employee,
+    get_notice_metrics_for_dashboard,
+    get_target_employees_for_notice,
+    refresh_notice_counters,
+)
 
 
 class NoticeTargetingTests(TestCase):
@@ -37,6 +52,92 @@ class NoticeTargetingTests(TestCase):
         notices = get_applicable_notices_for_employee(self.employee)
         self.assertIn(notice, notices)
 
+    def test_department_notice_audience_includes_subtree_in_one_query(self):
+        notice = Notice.objects.create(
+            title='Хэлтсийн мэдэгдэл',
+            content='Текст',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.employee.user,
+        )
+        notice.departments.add(self.parent_dept)
+
+        with self.assertNumQueries(1):
+            targets = list(get_target_employees_for_notice(notice))
+        self.assertEqual(targets, [self.employee])
+
+    def test_position_and_specific_notices_do_not_duplicate(self):
+        other_position = Position.objects.create(name='Нярав')
+        position_notice = Notice.objects.create(
+            title='Албан тушаалын',
+            content='Текст',
+            notice_type=Notice.NoticeType.POSITION,
+            created_by=self.employee.user,
+        )
+        position_notice.positions.add(self.position, other_position)
+        hidden_notice = Notice.objects.create(
+            title='Бусад албан тушаал',
+            content='Текст',
+            notice_type=Notice.NoticeType.POSITION,
+            created_by=self.employee.user,
+        )
+        hidden_notice.positions.add(other_position)
+
+        notices = list(get_applicable_notices_for_employee(self.employee))
+        self.assertEqual(notices, [position_notice])
+
+    def test_membership_follows_employee_department_move(self):
+        other_dept = Department.objects.create(name='Санхүү')
+        notice = Notice.objects.create(
+            title='Хэлтсийн мэдэгдэл',
+            content='Текст',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.employee.user,
+        )
+        notice.departments.add(self.parent_dept)
+        self.assertIn(notice, get_applicable_notices_for_employee(self.employee))
+
+        self.employee.department = other_dept
+        self.employee.save()
+        self.assertNotIn(notice, get_applicable_notices_for_employee(self.employee))
+
+    def test_membership_follows_department_reparent(self):
+        notice = Notice.objects.create(
+            title='Хэлтсийн мэдэгдэл',
+            content='Текст',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.employee.user,
+        )
+        notice.departments.add(self.parent_dept)
+
+        self.child_dept.parent = None
+        self.child_dept.save()
+        self.assertEqual(list(AudienceMembership.objects.filter(object_id=notice.id)), [])
+
+        self.child_dept.parent = self.parent_dept
+        self.child_dept.save()
+        self.assertIn(notice, get_applicable_notices_for_employee(self.employee))
+
+
+    def test_membership_does_not_use_a_stale_department_tree(self):
+        notice = Notice.objects.create(
+            title='Хэлтсийн мэдэгдэл',
+            content='Текст',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.employee.user,
+        )
+        notice.departments.add(self.parent_dept)
+        self.employee.department = None
+        self.employee.save()
+        # This worker still holds a tree from before the child department was attached.
+        tree._tree = tree.DepartmentTree(
+            [(self.parent_dept.id, None, self.parent_dept.name), (self.child_dept.id, None, self.child_dept.name)],
+            version=tree.get_tree_version(),
+        )
+
+        self.employee.department = self.child_dept
+        self.employee.save()
+        self.assertIn(notice, get_applicable_notices_for_employee(self.employee))
+
 
 class NoticePermissionTests(TestCase):
     def setUp(self):
@@ -63,3 +164,319 @@ class NoticePermissionTests(TestCase):
         self.client.login(username='emp2', password='pass1234')
         response = self.client.get(reverse('my_notices'))
         self.assertEqual(response.status_code, 200)
+
+
+class NoticeCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name='Тоолуур')
+        self.employees = []
+        for index in range(3):
+            user = User.objects.create_user(username=f'counter{index}', password='pass1234')
+            self.employees.append(
+                Employee.objects.create(
+                    user=user,
+                    first_name='N',
+                    last_name=str(index),
+                    register=f'NC{index:08d}',
+                    department=self.department,
+                )
+            )
+        group, _ = Group.objects.get_or_create(name='employee')
+        self.employees[0].user.groups.add(group)
+        self.notice = Notice.objects.create(
+            title='Тоолуурын мэдэгдэл',
+            content='Текст',
+            notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+            requires_acknowledgement=True,
+            created_by=self.employees[0].user,
+        )
+
+    @override_settings(NOTICE_READ_BUFFER_ENABLED=True)
+    def test_counters_follow_reads_and_acknowledgements(self):
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.target_count, 3)
+
+        self.client.login(username='counter0', password='pass1234')
+        self.client.get(reverse('my_notices'))
+        response = self.client.get(reverse('my_notices'))
+        self.assertFalse(response.context['notice_items'][0]['is_unread'])
+        self.assertFalse(NoticeRead.objects.exists())
+
+        self.assertEqual(flush_notice_reads(), 1)
+        self.assertEqual(flush_notice_reads(), 0)
+        self.client.post(reverse('acknowledge_notice', kwargs={'notice_id': self.notice.id}))
+        self.client.post(reverse('acknowledge_notice', kwargs={'notice_id': self.notice.id}))
+
+        self.notice.refresh_from_db()
+        self.assertEqual((self.notice.read_count, self.notice.ack_count), (1, 1))
+        self.assertEqual(
+            get_notice_metrics_for_dashboard(),
+            {'total_notices': 1, 'unread_notices': 2, 'unacknowledged_notices': 2},
+        )
+
+    def test_reads_are_written_directly_without_shared_buffer(self):
+        self.client.login(username='counter0', password='pass1234')
+        self.client.get(reverse('my_notices'))
+
+        self.assertTrue(NoticeRead.objects.filter(employee=self.employees[0], notice=self.notice).exists())
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.read_count, 1)
+        self.assertEqual(flush_notice_reads(), 0)
+
+    @override_settings(NOTICE_READ_BUFFER_ENABLED=True)
+    def test_flush_keeps_read_time_and_waits_for_unwritten_slot(self):
+        employee = self.employees[1]
+        buffer_notice_reads(employee, [self.notice.pk])
+        read_at = cache.get(SLOT_KEY.format(cache.get(SEQUENCE_KEY)))[2]
+        # A concurrent writer that has taken the next sequence number but not stored its slot yet.
+        gap = cache.incr(SEQUENCE_KEY)
+        buffer_notice_reads(self.employees[2], [self.notice.pk])
+
+        self.assertEqual(flush_notice_reads(), 1)
+        self.assertEqual(NoticeRead.objects.get(employee=employee).read_at, read_at)
+        self.assertFalse(NoticeRead.objects.filter(employee=self.employees[2]).exists())
+
+        cache.set(SLOT_KEY.format(gap), (self.employees[0].pk, [self.notice.pk], timezone.now()))
+        self.assertEqual(flush_notice_reads(), 2)
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.read_count, 3)
+
+    def test_audience_change_and_repair_recount(self):
+        NoticeRead.objects.create(notice=self.notice, employee=self.employees[1], acknowledged=True)
+        Notice.objects.filter(pk=self.notice.pk).update(read_count=0, ack_count=0)
+        refresh_notice_counters([self.notice.pk])
+        self.notice.refresh_from_db()
+        self.assertEqual((self.notice.read_count, self.notice.ack_count), (1, 1))
+
+        self.employees[1].delete()
+        self.notice.refresh_from_db()
+        self.assertEqual((self.notice.target_count, self.notice.read_count), (2, 0))
+
+
+class NoticeLifecycleTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='lifecycle', password='pass1234')
+        self.employee = Employee.objects.create(
+            user=user,
+            first_name='E',
+            last_name='X',
+            register='EX00000001',
+        )
+        today = timezone.localdate()
+        self.live = Notice.objects.create(
+            title='Хүчинтэй',
+            content='Текст',
+            notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+            expires_at=today,
+            created_by=user,
+        )
+        self.expired = Notice.objects.create(
+            title='Хугацаа дууссан',
+            content='Текст',
+            notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+            expires_at=today - timedelta(days=400),
+            created_by=user,
+        )
+        NoticeRead.objects.create(notice=self.expired, employee=self.employee, acknowledged=True)
+
+    def test_expired_notices_are_not_applicable(self):
+        self.assertEqual(list(get_applicable_notices_for_employee(self.employee)), [self.live])
+
+    def test_archive_moves_expired_notice_with_reads(self):
+        self.assertEqual(deactivate_expired_notices(), 1)
+        self.assertEqual(archive_notices(older_than_days=180), {'notices': 1, 'reads': 1})
+
+        self.assertFalse(Notice.objects.filter(pk=self.expired.pk).exists())
+        self.assertEqual(NoticeRead.objects.count(), 0)
+        archived = ArchivedNotice.objects.get(original_id=self.expired.pk)
+        self.assertEqual(archived.title, 'Хугацаа дууссан')
+        self.assertTrue(ArchivedNoticeRead.objects.get(notice=archived, employee_id=self.employee.pk).acknowledged)
+        self.assertTrue(Notice.objects.filter(pk=self.live.pk).exists())
+
+
+class NoticeBulkAcknowledgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk_ack', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(group)
+        self.department = Department.objects.create(name='Засвар')
+        self.employee = Employee.objects.create(
+            user=self.user,
+            first_name='B',
+            last_name='A',
+            register='BA00000001',
+            department=self.department,
+        )
+        self.notices = [
+            Notice.objects.create(
+                title=f'Мэдэгдэл {index}',
+                content='Текст',
+                notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+                requires_acknowledgement=True,
+                created_by=self.user,
+            )
+            for index in range(3)
+        ]
+        self.foreign = Notice.objects.create(
+            title='Өөр хэлтэс',
+            content='Текст',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            requires_acknowledgement=True,
+            created_by=self.user,
+        )
+        self.foreign.departments.add(Department.objects.create(name='Өөр'))
+        NoticeRead.objects.create(notice=self.notices[0], employee=self.employee)
+        refresh_notice_counters()
+        self.client.login(username='bulk_ack', password='pass1234')
+
+    def test_json_batch_only_acknowledges_authorized_ids(self):
+        response = self.client.post(
+            reverse('acknowledge_notices'),
+            data={'notice_ids': [self.notices[0].id, self.notices[1].id, self.foreign.id]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'acknowledged': 2})
+        self.assertFalse(NoticeRead.objects.filter(notice=self.foreign).exists())
+
+        counters = dict(Notice.objects.values_list('id', 'ack_count'))
+        self.assertEqual(
+            [counters[notice.id] for notice in self.notices],
+            [1, 1, 0],
+        )
+        self.notices[0].refresh_from_db()
+        self.assertEqual(self.notices[0].read_count, 1)
+
+    @override_settings(NOTICE_READ_BUFFER_ENABLED=True)
+    def test_counters_match_recount_after_mixed_writers(self):
+        cache.clear()
+        buffer_notice_reads(self.employee, [notice.pk for notice in self.notices])
+        acknowledge_notices(self.employee, [self.notices[1].pk])
+        flush_notice_reads()
+        acknowledge_notices(self.employee)
+
+        counters = list(Notice.objects.order_by('pk').values_list('read_count', 'ack_count'))
+        refresh_notice_counters()
+        self.assertEqual(list(Notice.objects.order_by('pk').values_list('read_count', 'ack_count')), counters)
+        self.assertEqual(counters[:3], [(1, 1)] * 3)
+
+    def test_acknowledge_all_pending(self):
+        response = self.client.post(reverse('acknowledge_notices'), data={'all': '1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            NoticeRead.objects.filter(employee=self.employee, acknowledged=True, acknowledged_at__isnull=False).count(),
+            3,
+        )
+        response = self.client.post(
+            reverse('acknowledge_notices'),
+            data={'all': True},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'acknowledged': 0})
+
+    def test_single_acknowledge_rejects_foreign_notice(self):
+        response = self.client.post(reverse('acknowledge_notice', kwargs={'notice_id': self.foreign.id}))
+        self.assertEqual(response.status_code, 404)
+
+
+class NoticeInboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='inbox', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(group)
+        self.employee = Employee.objects.create(
+            user=self.user,
+            first_name='I',
+            last_name='N',
+            register='IN00000001',
+        )
+        self.notices = [
+            Notice.objects.create(
+                title=f'Inbox {index}',
+                content='Текст',
+                notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+                created_by=self.user,
+            )
+            for index in range(5)
+        ]
+        # Same timestamp for every notice so the id breaks ties.
+        Notice.objects.update(created_at=timezone.now())
+
+    def test_keyset_pages_cover_every_notice_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = get_inbox_page(self.employee, cursor=cursor, page_size=2)
+            seen.extend(notice.pk for notice in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted((notice.pk for notice in self.notices), reverse=True))
+
+    def test_unread_first_ordering(self):
+        NoticeRead.objects.create(notice=self.notices[4], employee=self.employee)
+        page, cursor = get_inbox_page(self.employee, unread_first=True, page_size=4)
+        self.assertNotIn(self.notices[4].pk, [notice.pk for notice in page])
+        page, cursor = get_inbox_page(self.employee, cursor=cursor, unread_first=True, page_size=4)
+        self.assertEqual([notice.pk for notice in page], [self.notices[4].pk])
+        self.assertIsNone(cursor)
+
+    def _page_through_unread_first(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = get_inbox_page(self.employee, cursor=cursor, unread_first=True, page_size=2)
+            seen.extend(notice.pk for notice in page)
+            # Opening a page marks what it shows as read, as the inbox view does.
+            buffer_notice_reads(self.employee, [notice.pk for notice in page])
+            flush_notice_reads()
+            if cursor is None:
+                return seen
+
+    def test_unread_first_pages_do_not_repeat_notices_read_meanwhile(self):
+        NoticeRead.objects.create(notice=self.notices[0], employee=self.employee)
+        expected = [notice.pk for notice in reversed(self.notices[1:])] + [self.notices[0].pk]
+        self.assertEqual(self._page_through_unread_first(), expected)
+
+    @override_settings(NOTICE_READ_BUFFER_ENABLED=True)
+    def test_unread_first_pages_do_not_repeat_buffered_reads(self):
+        buffer_notice_reads(self.employee, [self.notices[0].pk])
+        expected = [notice.pk for notice in reversed(self.notices[1:])] + [self.notices[0].pk]
+        self.assertEqual(self._page_through_unread_first(), expected)
+
+    def test_unread_count_is_cached_and_invalidated(self):
+        self.assertEqual(get_unread_notice_count(self.user), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_notice_count(self.user), 5)
+
+        self.client.login(username='inbox', password='pass1234')
+        self.client.get(reverse('my_notices'))
+        self.assertEqual(get_unread_notice_count(self.user), 0)
+
+        Notice.objects.create(
+            title='Шинэ',
+            content='Текст',
+            notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+            created_by=self.user,
+        )
+        self.assertEqual(get_unread_notice_count(self.user), 1)
+
+    def test_dashboard_badge_shows_own_unread_count(self):
+        manager = User.objects.create_user(username='inbox_manager', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='hse_manager')
+        manager.groups.add(group)
+        manager_employee = Employee.objects.create(
+            user=manager,
+            first_name='M',
+            last_name='N',
+            register='IN00000002',
+        )
+        for notice in self.notices[:2]:
+            NoticeRead.objects.create(notice=notice, employee=manager_employee)
+        refresh_notice_counters()
+
+        self.client.login(username='inbox_manager', password='pass1234')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['unread_notice_count'], 8)
+        self.assertEqual(response.context['inbox_unread_count'], 3)
+        self.assertContains(response, '<span class="badge text-bg-warning">3</span>', html=True)
@@ -8,5 +8,6 @@ urlpatterns = [
     path('<int:notice_id>/edit/', views.notice_update, name='notice_update'),
     path('<int:notice_id>/delete/', views.notice_delete, name='notice_delete'),
     path('my/', views.my_notices, name='my_notices'),
+    path('my/acknowledge/', views.acknowledge_notices_bulk, name='acknowledge_notices'),
     path('my/<int:notice_id>/acknowledge/', views.acknowledge_notice, name='acknowledge_notice'),
 ]
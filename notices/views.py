@@ -1,13 +1,22 @@
+import json
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from config.permissions import MANAGER_ROLES, role_required
 from employees.models import Employee
 
 from .forms import NoticeForm
+from .inbox import get_inbox_page, invalidate_unread_count
 from .models import Notice, NoticeRead
-from .services import get_applicable_notices_for_employee, get_or_create_notice_read
+from .read_buffer import buffer_notice_reads, pending_notice_ids
+from .services import (
+    acknowledge_notice_read,
+    acknowledge_notices,
+    get_acknowledgeable_notices,
+)
 
 
 @role_required(MANAGER_ROLES)
@@ -58,29 +67,45 @@ def my_notices(request):
     employee = Employee.objects.filter(user=request.user).first()
     if employee is None:
         return render(request, 'notices/my_notices.html', {'notice_items': []})
-    notices = get_applicable_notices_for_employee(employee)
-    reads = NoticeRead.objects.filter(employee=employee).select_related('notice')
+
+    unread_first = request.GET.get('view') == 'unread'
+    notices, next_cursor = get_inbox_page(employee, cursor=request.GET.get('after'), unread_first=unread_first)
+    reads = NoticeRead.objects.filter(employee=employee, notice_id__in=[notice.id for notice in notices])
     read_map = {item.notice_id: item for item in reads}
+    pending_ids = pending_notice_ids(employee)
 
     items = []
     newly_read = []
     for notice in notices:
         read_obj = read_map.get(notice.id)
-        if read_obj is None:
-            newly_read.append(NoticeRead(employee=employee, notice=notice))
+        is_unread = read_obj is None and notice.id not in pending_ids
+        if is_unread:
+            newly_read.append(notice.id)
         items.append(
             {
                 'notice': notice,
                 'read': read_obj,
-                'is_unread': read_obj is None,
+                'is_unread': is_unread,
                 'is_acknowledged': bool(read_obj and read_obj.acknowledged),
             }
         )
 
-    if newly_read:
-        NoticeRead.objects.bulk_create(newly_read, ignore_conflicts=True)
+    if buffer_notice_reads(employee, newly_read):
+        invalidate_unread_count(employee)
+    pending_ack_count = get_acknowledgeable_notices(employee).exclude(
+        pk__in=NoticeRead.objects.filter(employee=employee, acknowledged=True).values('notice_id')
+    ).count()
 
-    return render(request, 'notices/my_notices.html', {'notice_items': items})
+    return render(
+        request,
+        'notices/my_notices.html',
+        {
+            'notice_items': items,
+            'pending_ack_count': pending_ack_count,
+            'next_cursor': next_cursor,
+            'unread_first': unread_first,
+        },
+    )
 
 
 @login_required
@@ -89,12 +114,34 @@ def acknowledge_notice(request, notice_id):
         return redirect('my_notices')
 
     employee = get_object_or_404(Employee, user=request.user)
-    notice = get_object_or_404(get_applicable_notices_for_employee(employee), pk=notice_id)
+    notice = get_object_or_404(get_acknowledgeable_notices(employee), pk=notice_id)
 
-    if notice.requires_acknowledgement:
-        read_obj, _ = get_or_create_notice_read(employee, notice)
-        read_obj.acknowledged = True
-        read_obj.save()
-        messages.success(request, 'Мэдэгдэлтэй танилцсан тэмдэглэл хадгалагдлаа.')
+    acknowledge_notice_read(employee, notice)
+    invalidate_unread_count(employee)
+    messages.success(request, 'Мэдэгдэлтэй танилцсан тэмдэглэл хадгалагдлаа.')
+    return redirect('my_notices')
 
+
+@login_required
+def acknowledge_notices_bulk(request):
+    if request.method != 'POST':
+        return redirect('my_notices')
+
+    employee = get_object_or_404(Employee, user=request.user)
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+            notice_ids = None if payload.get('all') else [int(value) for value in payload.get('notice_ids', [])]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'error': 'Буруу хүсэлт.'}, status=400)
+        acknowledged = acknowledge_notices(employee, notice_ids)
+        invalidate_unread_count(employee)
+        return JsonResponse({'acknowledged': acknowledged})
+
+    notice_ids = None if request.POST.get('all') else [
+        int(value) for value in request.POST.getlist('notice_ids') if value.isdigit()
+    ]
+    acknowledged = acknowledge_notices(employee, notice_ids)
+    invalidate_unread_count(employee)
+    messages.success(request, f'{acknowledged} мэдэгдэлтэй танилцсан тэмдэглэл хадгалагдлаа.')
     return redirect('my_notices')
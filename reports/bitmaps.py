@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+
+class EmployeeIndex:
+    """Dense bit positions for employee ids, so an employee set is a single int."""
+
+    def __init__(self, employee_ids: Iterable[int]):
+        self._ids = sorted(set(employee_ids))
+        self._positions = {employee_id: position for position, employee_id in enumerate(self._ids)}
+        self._size = (len(self._ids) + 7) // 8
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def builder(self) -> BitmapBuilder:
+        return BitmapBuilder(self)
+
+    def bitmap(self, employee_ids: Iterable[int]) -> int:
+        builder = self.builder()
+        for employee_id in employee_ids:
+            builder.add(employee_id)
+        return builder.value()
+
+    def positions(self, bitmap: int) -> Iterator[tuple[int, int]]:
+        """Yield ``(position, employee_id)`` pairs of a bitmap in ascending id order."""
+        data = bitmap.to_bytes(self._size, 'little')
+        for byte_index, byte in enumerate(data):
+            offset = byte_index * 8
+            while byte:
+                low = byte & -byte
+                position = offset + low.bit_length() - 1
+                yield position, self._ids[position]
+                byte ^= low
+
+    def ids(self, bitmap: int) -> Iterator[int]:
+        for _, employee_id in self.positions(bitmap):
+            yield employee_id
+
+    def view(self, bitmap: int) -> BitmapView:
+        return BitmapView(bitmap.to_bytes(self._size, 'little'))
+
+
+class BitmapView:
+    """Constant-time membership tests by bit position."""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def __contains__(self, position: int) -> bool:
+        return bool(self._data[position >> 3] >> (position & 7) & 1)
+
+
+class BitmapBuilder:
+    def __init__(self, index: EmployeeIndex):
+        self._positions = index._positions
+        self._data = bytearray(index._size)
+
+    def add(self, employee_id: int) -> None:
+        position = self._positions.get(employee_id)
+        if position is not None:
+            self._data[position >> 3] |= 1 << (position & 7)
+
+    def value(self) -> int:
+        return int.from_bytes(self._data, 'little')
+
+
+def popcount(bitmap: int) -> int:
+    return bitmap.bit_count()
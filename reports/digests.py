@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from employees.audience import get_audience_fields
+from employees.models import AudienceMembership, Employee
+from employees.tree import get_department_tree
+from instructions.models import InstructionRecord
+from instructions.services import DUE_SOON_DAYS
+from notices.models import Notice, NoticeRead
+from notices.services import live_notice_q
+from trainings.models import Training, TrainingParticipation
+
+from .models import SentDigest
+
+SEND_BATCH_SIZE = 100
+
+
+@dataclass
+class EmployeeDigest:
+    employee_id: int
+    name: str
+    email: str
+    department_id: int | None
+    overdue_instructions: list[tuple[str, date]] = field(default_factory=list)
+    due_soon_instructions: list[tuple[str, date]] = field(default_factory=list)
+    unacknowledged_notices: list[str] = field(default_factory=list)
+    incomplete_trainings: list[tuple[str, date]] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(
+            self.overdue_instructions
+            or self.due_soon_instructions
+            or self.unacknowledged_notices
+            or self.incomplete_trainings
+        )
+
+
+@dataclass
+class HeadDigest:
+    employee_id: int
+    name: str
+    email: str
+    department_id: int
+    employees: list[EmployeeDigest] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.employees)
+
+
+@dataclass
+class SafetyDigests:
+    employees: list[EmployeeDigest]
+    heads: list[HeadDigest]
+
+
+def _instruction_items(today):
+    due_soon_limit = today + timedelta(days=DUE_SOON_DAYS)
+    return (
+        InstructionRecord.objects.filter(next_due_date__lte=due_soon_limit)
+        .order_by('next_due_date')
+        .values_list('employee_id', 'instruction__title', 'next_due_date')
+    )
+
+
+def _notice_items(today):
+    notices = dict(
+        Notice.objects.filter(live_notice_q(today), requires_acknowledgement=True).values_list('pk', 'title')
+    )
+    if not notices:
+        return []
+    acknowledged = NoticeRead.objects.filter(
+        employee_id=OuterRef('employee_id'),
+        notice_id=OuterRef('object_id'),
+        acknowledged=True,
+    )
+    pending = (
+        AudienceMembership.objects.filter(
+            object_type=get_audience_fields(Notice).object_type,
+            object_id__in=list(notices),
+        )
+        .exclude(Exists(acknowledged))
+        .values_list('employee_id', 'object_id')
+    )
+    return [(employee_id, notices[notice_id]) for employee_id, notice_id in pending.iterator()]
+
+
+def _training_items():
+    trainings = {
+        training_id: (title, end_date)
+        for training_id, title, end_date in Training.objects.filter(required=True, is_active=True).values_list(
+            'pk', 'title', 'end_date'
+        )
+    }
+    if not trainings:
+        return []
+
+    completed = TrainingParticipation.objects.filter(status=TrainingParticipation.Status.COMPLETED)
+    # Lazily assigned trainings only have participation rows once work has started,
+    # so membership is the source of truth for who still has to complete them.
+    members = (
+        AudienceMembership.objects.filter(
+            object_type=get_audience_fields(Training).object_type,
+            object_id__in=list(trainings),
+        )
+        .exclude(
+            Exists(completed.filter(employee_id=OuterRef('employee_id'), training_id=OuterRef('object_id')))
+        )
+        .values_list('employee_id', 'object_id')
+    )
+    unfinished = (
+        TrainingParticipation.objects.filter(training_id__in=list(trainings))
+        .exclude(status=TrainingParticipation.Status.COMPLETED)
+        .values_list('employee_id', 'training_id')
+    )
+    pairs = set(members.iterator()) | set(unfinished.iterator())
+    return sorted(
+        ((employee_id,) + trainings[training_id] for employee_id, training_id in pairs),
+        key=lambda item: item[2],
+    )
+
+
+def build_safety_digests(today=None):
+    """Digest per employee and per department head, built from a fixed number of queries."""
+    today = today or timezone.localdate()
+    employees = {}
+    heads_by_department = {}
+    rows = Employee.objects.annotate(
+        contact_email=Coalesce(NullIf('email', Value('')), 'user__email'),
+    ).values_list('pk', 'last_name', 'first_name', 'department_id', 'is_head', 'contact_email')
+    for employee_id, last_name, first_name, department_id, is_head, email in rows.iterator():
+        name = f'{last_name} {first_name}'
+        employees[employee_id] = EmployeeDigest(employee_id, name, email or '', department_id)
+        if is_head and department_id is not None:
+            heads_by_department.setdefault(department_id, []).append(
+                HeadDigest(employee_id, name, email or '', department_id)
+            )
+
+    for employee_id, title, due_date in _instruction_items(today).iterator():
+        digest = employees[employee_id]
+        if due_date < today:
+            digest.overdue_instructions.append((title, due_date))
+        else:
+            digest.due_soon_instructions.append((title, due_date))
+    for employee_id, title in _notice_items(today):
+        employees[employee_id].unacknowledged_notices.append(title)
+    for employee_id, title, end_date in _training_items():
+        employees[employee_id].incomplete_trainings.append((title, end_date))
+
+    pending = [digest for digest in employees.values() if digest]
+    tree = get_department_tree()
+    for digest in pending:
+        if digest.department_id is None:
+            continue
+        for department_id in tree.ancestors(digest.department_id):
+            for head in heads_by_department.get(department_id, ()):
+                if head.employee_id != digest.employee_id:
+                    head.employees.append(digest)
+
+    heads = [head for department_heads in heads_by_department.values() for head in department_heads if head]
+    return SafetyDigests(employees=pending, heads=heads)
+
+
+def _message(kind, recipient, template_name, context, subject):
+    body = render_to_string(template_name, context)
+    message = EmailMessage(subject=subject, body=body, to=[recipient])
+    return (kind, recipient), hashlib.sha256(body.encode()).hexdigest(), message
+
+
+def send_safety_digests(today=None, force=False, dry_run=False, batch_size=SEND_BATCH_SIZE):
+    """Email every digest through the configured backend.
+
+    A digest identical to the one last sent to the same address within
+    ``SAFETY_DIGEST_RESEND_AFTER_HOURS`` is skipped, so an hourly schedule only
+    mails people whose outstanding items changed. What was sent is kept in
+    ``SentDigest`` so separate runs see each other.
+    """
+    today = today or timezone.localdate()
+    digests = build_safety_digests(today)
+    messages = [
+        _message(
+            'employee',
+            digest.email,
+            'reports/email/employee_digest.txt',
+            {'digest': digest, 'today': today},
+            'ХАБ: хугацаа дуусах зааварчилгаа, мэдэгдэл, сургалт',
+        )
+        for digest in digests.employees
+        if digest.email
+    ]
+    messages += [
+        _message(
+            'head',
+            head.email,
+            'reports/email/head_digest.txt',
+            {'head': head, 'today': today},
+            'ХАБ: хэлтсийн хугацаа хэтэрсэн ажлууд',
+        )
+        for head in digests.heads
+        if head.email
+    ]
+
+    sent_fingerprints = {}
+    if not force:
+        resend_after = timezone.now() - timedelta(hours=settings.SAFETY_DIGEST_RESEND_AFTER_HOURS)
+        sent_fingerprints = {
+            (kind, recipient): fingerprint
+            for kind, recipient, fingerprint in SentDigest.objects.filter(sent_at__gte=resend_after).values_list(
+                'kind', 'recipient', 'fingerprint'
+            )
+        }
+    to_send = [
+        (key, fingerprint, message)
+        for key, fingerprint, message in messages
+        if sent_fingerprints.get(key) != fingerprint
+    ]
+
+    sent = 0
+    if not dry_run and to_send:
+        with get_connection() as connection:
+            for start in range(0, len(to_send), batch_size):
+                batch = [message for _, _, message in to_send[start : start + batch_size]]
+                sent += connection.send_messages(batch) or 0
+        sent_at = timezone.now()
+        SentDigest.objects.bulk_create(
+            [
+                SentDigest(kind=kind, recipient=recipient, fingerprint=fingerprint, sent_at=sent_at)
+                for (kind, recipient), fingerprint, _ in to_send
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['kind', 'recipient'],
+            update_fields=['fingerprint', 'sent_at'],
+        )
+
+    return {
+        'employees': len(digests.employees),
+        'heads': len(digests.heads),
+        'messages': len(messages),
+        'pending': len(to_send),
+        'sent': sent,
+        'skipped': len(messages) - len(to_send),
+    }
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from reports.digests import SEND_BATCH_SIZE, send_safety_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Ажилтан болон хэлтсийн даргад хугацаа дууссан/дуусах зааварчилгаа, танилцаагүй мэдэгдэл, '
+        'дуусаагүй сургалтын товчоог имэйлээр илгээнэ.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Илгээхгүйгээр тоог харуулах.')
+        parser.add_argument('--force', action='store_true', help='Өөрчлөгдөөгүй товчоог ч дахин илгээх.')
+        parser.add_argument('--batch-size', type=int, default=SEND_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        totals = send_safety_digests(
+            force=options['force'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f"Ажилтан: {totals['employees']}, хэлтсийн дарга: {totals['heads']}, "
+            f"товчоо: {totals['messages']}, өөрчлөгдөөгүй: {totals['skipped']}"
+        )
+        if options['dry_run']:
+            self.stdout.write(f"Илгээх байсан: {totals['pending']}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Илгээсэн: {totals['sent']}"))
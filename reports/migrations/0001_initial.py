@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('sent_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Илгээсэн товчоо',
+                'verbose_name_plural': 'Илгээсэн товчоонууд',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'recipient'), name='unique_sent_digest')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class SentDigest(models.Model):
+    """Fingerprint of the last safety digest mailed to an address, so unchanged ones are not resent."""
+
+    kind = models.CharField(max_length=16)
+    recipient = models.EmailField()
+    fingerprint = models.CharField(max_length=64)
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Илгээсэн товчоо'
+        verbose_name_plural = 'Илгээсэн товчоонууд'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'recipient'], name='unique_sent_digest'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}: {self.recipient}'
@@ -4,15 +4,19 @@ from dataclasses import dataclass
 from datetime import date, timedelta
 from typing import Any
 
-from django.db.models import Avg, Count, Prefetch, Q
+from django.db.models import Avg, Count, Exists, OuterRef, Q
 from django.utils import timezone
 
-from employees.models import Department, Employee, Position
+from employees.models import AudienceMembership, Department, Employee, Position
+from employees.audience import get_audience_fields
+from employees.tree import get_department_tree
 from exams.models import Exam, ExamAttempt
 from instructions.models import InstructionRecord
 from notices.models import Notice, NoticeRead
 from trainings.models import Training, TrainingParticipation
 
+from .bitmaps import BitmapBuilder, EmployeeIndex, popcount
+
 
 @dataclass(frozen=True)
 class ReportFilters:
@@ -28,26 +32,8 @@ class ReportScope:
     allowed_department_ids: frozenset[int] = frozenset()
 
 
-def _collect_descendants_map() -> dict[int, set[int]]:
-    children_map: dict[int | None, list[int]] = {}
-    for item in Department.objects.only('id', 'parent_id'):
-        children_map.setdefault(item.parent_id, []).append(item.id)
-
-    descendants_map: dict[int, set[int]] = {}
-    for item in Department.objects.only('id'):
-        descendants: set[int] = set()
-        stack = [item.id]
-        while stack:
-            current = stack.pop()
-            descendants.add(current)
-            stack.extend(children_map.get(current, []))
-        descendants_map[item.id] = descendants
-    return descendants_map
-
-
 def get_department_and_children_ids(department_id: int) -> set[int]:
-    descendants_map = _collect_descendants_map()
-    return descendants_map.get(department_id, {department_id})
+    return set(get_department_tree().descendants(department_id)) or {department_id}
 
 
 def _base_employee_queryset(filters: ReportFilters, scope: ReportScope):
@@ -85,56 +71,49 @@ def _round_percent(numerator: int, denominator: int) -> float:
     return round((numerator * 100.0) / denominator, 2)
 
 
-def _build_employee_index(employees: list[Employee]) -> tuple[set[int], dict[int, dict[str, Any]], dict[int, set[int]], dict[int, set[int]]]:
-    employee_ids = {item.id for item in employees}
-    employee_map: dict[int, dict[str, Any]] = {}
-    department_employee_ids: dict[int, set[int]] = {}
-    position_employee_ids: dict[int, set[int]] = {}
-
-    for item in employees:
-        employee_map[item.id] = {
+def _build_employee_map(employees: list[Employee]) -> dict[int, dict[str, Any]]:
+    return {
+        item.id: {
             'id': item.id,
             'name': f'{item.last_name} {item.first_name}',
             'department': item.department.name if item.department else '-',
             'position': item.position.name if item.position else '-',
         }
-        if item.department_id:
-            department_employee_ids.setdefault(item.department_id, set()).add(item.id)
-        if item.position_id:
-            position_employee_ids.setdefault(item.position_id, set()).add(item.id)
-
-    return employee_ids, employee_map, department_employee_ids, position_employee_ids
+        for item in employees
+    }
 
 
-def _target_employee_ids_for_notice(
-    notice: Notice,
-    base_employee_ids: set[int],
-    descendants_map: dict[int, set[int]],
-    department_employee_ids: dict[int, set[int]],
-    position_employee_ids: dict[int, set[int]],
-) -> set[int]:
-    if notice.notice_type == Notice.NoticeType.ORGANIZATION_WIDE:
-        return set(base_employee_ids)
+def _target_bitmaps_by_notice(notice_ids, base_queryset, index: EmployeeIndex) -> dict[int, int]:
+    memberships = AudienceMembership.objects.filter(
+        object_type=get_audience_fields(Notice).object_type,
+        object_id__in=notice_ids,
+        employee_id__in=base_queryset.values('id'),
+    ).values_list('object_id', 'employee_id')
 
-    if notice.notice_type == Notice.NoticeType.DEPARTMENT:
-        target_ids: set[int] = set()
-        for department in notice.departments.all():
-            dept_id = department.id
-            for desc_id in descendants_map.get(dept_id, {dept_id}):
-                target_ids |= department_employee_ids.get(desc_id, set())
-        return target_ids & base_employee_ids
+    builders: dict[int, BitmapBuilder] = {}
+    for notice_id, employee_id in memberships.iterator(chunk_size=5000):
+        builder = builders.get(notice_id)
+        if builder is None:
+            builder = builders[notice_id] = index.builder()
+        builder.add(employee_id)
+    return {notice_id: builder.value() for notice_id, builder in builders.items()}
 
-    if notice.notice_type == Notice.NoticeType.POSITION:
-        target_ids: set[int] = set()
-        for position in notice.positions.all():
-            target_ids |= position_employee_ids.get(position.id, set())
-        return target_ids & base_employee_ids
 
-    if notice.notice_type == Notice.NoticeType.SPECIFIC_EMPLOYEE:
-        selected = {employee.id for employee in notice.employees.all()}
-        return selected & base_employee_ids
+def _read_bitmaps_by_notice(notice_ids, base_queryset, index: EmployeeIndex) -> dict[int, tuple[int, int]]:
+    reads = NoticeRead.objects.filter(
+        notice_id__in=notice_ids,
+        employee_id__in=base_queryset.values('id'),
+    ).values_list('notice_id', 'employee_id', 'acknowledged')
 
-    return set()
+    builders: dict[int, tuple[BitmapBuilder, BitmapBuilder]] = {}
+    for notice_id, employee_id, acknowledged in reads.iterator(chunk_size=5000):
+        pair = builders.get(notice_id)
+        if pair is None:
+            pair = builders[notice_id] = (index.builder(), index.builder())
+        pair[0].add(employee_id)
+        if acknowledged:
+            pair[1].add(employee_id)
+    return {notice_id: (read.value(), acknowledged.value()) for notice_id, (read, acknowledged) in builders.items()}
 
 
 def get_notice_report_data(
@@ -145,16 +124,16 @@ def get_notice_report_data(
     today = timezone.localdate()
     due_limit = today + timedelta(days=30)
 
-    employees = base_employees if base_employees is not None else list(_base_employee_queryset(filters, scope))
-    base_employee_ids, employee_map, department_employee_ids, position_employee_ids = _build_employee_index(employees)
-    descendants_map = _collect_descendants_map()
+    base_queryset = _base_employee_queryset(filters, scope)
+    employees = base_employees if base_employees is not None else list(base_queryset)
+    employee_map = _build_employee_map(employees)
 
-    notices = (
-        Notice.objects.filter(is_active=True)
-        .prefetch_related('departments', 'positions', 'employees', Prefetch('reads', queryset=NoticeRead.objects.all()))
-        .order_by('-created_at')
-    )
+    notices = Notice.objects.filter(is_active=True).order_by('-created_at')
     notices = _within_date_range(notices, 'created_at', filters)
+    notice_ids = notices.values('id')
+    index = EmployeeIndex(employee_map)
+    targets_by_notice = _target_bitmaps_by_notice(notice_ids, base_queryset, index)
+    reads_by_notice = _read_bitmaps_by_notice(notice_ids, base_queryset, index)
 
     total_targets = 0
     total_read = 0
@@ -163,25 +142,19 @@ def get_notice_report_data(
     rows = []
 
     for notice in notices:
-        target_ids = _target_employee_ids_for_notice(
-            notice,
-            base_employee_ids,
-            descendants_map,
-            department_employee_ids,
-            position_employee_ids,
-        )
-        if not target_ids:
+        targets = targets_by_notice.get(notice.id, 0)
+        if not targets:
             continue
 
-        read_objects = [item for item in notice.reads.all() if item.employee_id in target_ids]
-        read_ids = {item.employee_id for item in read_objects}
-        acknowledged_ids = {item.employee_id for item in read_objects if item.acknowledged}
+        read_bitmap, acknowledged_bitmap = reads_by_notice.get(notice.id, (0, 0))
+        read_bitmap &= targets
+        acknowledged_bitmap &= targets
 
-        target_count = len(target_ids)
-        read_count = len(read_ids)
+        target_count = popcount(targets)
+        read_count = popcount(read_bitmap)
         unread_count = max(target_count - read_count, 0)
         if notice.requires_acknowledgement:
-            unack_count = max(target_count - len(acknowledged_ids), 0)
+            unack_count = max(target_count - popcount(acknowledged_bitmap), 0)
         else:
             unack_count = 0
 
@@ -190,18 +163,16 @@ def get_notice_report_data(
         total_unread += unread_count
         total_unacknowledged += unack_count
 
-        drilldown = []
-        for employee_id in sorted(target_ids):
-            profile = employee_map.get(employee_id)
-            if not profile:
-                continue
-            drilldown.append(
-                {
-                    **profile,
-                    'is_read': employee_id in read_ids,
-                    'is_acknowledged': employee_id in acknowledged_ids,
-                }
-            )
+        read_view = index.view(read_bitmap)
+        acknowledged_view = index.view(acknowledged_bitmap)
+        drilldown = [
+            {
+                **employee_map[employee_id],
+                'is_read': position in read_view,
+                'is_acknowledged': position in acknowledged_view,
+            }
+            for position, employee_id in index.positions(targets)
+        ]
 
         rows.append(
             {
@@ -305,31 +276,52 @@ def get_training_report_data(
     if filters.end_date:
         trainings = trainings.filter(start_date__lte=filters.end_date)
 
-    training_ids = list(trainings.values_list('id', flat=True))
+    trainings = list(trainings)
+    training_ids = [training.id for training in trainings]
     participations = TrainingParticipation.objects.filter(
         training_id__in=training_ids,
         employee_id__in=employee_ids,
     )
-
-    overall_total = participations.count()
-    overall_completed = participations.filter(status=TrainingParticipation.Status.COMPLETED).count()
-    overall_incomplete = overall_total - overall_completed
-    required_incomplete = participations.filter(training__required=True).exclude(
-        status=TrainingParticipation.Status.COMPLETED
-    ).count()
-
     grouped = participations.values('training_id').annotate(
         total=Count('id'),
         completed=Count('id', filter=Q(status=TrainingParticipation.Status.COMPLETED)),
     )
     grouped_map = {item['training_id']: item for item in grouped}
 
+    # Lazy trainings only store rows for employees who changed status; the rest
+    # of the audience is implicitly assigned.
+    implicit_map = dict(
+        AudienceMembership.objects.filter(
+            object_type=get_audience_fields(Training).object_type,
+            object_id__in=[training.id for training in trainings if training.lazy_assignment],
+            employee_id__in=employee_ids,
+        )
+        .exclude(
+            Exists(
+                TrainingParticipation.objects.filter(
+                    training_id=OuterRef('object_id'),
+                    employee_id=OuterRef('employee_id'),
+                )
+            )
+        )
+        .values('object_id')
+        .annotate(total=Count('id'))
+        .values_list('object_id', 'total')
+    )
+
+    overall_total = 0
+    overall_completed = 0
+    required_incomplete = 0
     rows = []
     for training in trainings:
         stats = grouped_map.get(training.id, {'total': 0, 'completed': 0})
-        total = stats['total']
+        total = stats['total'] + implicit_map.get(training.id, 0)
         completed = stats['completed']
         incomplete = max(total - completed, 0)
+        overall_total += total
+        overall_completed += completed
+        if training.required:
+            required_incomplete += incomplete
         rows.append(
             {
                 'title': training.title,
@@ -338,10 +330,11 @@ def get_training_report_data(
                 'incomplete_percent': _round_percent(incomplete, total),
             }
         )
+    overall_incomplete = overall_total - overall_completed
 
     return {
         'metrics': {
-            'total_trainings': trainings.count(),
+            'total_trainings': len(trainings),
             'completed_count': overall_completed,
             'incomplete_count': overall_incomplete,
             'required_incomplete_count': required_incomplete,
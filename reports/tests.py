@@ -0,0 +1,328 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from employees.audience import member_employees
+from employees.models import Department, Employee, Position
+from instructions.models import Instruction, InstructionRecord
+from notices.models import Notice, NoticeRead
+from trainings.models import Training, TrainingParticipation
+from trainings.services import sync_training_participations
+
+from .bitmaps import EmployeeIndex, popcount
+from .digests import build_safety_digests, send_safety_digests
+from .models import SentDigest
+from .services import ReportFilters, ReportScope, get_notice_report_data, get_training_report_data
+
+
+class EmployeeIndexTests(TestCase):
+    def test_bitmaps_round_trip_sparse_ids(self):
+        index = EmployeeIndex([5000, 3, 17, 900, 17])
+        bitmap = index.bitmap([900, 3, 42])
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(popcount(bitmap), 2)
+        self.assertEqual(list(index.ids(bitmap)), [3, 900])
+        self.assertEqual(list(index.positions(bitmap)), [(0, 3), (2, 900)])
+        view = index.view(bitmap)
+        self.assertEqual([position in view for position in range(4)], [True, False, True, False])
+
+    def test_bitmaps_span_several_bytes(self):
+        index = EmployeeIndex(range(1, 21))
+        evens = index.bitmap(range(2, 21, 2))
+        odds = index.bitmap(range(1, 21, 2))
+
+        self.assertEqual(list(index.ids(evens | odds)), list(range(1, 21)))
+        self.assertEqual(evens & odds, 0)
+        self.assertEqual(list(index.ids(0)), [])
+        self.assertEqual(list(EmployeeIndex([]).ids(0)), [])
+
+
+class ReportServiceTests(TestCase):
+    def setUp(self):
+        self.root = Department.objects.create(name='Үйлдвэр')
+        self.child = Department.objects.create(name='Цех', parent=self.root)
+        self.other = Department.objects.create(name='Санхүү')
+        self.welder = Position.objects.create(name='Гагнуурчин')
+        self.accountant = Position.objects.create(name='Нягтлан')
+        self.employees = [
+            self._employee('root_welder', self.root, self.welder),
+            self._employee('child_welder', self.child, self.welder),
+            self._employee('child_worker', self.child, None),
+            self._employee('other_accountant', self.other, self.accountant),
+            self._employee('other_welder', self.other, self.welder),
+        ]
+        self.creator = self.employees[0].user
+
+        self.org_notice = self._notice(
+            'Бүх ажилтан', Notice.NoticeType.ORGANIZATION_WIDE, requires_acknowledgement=True
+        )
+        self.department_notice = self._notice('Үйлдвэрийн', Notice.NoticeType.DEPARTMENT)
+        self.department_notice.departments.add(self.root)
+        self.position_notice = self._notice(
+            'Гагнуурчдын', Notice.NoticeType.POSITION, requires_acknowledgement=True
+        )
+        self.position_notice.positions.add(self.welder)
+
+        root_welder, child_welder, child_worker, other_accountant, other_welder = self.employees
+        NoticeRead.objects.create(notice=self.org_notice, employee=root_welder, acknowledged=True)
+        NoticeRead.objects.create(notice=self.org_notice, employee=other_accountant)
+        NoticeRead.objects.create(notice=self.department_notice, employee=child_worker)
+        # Outside the department audience: must not count as a read.
+        NoticeRead.objects.create(notice=self.department_notice, employee=other_welder)
+        NoticeRead.objects.create(notice=self.position_notice, employee=child_welder, acknowledged=True)
+        NoticeRead.objects.create(notice=self.position_notice, employee=other_welder)
+
+    def _employee(self, username, department, position):
+        return Employee.objects.create(
+            user=User.objects.create_user(username=username),
+            first_name=username,
+            last_name='R',
+            register=f'РП{Employee.objects.count():08d}',
+            department=department,
+            position=position,
+        )
+
+    def _notice(self, title, notice_type, requires_acknowledgement=False):
+        return Notice.objects.create(
+            title=title,
+            content='Текст',
+            notice_type=notice_type,
+            requires_acknowledgement=requires_acknowledgement,
+            created_by=self.creator,
+        )
+
+    def _orm_counts(self, notice, employees):
+        targets = member_employees(notice, employees)
+        reads = NoticeRead.objects.filter(notice=notice, employee__in=targets)
+        return targets.count(), reads.count(), reads.filter(acknowledged=True).count()
+
+    def test_notice_counts_match_orm_for_each_audience_type(self):
+        data = get_notice_report_data(ReportFilters(None, None, None, None), ReportScope())
+        rows = {row['id']: row for row in data['rows']}
+
+        expected = {}
+        for notice in (self.org_notice, self.department_notice, self.position_notice):
+            target_count, read_count, _ = self._orm_counts(notice, Employee.objects.all())
+            expected[notice.id] = (target_count, read_count, target_count - read_count)
+        actual = {
+            notice_id: (row['total_employees'], row['read_count'], row['unread_count'])
+            for notice_id, row in rows.items()
+        }
+        self.assertEqual(actual, expected)
+        self.assertEqual(expected[self.org_notice.id], (5, 2, 3))
+        self.assertEqual(expected[self.department_notice.id], (3, 1, 2))
+        self.assertEqual(expected[self.position_notice.id], (3, 2, 1))
+
+        # Unacknowledged: org-wide 5 - 1 and position 3 - 1; the department notice needs no acknowledgement.
+        self.assertEqual(data['chart']['values'], [5, 6, 6])
+
+    def test_notice_drilldown_and_department_filter(self):
+        filters = ReportFilters(None, None, self.root.id, None)
+        data = get_notice_report_data(filters, ReportScope())
+        rows = {row['id']: row for row in data['rows']}
+        in_subtree = Employee.objects.filter(department__in=[self.root, self.child])
+
+        for notice in (self.org_notice, self.department_notice, self.position_notice):
+            row = rows[notice.id]
+            self.assertEqual(
+                (row['total_employees'], row['read_count']),
+                self._orm_counts(notice, in_subtree)[:2],
+            )
+            targets = member_employees(notice, in_subtree)
+            reads = {
+                employee_id: acknowledged
+                for employee_id, acknowledged in NoticeRead.objects.filter(notice=notice).values_list(
+                    'employee_id', 'acknowledged'
+                )
+            }
+            self.assertEqual(
+                [(item['id'], item['is_read'], item['is_acknowledged']) for item in row['drilldown']],
+                [
+                    (employee_id, employee_id in reads, reads.get(employee_id, False))
+                    for employee_id in sorted(targets.values_list('id', flat=True))
+                ],
+            )
+        self.assertEqual(rows[self.position_notice.id]['drilldown'][1]['name'], 'R child_welder')
+
+    def test_training_counts_match_orm_and_include_lazy_audience(self):
+        _, child_welder, _, other_accountant, _ = self.employees
+        assigned = Training.objects.create(
+            title='Гагнуурын аюулгүй ажиллагаа',
+            training_type=Training.TrainingType.POSITION,
+            start_date=timezone.localdate(),
+            end_date=timezone.localdate() + timedelta(days=5),
+            trainer_name='Багш',
+            required=True,
+            created_by=self.creator,
+        )
+        assigned.positions.add(self.welder)
+        sync_training_participations(assigned)
+        TrainingParticipation.objects.filter(training=assigned, employee=child_welder).update(
+            status=TrainingParticipation.Status.COMPLETED
+        )
+        lazy = Training.objects.create(
+            title='Галын сургалт',
+            training_type=Training.TrainingType.ORGANIZATION_WIDE,
+            start_date=timezone.localdate(),
+            end_date=timezone.localdate() + timedelta(days=5),
+            trainer_name='Багш',
+            lazy_assignment=True,
+            created_by=self.creator,
+        )
+        TrainingParticipation.objects.create(
+            training=lazy, employee=other_accountant, status=TrainingParticipation.Status.COMPLETED
+        )
+
+        data = get_training_report_data(ReportFilters(None, None, None, None), ReportScope())
+        rows = {row['title']: row for row in data['rows']}
+
+        self.assertEqual(
+            rows[assigned.title]['total_target'], TrainingParticipation.objects.filter(training=assigned).count()
+        )
+        self.assertEqual(rows[assigned.title]['total_target'], 3)
+        self.assertEqual(rows[lazy.title]['total_target'], member_employees(lazy).count())
+        self.assertEqual(rows[lazy.title]['completed_percent'], 20.0)
+        self.assertEqual(
+            data['metrics'],
+            {
+                'total_trainings': 2,
+                'completed_count': 2,
+                'incomplete_count': 6,
+                'required_incomplete_count': 2,
+            },
+        )
+
+
+class SafetyDigestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # The management command always works from the current date.
+        self.today = today = timezone.localdate()
+        self.root = Department.objects.create(name='Үйлдвэр')
+        self.child = Department.objects.create(name='Цех', parent=self.root)
+        self.head = self._employee('head', self.root, is_head=True)
+        self.worker = self._employee('worker', self.child)
+        self.clerk = self._employee('clerk', self.root)
+
+        instruction = Instruction.objects.create(title='Цахилгаан', description='Заавар', validity_days=30)
+        InstructionRecord.objects.create(
+            employee=self.worker, instruction=instruction, completed_date=today - timedelta(days=40)
+        )
+        InstructionRecord.objects.create(
+            employee=self.clerk, instruction=instruction, completed_date=today - timedelta(days=20)
+        )
+        InstructionRecord.objects.create(
+            employee=self.head, instruction=instruction, completed_date=today - timedelta(days=20)
+        )
+        InstructionRecord.objects.filter(employee=self.head).update(next_due_date=today + timedelta(days=90))
+
+        self.notice = Notice.objects.create(
+            title='Дуулга',
+            content='Текст',
+            notice_type=Notice.NoticeType.ORGANIZATION_WIDE,
+            requires_acknowledgement=True,
+            created_by=self.head.user,
+        )
+        NoticeRead.objects.create(notice=self.notice, employee=self.clerk, acknowledged=True)
+        NoticeRead.objects.create(notice=self.notice, employee=self.head, acknowledged=True)
+
+        self.training = Training.objects.create(
+            title='Галын сургалт',
+            training_type=Training.TrainingType.ORGANIZATION_WIDE,
+            start_date=today,
+            end_date=today + timedelta(days=10),
+            trainer_name='Багш',
+            required=True,
+            lazy_assignment=True,
+            created_by=self.head.user,
+        )
+        TrainingParticipation.objects.create(
+            employee=self.clerk, training=self.training, status=TrainingParticipation.Status.COMPLETED
+        )
+        TrainingParticipation.objects.create(
+            employee=self.head, training=self.training, status=TrainingParticipation.Status.COMPLETED
+        )
+
+    def _employee(self, username, department, is_head=False):
+        return Employee.objects.create(
+            user=User.objects.create_user(username=username, email=f'{username}@example.mn'),
+            first_name=username,
+            last_name='T',
+            register=f'УБ{Employee.objects.count():08d}',
+            department=department,
+            is_head=is_head,
+        )
+
+    def test_items_are_routed_to_employees_and_heads(self):
+        digests = build_safety_digests(self.today)
+        by_id = {digest.employee_id: digest for digest in digests.employees}
+
+        worker = by_id[self.worker.pk]
+        self.assertEqual([title for title, _ in worker.overdue_instructions], ['Цахилгаан'])
+        self.assertEqual(worker.due_soon_instructions, [])
+        self.assertEqual(worker.unacknowledged_notices, ['Дуулга'])
+        self.assertEqual(worker.incomplete_trainings, [('Галын сургалт', self.today + timedelta(days=10))])
+
+        clerk = by_id[self.clerk.pk]
+        self.assertEqual(clerk.overdue_instructions, [])
+        self.assertEqual([title for title, _ in clerk.due_soon_instructions], ['Цахилгаан'])
+        self.assertEqual((clerk.unacknowledged_notices, clerk.incomplete_trainings), ([], []))
+        self.assertNotIn(self.head.pk, by_id)
+
+        [head] = digests.heads
+        self.assertEqual(head.employee_id, self.head.pk)
+        self.assertCountEqual([digest.employee_id for digest in head.employees], [self.worker.pk, self.clerk.pk])
+
+    def test_query_count_does_not_grow_with_employees(self):
+        build_safety_digests(self.today)  # loads the cached department tree
+        # The seven digest queries plus the department tree's version stamp.
+        with self.assertNumQueries(8):
+            build_safety_digests(self.today)
+
+        for index in range(20):
+            self._employee(f'extra{index}', self.child)
+        with self.assertNumQueries(8):
+            digests = build_safety_digests(self.today)
+        self.assertEqual(len(digests.heads[0].employees), 22)
+
+    def test_unchanged_digests_are_not_resent(self):
+        totals = send_safety_digests(self.today)
+        self.assertEqual((totals['messages'], totals['sent'], totals['skipped']), (3, 3, 0))
+        self.assertCountEqual(
+            [message.to[0] for message in mail.outbox],
+            ['worker@example.mn', 'clerk@example.mn', 'head@example.mn'],
+        )
+        self.assertIn('Цахилгаан', next(m.body for m in mail.outbox if m.to == ['worker@example.mn']))
+
+        # A later run is a separate process with a cold cache.
+        cache.clear()
+        totals = send_safety_digests(self.today)
+        self.assertEqual((totals['sent'], totals['skipped']), (0, 3))
+        self.assertEqual(len(mail.outbox), 3)
+
+        NoticeRead.objects.create(notice=self.notice, employee=self.worker, acknowledged=True)
+        totals = send_safety_digests(self.today)
+        # The worker's own digest and the head's rollup both changed.
+        self.assertEqual((totals['sent'], totals['skipped']), (2, 1))
+
+        out = StringIO()
+        call_command('send_safety_digests', '--force', stdout=out)
+        self.assertEqual(len(mail.outbox), 8)
+        self.assertIn('Илгээсэн: 3', out.getvalue())
+
+    def test_unchanged_digest_is_resent_after_the_resend_window(self):
+        send_safety_digests(self.today)
+        SentDigest.objects.filter(recipient='clerk@example.mn').update(
+            sent_at=timezone.now() - timedelta(hours=25)
+        )
+
+        totals = send_safety_digests(self.today)
+        self.assertEqual((totals['sent'], totals['skipped']), (1, 2))
+        self.assertEqual(mail.outbox[-1].to, ['clerk@example.mn'])
@@ -11,13 +11,13 @@ from django.views import View
 
 from config.permissions import MANAGER_ROLES, get_user_role
 from employees.models import Employee
+from employees.tree import get_department_tree
 
 from .exporters import export_tab_to_excel, export_tab_to_pdf
 from .services import (
     ReportFilters,
     ReportScope,
     build_reports_payload,
-    get_department_and_children_ids,
     get_filter_options,
 )
 
@@ -83,12 +83,12 @@ class ReportPermissionMixin(LoginRequiredMixin, UserPassesTestMixin):
         if role in {'system_admin', 'hse_manager'}:
             return ReportScope(unrestricted=True)
 
-        employee = Employee.objects.select_related('department').filter(user=self.request.user).first()
-        if employee is None or employee.department_id is None:
+        department_id = Employee.objects.filter(user=self.request.user).values_list('department_id', flat=True).first()
+        if department_id is None:
             return ReportScope(unrestricted=False, allowed_department_ids=frozenset())
 
-        allowed_ids = get_department_and_children_ids(employee.department_id)
-        return ReportScope(unrestricted=False, allowed_department_ids=frozenset(allowed_ids))
+        allowed_ids = get_department_tree().descendants(department_id) or frozenset({department_id})
+        return ReportScope(unrestricted=False, allowed_department_ids=allowed_ids)
 
 
 class ReportDashboardView(ReportPermissionMixin, View):
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from search.services import INDEX_BATCH_SIZE, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Мэдэгдэл, зааварчилгаа, сургалт, сургалтын материалын хайлтын индексийг дахин үүсгэнэ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=INDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        totals = rebuild_search_index(batch_size=options['batch_size'])
+        for object_type, count in totals.items():
+            self.stdout.write(f'{object_type}: {count}')
+        self.stdout.write(self.style.SUCCESS('Хайлтын индекс шинэчлэгдлээ.'))
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=32)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('scope_type', models.CharField(max_length=32)),
+                ('scope_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope_type', 'scope_id'], name='search_document_scope_idx')],
+                'constraints': [models.UniqueConstraint(fields=('object_type', 'object_id'), name='unique_search_document')],
+            },
+        ),
+    ]
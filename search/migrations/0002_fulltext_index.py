@@ -0,0 +1,64 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_document_fts USING fts5(
+        title, body, content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER search_document_fts_insert AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_fts_delete AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(search_document_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_fts_update AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_document_fts(search_document_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_document_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS search_document_fts_update',
+    'DROP TRIGGER IF EXISTS search_document_fts_delete',
+    'DROP TRIGGER IF EXISTS search_document_fts_insert',
+    'DROP TABLE IF EXISTS search_document_fts',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX search_document_tsv_idx ON search_searchdocument
+    USING gin ((to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(body, ''))))
+    """,
+]
+POSTGRES_BACKWARD = ['DROP INDEX IF EXISTS search_document_tsv_idx']
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+BATCH_SIZE = 1000
+
+# (app label, model, object_type, scope(instance), text(instance)) as in search.services.SOURCES
+SOURCES = (
+    (
+        'notices',
+        'Notice',
+        'notice',
+        lambda notice: ('notice', notice.pk),
+        lambda notice: (notice.title, notice.content),
+    ),
+    (
+        'instructions',
+        'Instruction',
+        'instruction',
+        lambda instruction: ('instruction', instruction.pk),
+        lambda instruction: (instruction.title, instruction.description),
+    ),
+    (
+        'trainings',
+        'Training',
+        'training',
+        lambda training: ('training', training.pk),
+        lambda training: (training.title, strip_tags(training.description)),
+    ),
+    (
+        'trainings',
+        'TrainingMaterial',
+        'training_material',
+        lambda material: ('training', material.training_id),
+        lambda material: (material.title, strip_tags(material.text_content)),
+    ),
+)
+
+
+def populate_search_documents(apps, schema_editor):
+    # Rows inserted here reach the SQLite FTS table through its triggers; the
+    # PostgreSQL index is an expression index over the same columns.
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+
+    for app_label, model_name, object_type, scope, text in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        batch = []
+        for instance in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            scope_type, scope_id = scope(instance)
+            title, body = text(instance)
+            batch.append(
+                SearchDocument(
+                    object_type=object_type,
+                    object_id=instance.pk,
+                    scope_type=scope_type,
+                    scope_id=scope_id,
+                    title=title[:255],
+                    body=body or '',
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instructions', '0004_instructionrecord_register_indexes'),
+        ('notices', '0005_noticeread_read_at_default'),
+        ('search', '0002_fulltext_index'),
+        ('trainings', '0003_training_lazy_assignment'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
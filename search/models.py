@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """Flattened text of a searchable object.
+
+    ``scope_type``/``scope_id`` name the object whose visibility rules apply:
+    a training material is visible exactly when its training is.
+    """
+
+    object_type = models.CharField(max_length=32)
+    object_id = models.PositiveBigIntegerField()
+    scope_type = models.CharField(max_length=32)
+    scope_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['object_type', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            models.Index(fields=['scope_type', 'scope_id'], name='search_document_scope_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.object_type}:{self.object_id} {self.title}'
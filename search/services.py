@@ -0,0 +1,179 @@
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+
+from config.permissions import MANAGER_ROLES, get_user_role
+from employees.audience import member_queryset
+from employees.models import Employee
+from instructions.models import Instruction, InstructionRecord
+from notices.models import Notice
+from notices.services import live_notice_q
+from trainings.models import Training, TrainingMaterial, TrainingParticipation
+
+from .models import SearchDocument
+
+FTS_TABLE = 'search_document_fts'
+POSTGRES_VECTOR_SQL = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(body, ''))"
+INDEX_BATCH_SIZE = 1000
+DEFAULT_LIMIT = 50
+
+# model -> (object_type, scope(instance), text(instance))
+SOURCES = {
+    Notice: (
+        'notice',
+        lambda notice: ('notice', notice.pk),
+        lambda notice: (notice.title, notice.content),
+    ),
+    Instruction: (
+        'instruction',
+        lambda instruction: ('instruction', instruction.pk),
+        lambda instruction: (instruction.title, instruction.description),
+    ),
+    Training: (
+        'training',
+        lambda training: ('training', training.pk),
+        lambda training: (training.title, strip_tags(training.description)),
+    ),
+    TrainingMaterial: (
+        'training_material',
+        lambda material: ('training', material.training_id),
+        lambda material: (material.title, strip_tags(material.text_content)),
+    ),
+}
+
+
+def _document(instance):
+    object_type, scope, text = SOURCES[type(instance)]
+    scope_type, scope_id = scope(instance)
+    title, body = text(instance)
+    return SearchDocument(
+        object_type=object_type,
+        object_id=instance.pk,
+        scope_type=scope_type,
+        scope_id=scope_id,
+        title=title[:255],
+        body=body or '',
+    )
+
+
+def index_object(instance):
+    document = _document(instance)
+    SearchDocument.objects.update_or_create(
+        object_type=document.object_type,
+        object_id=document.object_id,
+        defaults={
+            'scope_type': document.scope_type,
+            'scope_id': document.scope_id,
+            'title': document.title,
+            'body': document.body,
+        },
+    )
+
+
+def remove_object(instance):
+    object_type = SOURCES[type(instance)][0]
+    SearchDocument.objects.filter(object_type=object_type, object_id=instance.pk).delete()
+
+
+def rebuild_search_index(batch_size=INDEX_BATCH_SIZE):
+    totals = {}
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for model, (object_type, _, _) in SOURCES.items():
+            batch = []
+            count = 0
+            for instance in model.objects.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(_document(instance))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            totals[object_type] = count + len(batch)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return totals
+
+
+def visible_documents(user):
+    """Documents the user may open; ``None`` means no restriction."""
+    if get_user_role(user) in MANAGER_ROLES:
+        return None
+
+    employee = Employee.objects.filter(user=user).first()
+    if employee is None:
+        return SearchDocument.objects.none()
+
+    notice_ids = member_queryset(Notice, employee).filter(live_notice_q()).values('pk')
+    instruction_ids = InstructionRecord.objects.filter(employee=employee).values('instruction_id')
+    assigned_training_ids = TrainingParticipation.objects.filter(
+        employee=employee,
+        training__is_active=True,
+    ).values('training_id')
+    lazy_training_ids = member_queryset(Training, employee).filter(is_active=True, lazy_assignment=True).values('pk')
+    return SearchDocument.objects.filter(
+        Q(scope_type='notice', scope_id__in=notice_ids)
+        | Q(scope_type='instruction', scope_id__in=instruction_ids)
+        | Q(scope_type='training', scope_id__in=assigned_training_ids)
+        | Q(scope_type='training', scope_id__in=lazy_training_ids)
+    )
+
+
+def _fts5_query(text):
+    # Quote every term so user input never reaches the FTS5 query syntax.
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in text.split())
+
+
+def _sqlite_search(text, visible, limit):
+    sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [_fts5_query(text)]
+    if visible is not None:
+        visible_sql, visible_params = visible.values('id').query.sql_with_params()
+        sql += f' AND rowid IN ({visible_sql})'
+        params.extend(visible_params)
+    sql += f' ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+    documents = SearchDocument.objects.in_bulk(ids)
+    return [documents[document_id] for document_id in ids if document_id in documents]
+
+
+def _postgres_search(text, visible, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+    queryset = SearchDocument.objects.all() if visible is None else visible
+    vector = RawSQL(POSTGRES_VECTOR_SQL, [], output_field=SearchVectorField())
+    query = SearchQuery(text, config='simple', search_type='websearch')
+    return list(
+        queryset.annotate(vector=vector)
+        .filter(vector=query)
+        .annotate(rank=SearchRank(vector, query))
+        .order_by('-rank')[:limit]
+    )
+
+
+def _fallback_search(text, visible, limit):
+    queryset = SearchDocument.objects.all() if visible is None else visible
+    for term in text.split():
+        queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return list(queryset.order_by('-updated_at')[:limit])
+
+
+def search_documents(text, user, limit=DEFAULT_LIMIT):
+    text = (text or '').strip()
+    if not text:
+        return []
+
+    visible = visible_documents(user)
+    if visible is not None and visible.query.is_empty():
+        return []
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(text, visible, limit)
+    if connection.vendor == 'postgresql':
+        return _postgres_search(text, visible, limit)
+    return _fallback_search(text, visible, limit)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+
+from .services import SOURCES, index_object, remove_object
+
+
+def _index_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def _remove_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+for _model in SOURCES:
+    post_save.connect(_index_saved, sender=_model, dispatch_uid=f'search_index_{_model._meta.label_lower}')
+    post_delete.connect(_remove_deleted, sender=_model, dispatch_uid=f'search_remove_{_model._meta.label_lower}')
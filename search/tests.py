@@ -0,0 +1,99 @@
+from datetime import date
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+
+from employees.models import Department, Employee
+from instructions.models import Instruction
+from notices.models import Notice
+from trainings.models import Training, TrainingMaterial
+
+from .models import SearchDocument
+from .services import rebuild_search_index, search_documents
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_superuser(username='search_admin', password='pass1234')
+        self.user = User.objects.create_user(username='search_emp', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(group)
+
+        self.department = Department.objects.create(name='Уурхай')
+        self.other_department = Department.objects.create(name='Оффис')
+        self.employee = Employee.objects.create(
+            user=self.user,
+            first_name='S',
+            last_name='E',
+            register='SE00000001',
+            department=self.department,
+        )
+
+        self.visible_notice = Notice.objects.create(
+            title='Дуулга өмсөх журам',
+            content='Уурхайд дуулгагүй нэвтрэхийг хориглоно.',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.manager,
+        )
+        self.visible_notice.departments.add(self.department)
+        self.hidden_notice = Notice.objects.create(
+            title='Оффисын дуулга',
+            content='Зөвхөн оффист.',
+            notice_type=Notice.NoticeType.DEPARTMENT,
+            created_by=self.manager,
+        )
+        self.hidden_notice.departments.add(self.other_department)
+
+        self.training = Training.objects.create(
+            title='Галын аюулгүй байдал',
+            training_type=Training.TrainingType.ORGANIZATION_WIDE,
+            start_date=date(2026, 5, 1),
+            end_date=date(2026, 5, 2),
+            description='<p class="lead">Гал гарсан үед <strong>нүүлгэн шилжүүлэх</strong></p>',
+            trainer_name='Багш',
+            lazy_assignment=True,
+            created_by=self.manager,
+        )
+        TrainingMaterial.objects.create(
+            training=self.training,
+            title='Гарын авлага',
+            material_type=TrainingMaterial.MaterialType.TEXT,
+            text_content='<p>Гал унтраагуур ашиглах дуулга</p>',
+        )
+        Instruction.objects.create(title='Өндөрт ажиллах', description='Дуулга ба бүс.')
+
+    def _titles(self, text, user):
+        return [document.title for document in search_documents(text, user)]
+
+    def test_signals_keep_index_in_sync(self):
+        self.assertEqual(SearchDocument.objects.count(), 5)
+        self.visible_notice.title = 'Шинэ журам'
+        self.visible_notice.save()
+        self.assertIn('Шинэ журам', self._titles('журам', self.manager))
+
+        self.training.delete()
+        self.assertFalse(SearchDocument.objects.filter(scope_type='training').exists())
+
+    def test_training_description_is_indexed_without_markup(self):
+        document = SearchDocument.objects.get(object_type='training', object_id=self.training.pk)
+        self.assertEqual(document.body, 'Гал гарсан үед нүүлгэн шилжүүлэх')
+        self.assertEqual(self._titles('strong', self.manager), [])
+
+    def test_employee_only_finds_visible_documents(self):
+        self.assertCountEqual(
+            self._titles('дуулга', self.user),
+            ['Дуулга өмсөх журам', 'Гарын авлага'],
+        )
+        self.assertEqual(len(self._titles('дуулга', self.manager)), 4)
+
+    def test_title_matches_rank_first_and_rebuild(self):
+        rebuild_search_index()
+        self.assertEqual(self._titles('дуулга', self.manager)[0], 'Оффисын дуулга')
+        self.assertEqual(self._titles('"; DROP', self.manager), [])
+
+    def test_search_view(self):
+        self.client.login(username='search_emp', password='pass1234')
+        response = self.client.get(reverse('search'), {'q': 'гал'})
+        self.assertContains(response, 'Гарын авлага')
+        self.assertNotContains(response, 'Оффисын дуулга')
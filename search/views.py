@@ -0,0 +1,26 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.urls import reverse
+
+from config.permissions import MANAGER_ROLES, get_user_role
+
+from .services import search_documents
+
+
+def _document_url(document, is_manager):
+    if document.scope_type == 'notice':
+        return reverse('notice_update', args=[document.scope_id]) if is_manager else reverse('my_notices')
+    if document.scope_type == 'instruction':
+        return reverse('instruction_list') if is_manager else reverse('my_instruction_records')
+    return reverse('training_detail', args=[document.scope_id])
+
+
+@login_required
+def search(request):
+    query = request.GET.get('q', '').strip()
+    is_manager = get_user_role(request.user) in MANAGER_ROLES
+    results = [
+        {'document': document, 'url': _document_url(document, is_manager)}
+        for document in search_documents(query, request.user)
+    ]
+    return render(request, 'search/results.html', {'query': query, 'results': results})
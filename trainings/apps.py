@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TrainingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trainings'
+
+    def ready(self):
+        from employees.audience import register_audience_model
+
+        from . import signals  # noqa: F401
+        from .models import Training
+
+        register_audience_model(Training, type_field='training_type')
@@ -18,6 +18,7 @@ class TrainingForm(forms.ModelForm):
             'end_date',
             'trainer_name',
             'required',
+            'lazy_assignment',
             'is_active',
         ]
         widgets = {
@@ -38,6 +39,7 @@ class TrainingForm(forms.ModelForm):
             'end_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'trainer_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Сургагчийн нэр'}),
             'required': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'lazy_assignment': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from trainings.services import PARTICIPATION_BATCH_SIZE, backfill_training_participations
+
+
+class Command(BaseCommand):
+    help = 'Бүх ажилтны идэвхтэй сургалтын хуваарилалтыг багцаар нь тааруулна.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PARTICIPATION_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def report(totals):
+            self.stdout.write(
+                f"{totals['employees']} ажилтан: +{totals['created']} / -{totals['retired']}"
+            )
+
+        totals = backfill_training_participations(batch_size=options['batch_size'], progress=report)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Дууслаа: {totals['created']} хуваарилалт нэмэгдэж, {totals['retired']} цуцлагдлаа."
+            )
+        )
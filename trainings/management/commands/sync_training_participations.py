@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trainings.models import Training
+from trainings.services import PARTICIPATION_BATCH_SIZE, StalePolicy, sync_training_participations
+
+
+class Command(BaseCommand):
+    help = 'Сургалтын хуваарилалтыг багцаар нь хамрах хүрээтэй тааруулна.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('training_ids', nargs='*', type=int)
+        parser.add_argument('--batch-size', type=int, default=PARTICIPATION_BATCH_SIZE)
+        parser.add_argument('--policy', choices=StalePolicy.CHOICES)
+
+    def handle(self, *args, **options):
+        trainings = Training.objects.filter(is_active=True)
+        if options['training_ids']:
+            trainings = Training.objects.filter(pk__in=options['training_ids'])
+            if not trainings.exists():
+                raise CommandError('Сургалт олдсонгүй.')
+
+        for training in trainings.iterator():
+            def report(totals, training=training):
+                self.stdout.write(
+                    f"{training.title}: {totals['total_targets']} зорилтот, +{totals['created']}, "
+                    f"-{totals['removed']}/{totals['stale']}"
+                )
+
+            sync_training_participations(
+                training,
+                batch_size=options['batch_size'],
+                stale_policy=options['policy'],
+                progress=report,
+            )
+        self.stdout.write(self.style.SUCCESS('Хуваарилалт тааруулагдлаа.'))
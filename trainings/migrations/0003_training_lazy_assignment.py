@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainings', '0002_alter_trainingmaterial_material_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='training',
+            name='lazy_assignment',
+            field=models.BooleanField(default=False),
+        ),
+    ]
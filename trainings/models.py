@@ -26,6 +26,8 @@ class Training(models.Model):
 
     trainer_name = models.CharField(max_length=255)
     required = models.BooleanField(default=False)
+    # Assignment is implied by the audience; participation rows are written on the first status change.
+    lazy_assignment = models.BooleanField(default=False)
 
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='created_trainings')
     created_at = models.DateTimeField(auto_now_add=True)
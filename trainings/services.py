@@ -1,63 +1,193 @@
-from employees.models import Department, Employee
-
-from .models import Training, TrainingParticipation
+from django.conf import settings
+from django.db import transaction
 
+from employees.audience import audience_employees, get_audience_fields, member_employees, member_queryset
+from employees.models import AudienceMembership, Employee
 
-def _collect_department_with_children_ids(department_ids):
-    ids = set(department_ids)
-    queue = list(department_ids)
-
-    while queue:
-        current_id = queue.pop(0)
-        child_ids = list(Department.objects.filter(parent_id=current_id).values_list('id', flat=True))
-        for child_id in child_ids:
-            if child_id not in ids:
-                ids.add(child_id)
-                queue.append(child_id)
+from .models import Training, TrainingParticipation
 
-    return ids
+PARTICIPATION_BATCH_SIZE = 1000
 
 
 def get_target_employees_for_training(training):
-    qs = Employee.objects.select_related('department', 'position').all()
-
-    if training.training_type == Training.TrainingType.ORGANIZATION_WIDE:
-        return qs
-
-    if training.training_type == Training.TrainingType.DEPARTMENT:
-        dept_ids = list(training.departments.values_list('id', flat=True))
-        if not dept_ids:
-            return qs.none()
-        all_ids = _collect_department_with_children_ids(dept_ids)
-        return qs.filter(department_id__in=all_ids)
-
-    if training.training_type == Training.TrainingType.POSITION:
-        return qs.filter(position__in=training.positions.all())
-
-    if training.training_type == Training.TrainingType.SPECIFIC_EMPLOYEE:
-        return qs.filter(id__in=training.employees.values_list('id', flat=True))
-
-    return qs.none()
-
-
-def sync_training_participations(training):
-    target_ids = set(get_target_employees_for_training(training).values_list('id', flat=True))
+    return audience_employees(training).select_related('department', 'position')
+
+
+def get_training_participations(training):
+    participations = list(training.participations.select_related('employee'))
+    if not training.lazy_assignment:
+        return participations
+
+    implicit = member_employees(training).exclude(pk__in=training.participations.values('employee_id')).order_by('id')
+    return participations + [TrainingParticipation(training=training, employee=employee) for employee in implicit]
+
+
+def get_employee_participations(employee):
+    participations = list(
+        TrainingParticipation.objects.select_related('training').filter(employee=employee, training__is_active=True)
+    )
+    lazy_trainings = member_queryset(Training, employee).filter(is_active=True, lazy_assignment=True).exclude(
+        pk__in=[participation.training_id for participation in participations]
+    )
+    participations.extend(TrainingParticipation(training=training, employee=employee) for training in lazy_trainings)
+    participations.sort(key=lambda participation: participation.training.start_date, reverse=True)
+    return participations
+
+
+def get_employee_participation(employee, training_id):
+    participation = (
+        TrainingParticipation.objects.select_related('training')
+        .prefetch_related('training__materials')
+        .filter(training_id=training_id, employee=employee)
+        .first()
+    )
+    if participation is not None:
+        return participation
+
+    training = (
+        member_queryset(Training, employee)
+        .filter(pk=training_id, is_active=True, lazy_assignment=True)
+        .prefetch_related('materials')
+        .first()
+    )
+    if training is None:
+        return None
+    return TrainingParticipation(training=training, employee=employee)
+
+
+class StalePolicy:
+    KEEP = 'keep'
+    RETIRE_ASSIGNED = 'retire_assigned'
+    DELETE = 'delete'
+
+    CHOICES = (KEEP, RETIRE_ASSIGNED, DELETE)
+
+
+def get_stale_policy(policy=None):
+    policy = policy or getattr(settings, 'TRAINING_STALE_PARTICIPATION_POLICY', StalePolicy.KEEP)
+    if policy not in StalePolicy.CHOICES:
+        raise ValueError(f'Тодорхойгүй stale policy: {policy}')
+    return policy
+
+
+def _removable(queryset, policy):
+    if policy == StalePolicy.RETIRE_ASSIGNED:
+        return queryset.filter(status=TrainingParticipation.Status.ASSIGNED)
+    return queryset
+
+
+def _stale_participations(training, policy):
+    return _removable(
+        TrainingParticipation.objects.filter(training=training).exclude(
+            employee_id__in=audience_employees(training).values('id')
+        ),
+        policy,
+    )
+
+
+def sync_training_participations(training, batch_size=PARTICIPATION_BATCH_SIZE, stale_policy=None, progress=None):
+    stale_policy = get_stale_policy(stale_policy)
+    target_ids = audience_employees(training).order_by('id').values_list('id', flat=True)
+    existing_ids = TrainingParticipation.objects.filter(training=training).values_list('employee_id', flat=True)
+
+    totals = {'created': 0, 'total_targets': 0, 'stale': 0, 'removed': 0}
+    last_id = 0
+    while not training.lazy_assignment:
+        chunk = list(target_ids.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        present = set(existing_ids.filter(employee_id__gte=chunk[0], employee_id__lte=chunk[-1]))
+        create_list = [
+            TrainingParticipation(employee_id=employee_id, training=training)
+            for employee_id in chunk
+            if employee_id not in present
+        ]
+        TrainingParticipation.objects.bulk_create(create_list, batch_size=batch_size, ignore_conflicts=True)
+
+        totals['created'] += len(create_list)
+        totals['total_targets'] += len(chunk)
+        last_id = chunk[-1]
+        if progress is not None:
+            progress(totals)
+    if training.lazy_assignment:
+        totals['total_targets'] = target_ids.count()
+
+    stale = _stale_participations(training, stale_policy).order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        chunk = list(stale.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        totals['stale'] += len(chunk)
+        if stale_policy != StalePolicy.KEEP:
+            totals['removed'] += _removable(TrainingParticipation.objects.filter(pk__in=chunk), stale_policy).delete()[0]
+        last_id = chunk[-1]
+        if progress is not None:
+            progress(totals)
+
+    return totals
+
+
+def sync_employee_training_participations(employee_ids, batch_size=PARTICIPATION_BATCH_SIZE, stale_policy=None):
+    stale_policy = get_stale_policy(stale_policy)
+    employee_ids = list(employee_ids)
+    active_training_ids = Training.objects.filter(is_active=True).values('id')
+    targeted = set(
+        AudienceMembership.objects.filter(
+            object_type=get_audience_fields(Training).object_type,
+            object_id__in=active_training_ids,
+            employee_id__in=employee_ids,
+        ).values_list('object_id', 'employee_id')
+    )
     existing = {
-        p.employee_id: p
-        for p in TrainingParticipation.objects.filter(training=training)
+        (training_id, employee_id): status
+        for training_id, employee_id, status in TrainingParticipation.objects.filter(
+            training_id__in=active_training_ids,
+            employee_id__in=employee_ids,
+        ).values_list('training_id', 'employee_id', 'status')
     }
 
-    create_list = []
-    for employee_id in target_ids:
-        if employee_id not in existing:
-            create_list.append(
-                TrainingParticipation(employee_id=employee_id, training=training)
-            )
-
-    if create_list:
-        TrainingParticipation.objects.bulk_create(create_list)
-
-    return {
-        'created': len(create_list),
-        'total_targets': len(target_ids),
-    }
+    lazy_training_ids = set(
+        Training.objects.filter(is_active=True, lazy_assignment=True).values_list('id', flat=True)
+    )
+
+    create_list = [
+        TrainingParticipation(training_id=training_id, employee_id=employee_id)
+        for training_id, employee_id in targeted
+        if (training_id, employee_id) not in existing and training_id not in lazy_training_ids
+    ]
+    retired_by_training = {}
+    for (training_id, employee_id), status in existing.items():
+        if (training_id, employee_id) in targeted or stale_policy == StalePolicy.KEEP:
+            continue
+        if stale_policy == StalePolicy.DELETE or status == TrainingParticipation.Status.ASSIGNED:
+            retired_by_training.setdefault(training_id, []).append(employee_id)
+
+    retired = 0
+    with transaction.atomic():
+        TrainingParticipation.objects.bulk_create(create_list, batch_size=batch_size, ignore_conflicts=True)
+        for training_id, retired_employee_ids in retired_by_training.items():
+            retired += _removable(
+                TrainingParticipation.objects.filter(training_id=training_id, employee_id__in=retired_employee_ids),
+                stale_policy,
+            ).delete()[0]
+
+    return {'created': len(create_list), 'retired': retired}
+
+
+def backfill_training_participations(batch_size=PARTICIPATION_BATCH_SIZE, stale_policy=None, progress=None):
+    totals = {'created': 0, 'retired': 0, 'employees': 0}
+    employee_ids = Employee.objects.order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while True:
+        chunk = list(employee_ids.filter(id__gt=last_id)[:batch_size])
+        if not chunk:
+            break
+        result = sync_employee_training_participations(chunk, batch_size=batch_size, stale_policy=stale_policy)
+        totals['created'] += result['created']
+        totals['retired'] += result['retired']
+        totals['employees'] += len(chunk)
+        last_id = chunk[-1]
+        if progress is not None:
+            progress(totals)
+    return totals
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+
+from employees.signals import employee_assignment_changed
+
+from .services import sync_employee_training_participations
+
+
+@receiver(employee_assignment_changed)
+def sync_moved_employee_trainings(sender, employee, **kwargs):
+    sync_employee_training_participations([employee.pk])
@@ -3,13 +3,13 @@ from datetime import date
 from django.contrib.auth.models import Group, User
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from employees.models import Department, Employee, Position
 
 from .models import Training, TrainingMaterial, TrainingParticipation
-from .services import sync_training_participations
+from .services import StalePolicy, sync_training_participations
 
 
 class TrainingParticipationTests(TestCase):
@@ -46,6 +46,51 @@ class TrainingParticipationTests(TestCase):
             TrainingParticipation.objects.filter(training=self.training, employee=self.employee).exists()
         )
 
+    def test_new_employee_in_department_gets_assignment(self):
+        user = User.objects.create_user(username='emp_new', password='pass1234')
+        newcomer = Employee.objects.create(
+            user=user,
+            first_name='N',
+            last_name='E',
+            register='AA33333334',
+            department=self.department,
+        )
+        self.assertTrue(TrainingParticipation.objects.filter(training=self.training, employee=newcomer).exists())
+
+    def test_moved_employee_keeps_assignment_by_default(self):
+        sync_training_participations(self.training)
+
+        self.employee.department = Department.objects.create(name='Санхүү')
+        self.employee.save()
+
+        self.assertTrue(TrainingParticipation.objects.filter(training=self.training, employee=self.employee).exists())
+
+    @override_settings(TRAINING_STALE_PARTICIPATION_POLICY=StalePolicy.RETIRE_ASSIGNED)
+    def test_moved_employee_assignment_is_retired_but_history_kept(self):
+        other_department = Department.objects.create(name='Санхүү')
+        completed_training = Training.objects.create(
+            title='Дууссан сургалт',
+            training_type=Training.TrainingType.DEPARTMENT,
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 2, 1),
+            trainer_name='Багш',
+            created_by=self.employee.user,
+        )
+        completed_training.departments.add(self.department)
+        sync_training_participations(self.training)
+        sync_training_participations(completed_training)
+        TrainingParticipation.objects.filter(training=completed_training).update(
+            status=TrainingParticipation.Status.COMPLETED
+        )
+
+        self.employee.department = other_department
+        self.employee.save()
+
+        self.assertFalse(TrainingParticipation.objects.filter(training=self.training, employee=self.employee).exists())
+        self.assertTrue(
+            TrainingParticipation.objects.filter(training=completed_training, employee=self.employee).exists()
+        )
+
 
 class TrainingMaterialValidationTests(TestCase):
     def setUp(self):
@@ -130,3 +175,100 @@ class EmployeeTrainingViewTests(TestCase):
         participation = TrainingParticipation.objects.get(training=self.training)
         self.assertEqual(participation.status, TrainingParticipation.Status.COMPLETED)
         self.assertIsNotNone(participation.completed_at)
+
+
+class TrainingSyncBatchTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Үйлдвэр')
+        self.other_department = Department.objects.create(name='Оффис')
+        self.manager = User.objects.create_user(username='sync_mgr', password='pass1234')
+        self.employees = []
+        for index in range(5):
+            user = User.objects.create_user(username=f'sync{index}', password='pass1234')
+            self.employees.append(
+                Employee.objects.create(
+                    user=user,
+                    first_name='S',
+                    last_name=str(index),
+                    register=f'SY{index:08d}',
+                    department=self.department,
+                )
+            )
+        self.training = Training.objects.create(
+            title='Багц сургалт',
+            training_type=Training.TrainingType.DEPARTMENT,
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 2, 1),
+            trainer_name='Багш',
+            created_by=self.manager,
+        )
+        self.training.departments.add(self.department)
+
+    def test_sync_in_small_batches_reports_progress(self):
+        progress = []
+        result = sync_training_participations(
+            self.training,
+            batch_size=2,
+            progress=lambda totals: progress.append(dict(totals)),
+        )
+
+        self.assertEqual(result['created'], 5)
+        self.assertEqual(result['total_targets'], 5)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(TrainingParticipation.objects.filter(training=self.training).count(), 5)
+
+    def test_stale_policy_controls_untargeted_rows(self):
+        sync_training_participations(self.training)
+        self.training.departments.set([self.other_department])
+
+        kept = sync_training_participations(self.training, stale_policy=StalePolicy.KEEP)
+        self.assertEqual(kept['stale'], 5)
+        self.assertEqual(kept['removed'], 0)
+
+        removed = sync_training_participations(self.training, stale_policy=StalePolicy.RETIRE_ASSIGNED)
+        self.assertEqual(removed['removed'], 5)
+        self.assertFalse(TrainingParticipation.objects.filter(training=self.training).exists())
+
+
+class LazyTrainingAssignmentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lazy_emp', password='pass1234')
+        group, _ = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(group)
+
+        self.department = Department.objects.create(name='Агуулах')
+        self.employee = Employee.objects.create(
+            user=self.user,
+            first_name='L',
+            last_name='Z',
+            register='LZ00000001',
+            department=self.department,
+        )
+        self.training = Training.objects.create(
+            title='Байгууллагын сургалт',
+            training_type=Training.TrainingType.ORGANIZATION_WIDE,
+            start_date=date(2026, 4, 1),
+            end_date=date(2026, 4, 2),
+            trainer_name='Багш',
+            lazy_assignment=True,
+            created_by=self.user,
+        )
+
+    def test_sync_does_not_materialize_rows(self):
+        result = sync_training_participations(self.training)
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['total_targets'], 1)
+        self.assertFalse(TrainingParticipation.objects.filter(training=self.training).exists())
+
+    def test_implicit_assignment_is_listed_and_saved_on_status_change(self):
+        self.client.login(username='lazy_emp', password='pass1234')
+        response = self.client.get(reverse('my_trainings'))
+        self.assertContains(response, 'Байгууллагын сургалт')
+
+        response = self.client.post(
+            reverse('training_detail', kwargs={'training_id': self.training.id}),
+            data={'status': TrainingParticipation.Status.ATTENDED, 'update_status': '1'},
+        )
+        self.assertEqual(response.status_code, 302)
+        participation = TrainingParticipation.objects.get(training=self.training, employee=self.employee)
+        self.assertEqual(participation.status, TrainingParticipation.Status.ATTENDED)
@@ -1,13 +1,19 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
 from config.permissions import MANAGER_ROLES, get_user_role, role_required
 from employees.models import Employee
 
 from .forms import ParticipationStatusForm, TrainingForm, TrainingMaterialFormSet
-from .models import Training, TrainingParticipation
-from .services import sync_training_participations
+from .models import Training
+from .services import (
+    get_employee_participation,
+    get_employee_participations,
+    get_training_participations,
+    sync_training_participations,
+)
 
 
 def _manager_training_queryset():
@@ -92,7 +98,7 @@ def training_detail(request, training_id):
             _manager_training_queryset(),
             pk=training_id,
         )
-        participations = training.participations.select_related('employee')
+        participations = get_training_participations(training)
 
         return render(
             request,
@@ -105,11 +111,9 @@ def training_detail(request, training_id):
         )
 
     employee = get_object_or_404(Employee, user=request.user)
-    participation = get_object_or_404(
-        TrainingParticipation.objects.select_related('training').prefetch_related('training__materials'),
-        training_id=training_id,
-        employee=employee,
-    )
+    participation = get_employee_participation(employee, training_id)
+    if participation is None:
+        raise Http404
 
     status_form = ParticipationStatusForm(request.POST or None, instance=participation)
     if request.method == 'POST' and 'update_status' in request.POST:
@@ -136,9 +140,5 @@ def my_trainings(request):
     if employee is None:
         return render(request, 'trainings/my_trainings.html', {'participations': []})
 
-    participations = (
-        TrainingParticipation.objects.select_related('training')
-        .filter(employee=employee, training__is_active=True)
-        .order_by('-training__start_date')
-    )
+    participations = get_employee_participations(employee)
     return render(request, 'trainings/my_trainings.html', {'participations': participations})